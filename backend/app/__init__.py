@@ -13,12 +13,19 @@ def create_app():
     """Create and configure the Flask application."""
     app = Flask(__name__)
     
+    # Parse stdin uploads straight into the execution spool
+    from app.services.execution_spool import ExecutionSpool, SpoolingRequest
+    app.request_class = SpoolingRequest
+    
     # Configuration
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', app.config['SECRET_KEY'])
     app.config['MONGODB_URI'] = os.getenv('MONGODB_URI')
     app.config['GEMINI_API_KEY'] = os.getenv('GEMINI_API_KEY')
     
+    # Reject request bodies larger than a stdin upload plus the form before parsing them
+    app.config['MAX_CONTENT_LENGTH'] = ExecutionSpool.get_max_request_bytes()
+    
     # Enable CORS - allow all origins for development
     CORS(app, origins="*", supports_credentials=True)
     
@@ -39,6 +46,13 @@ def create_app():
     app.register_blueprint(gist_bp)
     app.register_blueprint(execute_bp)
     
+    # Probe execution backends (local toolchains, Judge0) in the background
+    from app.services.execution_service import ExecutionService
+    ExecutionService.start_backend_probing()
+    
+    # Drop spooled stdin/stdout files left by previous runs of the server
+    ExecutionSpool.sweep()
+    
     # Error handlers
     @app.errorhandler(400)
     def bad_request(error):
@@ -52,6 +66,11 @@ def create_app():
     def not_found(error):
         return {'error': 'Resource not found'}, 404
     
+    @app.errorhandler(413)
+    def payload_too_large(error):
+        limit = ExecutionSpool.get_max_input_bytes()
+        return {'error': f'Request too large. Uploaded input may be at most {limit} bytes.'}, 413
+    
     @app.errorhandler(429)
     def rate_limit_exceeded(error):
         return {'error': 'Too many requests. Please wait before trying again.'}, 429
@@ -1,13 +1,47 @@
 """
 Authentication Middleware
 """
+import inspect
 from functools import wraps
 from flask import request, jsonify
 from app.services.auth_service import AuthService
+from app.services.async_db_service import AsyncDatabaseService
+
+
+def _bearer_token():
+    """Get the token of a "Bearer <token>" Authorization header (None if malformed)."""
+    parts = request.headers.get('Authorization', '').split()
+    if len(parts) != 2 or parts[0].lower() != 'bearer':
+        return None
+    return parts[1]
 
 
 def require_auth(f):
-    """Decorator to require authentication for a route."""
+    """
+    Decorator to require authentication for a route.
+    
+    Works on sync and async views; for async views the user lookup is awaited
+    instead of blocking the event loop.
+    """
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_async(*args, **kwargs):
+            if not request.headers.get('Authorization'):
+                return jsonify({'error': 'Authorization header is required'}), 401
+            
+            token = _bearer_token()
+            if not token:
+                return jsonify({'error': 'Invalid authorization header format'}), 401
+            
+            result = await AsyncDatabaseService.run(AuthService.get_user_from_token, token)
+            
+            if not result['success']:
+                return jsonify({'error': result['error']}), 401
+            
+            return await f(result['user'], *args, **kwargs)
+        
+        return decorated_async
+    
     @wraps(f)
     def decorated(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
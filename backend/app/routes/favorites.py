@@ -47,15 +47,6 @@ def add_favorite(current_user):
         if not generation:
             return jsonify({'error': 'Generation not found'}), 404
         
-        # Check if already favorited
-        existing = DatabaseService.get_favorite_by_generation(
-            user_id=current_user['id'],
-            generation_id=generation_id
-        )
-        
-        if existing:
-            return jsonify({'error': 'Already in favorites'}), 400
-        
         favorite = DatabaseService.add_favorite(
             user_id=current_user['id'],
             generation_id=generation_id,
@@ -64,6 +55,9 @@ def add_favorite(current_user):
             prompt_preview=generation.get('prompt', '')[:100]
         )
         
+        if favorite is None:
+            return jsonify({'error': 'Already in favorites'}), 400
+        
         return jsonify({'favorite': favorite, 'message': 'Added to favorites'}), 201
         
     except Exception as e:
@@ -5,6 +5,9 @@ from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth
 from app.services.gemini_service import GeminiService
 from app.services.db_service import DatabaseService
+from app.services.translation_service import TranslationService, MAX_TARGET_LANGUAGES
+from app.services.execution_service import COMPILE_PROFILES
+from app.services.similarity_service import SimilarityService
 
 generate_bp = Blueprint('generate', __name__, url_prefix='/api')
 
@@ -43,7 +46,36 @@ def generate_code(current_user):
             'error': f'Unsupported language. Supported: {", ".join(SUPPORTED_LANGUAGES)}'
         }), 400
     
+    # Opt-in: answering from an earlier generation skips Gemini, so clients must ask for it
+    reuse = data.get('reuse', False) is True
+    
     try:
+        # Fast path: answer from the user's earlier generation for a near-identical prompt
+        if reuse and SimilarityService.is_reuse_enabled():
+            previous = DatabaseService.find_reusable_generation(
+                user_id=current_user['id'],
+                prompt=prompt,
+                language=language,
+                threshold=SimilarityService.get_reuse_threshold()
+            )
+            if previous:
+                DatabaseService.record_generation_reuse(current_user['id'], previous, prompt)
+                return jsonify({
+                    'id': previous['_id'],
+                    'code': previous['generated_code'],
+                    'explanation': previous.get('explanation', ''),
+                    'sample_input': previous.get('sample_input', ''),
+                    'language': language,
+                    'prompt': prompt,
+                    'reused': True,
+                    'reused_from': {
+                        'id': previous['_id'],
+                        'prompt': previous['prompt'],
+                        'created_at': previous.get('created_at'),
+                        'similarity': previous['similarity']
+                    }
+                }), 200
+        
         # Call Gemini API through service layer
         result = GeminiService.generate_code_with_explanation(
             prompt=prompt,
@@ -59,7 +91,8 @@ def generate_code(current_user):
             prompt=prompt,
             language=language,
             code=result['code'],
-            explanation=result['explanation']
+            explanation=result['explanation'],
+            sample_input=result.get('sample_input', '')
         )
         
         return jsonify({
@@ -68,7 +101,8 @@ def generate_code(current_user):
             'explanation': result['explanation'],
             'sample_input': result.get('sample_input', ''),
             'language': language,
-            'prompt': prompt
+            'prompt': prompt,
+            'reused': False
         }), 200
         
     except Exception as e:
@@ -144,6 +178,75 @@ def refine_code(current_user):
         return jsonify({'error': 'An error occurred during code refinement'}), 500
 
 
+@generate_bp.route('/generate/translate', methods=['POST'])
+@require_auth
+def translate_code(current_user):
+    """Translate a generation into other languages and benchmark every variant side by side."""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'Request body is required'}), 400
+    
+    generation_id = data.get('generation_id')
+    target_languages = data.get('target_languages', [])
+    stdin = data.get('input', '')
+    profile = data.get('profile', 'bench')
+    
+    if not generation_id:
+        return jsonify({'error': 'generation_id is required'}), 400
+    
+    if not isinstance(target_languages, list) or not target_languages:
+        return jsonify({'error': 'target_languages must be a non-empty list'}), 400
+    
+    targets = []
+    for language in target_languages:
+        language = str(language).lower().strip()
+        if language not in SUPPORTED_LANGUAGES:
+            return jsonify({
+                'error': f'Unsupported language "{language}". Supported: {", ".join(SUPPORTED_LANGUAGES)}'
+            }), 400
+        if language not in targets:
+            targets.append(language)
+    
+    if len(targets) > MAX_TARGET_LANGUAGES:
+        return jsonify({'error': f'A maximum of {MAX_TARGET_LANGUAGES} target languages is allowed'}), 400
+    
+    if not isinstance(stdin, str):
+        return jsonify({'error': 'input must be a string'}), 400
+    
+    if profile not in COMPILE_PROFILES:
+        return jsonify({
+            'error': f'Unknown profile "{profile}". Supported: {", ".join(COMPILE_PROFILES.keys())}'
+        }), 400
+    
+    try:
+        generation = DatabaseService.get_generation_by_id(
+            generation_id=generation_id,
+            user_id=current_user['id']
+        )
+        
+        if not generation:
+            return jsonify({'error': 'Generation not found'}), 404
+        
+        targets = [language for language in targets if language != generation.get('language')]
+        if not targets:
+            return jsonify({'error': 'target_languages must include a language other than the source'}), 400
+        
+        result = TranslationService.translate_and_benchmark(
+            user_id=current_user['id'],
+            generation=generation,
+            targets=targets,
+            stdin=stdin,
+            profile=profile
+        )
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        print(f"Translation error: {str(e)}")
+        return jsonify({'error': 'An error occurred during code translation'}), 500
+
+
 @generate_bp.route('/languages', methods=['GET'])
 def get_supported_languages():
     """Get list of supported programming languages."""
@@ -1,9 +1,11 @@
 """
 GitHub Gist Integration Routes
 """
+import asyncio
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth
 from app.services.db_service import DatabaseService
+from app.services.async_db_service import AsyncDatabaseService
 import requests
 
 gist_bp = Blueprint('gist', __name__, url_prefix='/api/gist')
@@ -196,10 +198,14 @@ def disconnect_github(current_user):
 
 @gist_bp.route('/status', methods=['GET'])
 @require_auth
-def github_status(current_user):
+async def github_status(current_user):
     """Check if user has GitHub connected and return status."""
     try:
-        github_token = DatabaseService.get_user_github_token(current_user['id'])
+        # Token and stored username are looked up concurrently
+        github_token, user = await asyncio.gather(
+            AsyncDatabaseService.get_user_github_token(current_user['id']),
+            AsyncDatabaseService.find_user_by_id(current_user['id'], {'github_username': 1})
+        )
         
         if not github_token:
             return jsonify({
@@ -207,12 +213,6 @@ def github_status(current_user):
                 'github_username': None
             }), 200
         
-        # Get stored username from DB
-        db = DatabaseService.get_db()
-        user = db.users.find_one(
-            {'_id': __import__('bson').ObjectId(current_user['id'])},
-            {'github_username': 1}
-        )
         github_username = user.get('github_username', '') if user else ''
         
         return jsonify({
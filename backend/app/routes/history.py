@@ -3,7 +3,7 @@ History Routes
 """
 from flask import Blueprint, request, jsonify
 from app.middleware.auth_middleware import require_auth
-from app.services.db_service import DatabaseService
+from app.services.db_service import DatabaseService, MAX_SEARCH_QUERY, DEFAULT_SIMILARITY_THRESHOLD
 
 history_bp = Blueprint('history', __name__, url_prefix='/api')
 
@@ -11,36 +11,93 @@ history_bp = Blueprint('history', __name__, url_prefix='/api')
 @history_bp.route('/history', methods=['GET'])
 @require_auth
 def get_history(current_user):
-    """Get user's code generation history."""
+    """
+    Get user's code generation history.
+    
+    Pages with `cursor` (the `next_cursor` of the previous page) when given,
+    otherwise with `skip`. Items are summaries (no code) unless `view=full`.
+    """
     # Get pagination parameters
     try:
         limit = int(request.args.get('limit', 20))
         skip = int(request.args.get('skip', 0))
     except ValueError:
         return jsonify({'error': 'Invalid pagination parameters'}), 400
+    cursor = request.args.get('cursor') or None
+    view = request.args.get('view', 'summary')
+    if view not in ('summary', 'full'):
+        return jsonify({'error': 'view must be summary or full'}), 400
     
     # Enforce limits
-    limit = min(limit, 100)  # Max 100 items per request
+    limit = max(1, min(limit, 100))  # Max 100 items per request
     skip = max(skip, 0)
     
     try:
-        history = DatabaseService.get_user_history(
+        page = DatabaseService.get_user_history_page(
             user_id=current_user['id'],
             limit=limit,
-            skip=skip
+            skip=skip,
+            cursor=cursor,
+            summary=view == 'summary'
         )
         
         return jsonify({
-            'history': history,
+            'history': page['history'],
+            'next_cursor': page['next_cursor'],
             'limit': limit,
-            'skip': skip
+            'skip': 0 if cursor else skip
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"History fetch error: {str(e)}")
         return jsonify({'error': 'Failed to fetch history'}), 500
 
 
+@history_bp.route('/history/search', methods=['GET'])
+@require_auth
+def search_history(current_user):
+    """
+    Search user's history by prompt, language and code identifiers.
+    
+    Results are ranked by relevance and paged with `cursor` (the `next_cursor`
+    of the previous page); `language` takes a comma-separated filter.
+    """
+    query = (request.args.get('q') or '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    if len(query) > MAX_SEARCH_QUERY:
+        return jsonify({'error': f'q must be at most {MAX_SEARCH_QUERY} characters'}), 400
+    
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    languages = [language.strip().lower() for language in request.args.get('language', '').split(',')
+                 if language.strip()]
+    
+    try:
+        page = DatabaseService.search_user_history(
+            user_id=current_user['id'],
+            query=query,
+            languages=languages or None,
+            limit=limit,
+            cursor=request.args.get('cursor') or None
+        )
+        return jsonify({
+            'results': page['results'],
+            'next_cursor': page['next_cursor'],
+            'limit': limit
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"History search error: {str(e)}")
+        return jsonify({'error': 'Failed to search history'}), 500
+
+
 @history_bp.route('/history/<generation_id>', methods=['GET'])
 @require_auth
 def get_generation_detail(current_user, generation_id):
@@ -61,6 +118,81 @@ def get_generation_detail(current_user, generation_id):
         return jsonify({'error': 'Failed to fetch generation details'}), 500
 
 
+@history_bp.route('/history/<generation_id>/similar', methods=['GET'])
+@require_auth
+def get_similar_generations(current_user, generation_id):
+    """
+    Get user's generations with near-identical code.
+    
+    `threshold` is the minimum Jaccard similarity of the code shingles (0-1).
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit', 10)), 50))
+        threshold = float(request.args.get('threshold', DEFAULT_SIMILARITY_THRESHOLD))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or threshold'}), 400
+    if not 0 < threshold <= 1:
+        return jsonify({'error': 'threshold must be between 0 and 1'}), 400
+    
+    try:
+        similar = DatabaseService.find_similar_generations(
+            generation_id=generation_id,
+            user_id=current_user['id'],
+            limit=limit,
+            threshold=threshold
+        )
+        
+        if similar is None:
+            return jsonify({'error': 'Generation not found'}), 404
+        
+        return jsonify({'similar': similar, 'threshold': threshold}), 200
+        
+    except Exception as e:
+        print(f"Similar generations error: {str(e)}")
+        return jsonify({'error': 'Failed to find similar generations'}), 500
+
+
+@history_bp.route('/history/<generation_id>/versions', methods=['GET'])
+@require_auth
+def get_generation_versions(current_user, generation_id):
+    """List the versions of a generation (one per refinement)."""
+    try:
+        versions = DatabaseService.get_generation_versions(
+            generation_id=generation_id,
+            user_id=current_user['id']
+        )
+        
+        if versions is None:
+            return jsonify({'error': 'Generation not found'}), 404
+        
+        return jsonify(versions), 200
+        
+    except Exception as e:
+        print(f"Generation versions error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch generation versions'}), 500
+
+
+@history_bp.route('/history/<generation_id>/versions/<int:version>', methods=['GET'])
+@require_auth
+def checkout_generation_version(current_user, generation_id, version):
+    """Get the code of one version of a generation."""
+    try:
+        checkout = DatabaseService.checkout_generation_version(
+            generation_id=generation_id,
+            user_id=current_user['id'],
+            version=version
+        )
+        
+        if not checkout:
+            return jsonify({'error': 'Version not found'}), 404
+        
+        return jsonify({'version': checkout}), 200
+        
+    except Exception as e:
+        print(f"Version checkout error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch generation version'}), 500
+
+
 @history_bp.route('/history/<generation_id>', methods=['DELETE'])
 @require_auth
 def delete_generation(current_user, generation_id):
@@ -92,3 +224,29 @@ def get_user_stats(current_user):
     except Exception as e:
         print(f"Stats fetch error: {str(e)}")
         return jsonify({'error': 'Failed to fetch statistics'}), 500
+
+
+@history_bp.route('/stats/usage', methods=['GET'])
+@require_auth
+def get_usage(current_user):
+    """Get user's usage over time in daily or weekly buckets."""
+    period = request.args.get('period', 'day')
+    if period not in ('day', 'week'):
+        return jsonify({'error': 'period must be day or week'}), 400
+    
+    try:
+        limit = max(1, int(request.args.get('limit', 30)))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    try:
+        usage = DatabaseService.get_usage_rollups(
+            user_id=current_user['id'],
+            period=period,
+            limit=limit
+        )
+        return jsonify({'period': period, 'usage': usage}), 200
+        
+    except Exception as e:
+        print(f"Usage fetch error: {str(e)}")
+        return jsonify({'error': 'Failed to fetch usage'}), 500
@@ -4,5 +4,6 @@ Services Package
 from app.services.db_service import DatabaseService
 from app.services.gemini_service import GeminiService
 from app.services.auth_service import AuthService
+from app.services.execution_service import ExecutionService
 
-__all__ = ['DatabaseService', 'GeminiService', 'AuthService']
+__all__ = ['DatabaseService', 'GeminiService', 'AuthService', 'ExecutionService']
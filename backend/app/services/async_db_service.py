@@ -0,0 +1,70 @@
+"""
+Async Database Service - Awaitable MongoDB Operations
+"""
+import asyncio
+import functools
+import inspect
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.db_service import DatabaseService
+
+
+# DatabaseService methods that are not mirrored (connection setup / raw handle)
+SYNC_ONLY_METHODS = {'initialize', 'get_db'}
+
+
+class AsyncDatabaseService:
+    """
+    Awaitable counterpart of DatabaseService with the same method surface.
+
+    Every public DatabaseService method is available here as a coroutine
+    (`await AsyncDatabaseService.get_generation_by_id(...)`). Calls run on a
+    bounded thread pool sharing DatabaseService's pooled, thread-safe
+    MongoClient, so async views can overlap database round trips with each
+    other and with Gemini, Judge0 or GitHub calls on any event loop.
+    """
+
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_max_workers(cls) -> int:
+        """Get the maximum number of concurrent database calls."""
+        return int(os.getenv('DB_ASYNC_WORKERS', 32))
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=cls.get_max_workers(),
+                                                   thread_name_prefix='async-db')
+            return cls._executor
+
+    @classmethod
+    async def run(cls, function, *args, **kwargs):
+        """Await any blocking callable that talks to the database (e.g. AuthService methods)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._get_executor(), functools.partial(function, *args, **kwargs))
+
+    @classmethod
+    def shutdown(cls):
+        """Wait for pending calls and stop the worker threads."""
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor:
+            executor.shutdown(wait=True)
+
+
+def _mirror(method):
+    # Wrap the plain function so the mirror's signature keeps its first parameter
+    @functools.wraps(method.__func__)
+    async def call(cls, *args, **kwargs):
+        return await cls.run(method, *args, **kwargs)
+    return classmethod(call)
+
+
+for _name, _method in inspect.getmembers(DatabaseService, inspect.ismethod):
+    if not _name.startswith('_') and _name not in SYNC_ONLY_METHODS:
+        setattr(AsyncDatabaseService, _name, _mirror(_method))
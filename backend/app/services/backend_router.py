@@ -0,0 +1,170 @@
+"""
+Backend Router - Adaptive Execution Backend Selection
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+class BackendRouter:
+    """
+    Per-language routing table for execution backends.
+
+    Availability comes from periodic capability probes; live latency and error
+    rates then pick the fastest healthy backend for each language.
+    """
+
+    # Number of recent runs kept per (language, backend)
+    WINDOW_SIZE = 100
+
+    # Runs needed before latency overrides the default backend order
+    MIN_SAMPLES = 5
+
+    # Backends failing more often than this are tried last
+    MAX_ERROR_RATE = 0.5
+
+    # Seconds a run stays in the statistics; a demoted backend gets no new
+    # runs, so its old failures must age out for it to be tried again
+    SAMPLE_TTL = 600
+
+    _lock = threading.Lock()
+    _availability = {}
+    _samples = {}
+    _last_probe = None
+    _probe_thread = None
+
+    @classmethod
+    def set_availability(cls, language: str, backend: str, available: bool, detail: str = ''):
+        """Record the outcome of a capability probe."""
+        with cls._lock:
+            previous = cls._availability.get((language, backend))
+            if available and ((previous and not previous['available']) or
+                              not cls._stats(language, backend)['healthy']):
+                # Backend came back or a probe found it working: forget the recorded failures
+                cls._samples.pop((language, backend), None)
+
+            cls._availability[(language, backend)] = {
+                'available': available,
+                'detail': detail,
+                'checked_at': datetime.utcnow()
+            }
+
+    @classmethod
+    def mark_probed(cls):
+        """Record that a full probe cycle finished."""
+        cls._last_probe = datetime.utcnow()
+
+    @classmethod
+    def record(cls, language: str, backend: str, latency: float, ok: bool):
+        """Record the latency and outcome of one run on a backend."""
+        with cls._lock:
+            window = cls._samples.setdefault((language, backend), deque(maxlen=cls.WINDOW_SIZE))
+            window.append((time.time(), latency, ok))
+
+    @classmethod
+    def _stats(cls, language: str, backend: str) -> Dict[str, Any]:
+        """Compute availability, latency percentiles and error rate for a backend."""
+        availability = cls._availability.get((language, backend))
+        cutoff = time.time() - cls.SAMPLE_TTL
+        window = [(latency, ok) for recorded_at, latency, ok in cls._samples.get((language, backend), [])
+                  if recorded_at >= cutoff]
+        latencies = sorted(latency for latency, ok in window if ok)
+        errors = sum(1 for _, ok in window if not ok)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 1)
+
+        error_rate = round(errors / len(window), 3) if window else 0.0
+
+        return {
+            'available': availability['available'] if availability else None,
+            'detail': availability['detail'] if availability else 'not probed yet',
+            'samples': len(window),
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'error_rate': error_rate,
+            'healthy': (availability is None or availability['available']) and error_rate <= cls.MAX_ERROR_RATE
+        }
+
+    @classmethod
+    def choose(cls, language: str, default_order: List[str]) -> List[str]:
+        """
+        Order the backends for a language, best first.
+
+        Healthy backends come first, sorted by p50 latency once every one of them
+        has enough samples (otherwise the default order is kept). Unhealthy
+        backends are kept at the end as a last resort; backends a probe found
+        unavailable are dropped unless nothing else is left.
+        """
+        with cls._lock:
+            stats = {backend: cls._stats(language, backend) for backend in default_order}
+
+        candidates = [b for b in default_order if stats[b]['available'] is not False]
+        if not candidates:
+            return list(default_order)
+
+        healthy = [b for b in candidates if stats[b]['healthy']]
+        unhealthy = [b for b in candidates if not stats[b]['healthy']]
+
+        if healthy and all(stats[b]['samples'] >= cls.MIN_SAMPLES and stats[b]['p50_ms'] is not None
+                           for b in healthy):
+            healthy.sort(key=lambda b: stats[b]['p50_ms'])
+
+        return healthy + unhealthy
+
+    @classmethod
+    def snapshot(cls, default_orders: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Get the current routing decision and statistics for every language."""
+        languages = {}
+        for language, default_order in default_orders.items():
+            with cls._lock:
+                stats = {backend: cls._stats(language, backend) for backend in default_order}
+            languages[language] = {
+                'order': cls.choose(language, default_order),
+                'backends': stats
+            }
+
+        return {
+            'last_probe': cls._last_probe.isoformat() if cls._last_probe else None,
+            'languages': languages
+        }
+
+    @classmethod
+    def start_probing(cls, probe, interval: int):
+        """Run the probe now and then every `interval` seconds on a daemon thread."""
+        if cls._probe_thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    probe()
+                    cls.mark_probed()
+                except Exception as e:
+                    print(f"Backend probe error: {str(e)}")
+                if interval <= 0:
+                    return
+                time.sleep(interval)
+
+        cls._probe_thread = threading.Thread(target=loop, name='backend-probe', daemon=True)
+        cls._probe_thread.start()
+
+    @classmethod
+    def reset(cls):
+        """Forget all probe results and samples."""
+        with cls._lock:
+            cls._availability.clear()
+            cls._samples.clear()
+        cls._last_probe = None
+
+    @classmethod
+    def get_availability(cls, language: str, backend: str) -> Optional[bool]:
+        """Get the last probed availability (None if never probed)."""
+        with cls._lock:
+            availability = cls._availability.get((language, backend))
+        return availability['available'] if availability else None
@@ -0,0 +1,119 @@
+"""
+Blob Store - Content-Addressed, Deduplicated Storage for Code and Explanations
+"""
+import hashlib
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, List
+
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback; blobs record their encoding either way
+    zstandard = None
+
+
+class BlobStore:
+    """
+    Stores text bodies once per distinct content in the `blobs` collection.
+
+    A blob's _id is the SHA-256 of its text, so byte-identical code or
+    explanations saved by any number of generations share one document.
+    Bodies above BLOB_COMPRESS_MIN_BYTES are compressed (zstd when the
+    zstandard package is installed, zlib otherwise). `refs` counts the
+    generation documents pointing at a blob; it is deleted at zero.
+    """
+
+    @classmethod
+    def get_compress_min_bytes(cls) -> int:
+        """Get the body size from which blobs are compressed."""
+        return int(os.getenv('BLOB_COMPRESS_MIN_BYTES', 512))
+
+    @classmethod
+    def key(cls, text: str) -> str:
+        """Get the content address of a body."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _encode(cls, text: str) -> tuple:
+        data = text.encode('utf-8')
+        if len(data) < cls.get_compress_min_bytes():
+            return 'raw', data
+        if zstandard is not None:
+            compressed, encoding = zstandard.ZstdCompressor(level=6).compress(data), 'zstd'
+        else:
+            compressed, encoding = zlib.compress(data, 6), 'zlib'
+        return (encoding, compressed) if len(compressed) < len(data) else ('raw', data)
+
+    @classmethod
+    def _decode(cls, blob: dict) -> str:
+        data = bytes(blob['data'])
+        if blob['encoding'] == 'zstd':
+            if zstandard is None:
+                raise RuntimeError('zstd blob found but the zstandard package is not installed')
+            data = zstandard.ZstdDecompressor().decompress(data)
+        elif blob['encoding'] == 'zlib':
+            data = zlib.decompress(data)
+        return data.decode('utf-8')
+
+    @classmethod
+    def put(cls, db, text: str) -> str:
+        """
+        Store a body (or take another reference to an identical one).
+
+        Returns:
+            The blob key to keep in the referencing document
+        """
+        return cls.put_many(db, [text])[0]
+
+    @classmethod
+    def put_many(cls, db, texts: List[str]) -> List[str]:
+        """
+        Store several bodies with one bulk write (one reference per text).
+
+        Returns:
+            The blob keys, in the order of texts
+        """
+        keys = [cls.key(text) for text in texts]
+        counts, bodies = {}, {}
+        for key, text in zip(keys, texts):
+            counts[key] = counts.get(key, 0) + 1
+            bodies[key] = text
+
+        # One upsert per distinct key: two upserts of the same new _id in a batch would collide
+        operations = []
+        for key, text in bodies.items():
+            encoding, data = cls._encode(text)
+            operations.append(UpdateOne(
+                {'_id': key},
+                {
+                    '$setOnInsert': {'encoding': encoding, 'data': Binary(data), 'size': len(text),
+                                     'stored_size': len(data), 'created_at': datetime.utcnow()},
+                    '$inc': {'refs': counts[key]}
+                },
+                upsert=True
+            ))
+        if operations:
+            db.blobs.bulk_write(operations, ordered=False)
+        return keys
+
+    @classmethod
+    def get_many(cls, db, keys: List[str]) -> Dict[str, str]:
+        """Get the bodies of several blobs in one query (missing keys are left out)."""
+        keys = list({key for key in keys if key})
+        if not keys:
+            return {}
+        return {blob['_id']: cls._decode(blob)
+                for blob in db.blobs.find({'_id': {'$in': keys}}, {'encoding': 1, 'data': 1})}
+
+    @classmethod
+    def release(cls, db, keys: List[str]):
+        """Drop one reference per key and delete blobs nobody references any more."""
+        keys = [key for key in keys if key]
+        if keys:
+            db.blobs.bulk_write([UpdateOne({'_id': key}, {'$inc': {'refs': -1}}) for key in keys])
+            # Conditional delete: a concurrent put() that re-referenced the blob keeps it
+            db.blobs.delete_many({'_id': {'$in': keys}, 'refs': {'$lte': 0}})
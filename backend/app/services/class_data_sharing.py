@@ -0,0 +1,213 @@
+"""
+Class Data Sharing - JDK Class Archive for Faster JVM Startup
+"""
+import glob
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional
+
+
+# Warmup program exercising the JDK classes generated code commonly uses
+# (Scanner, java.util collections, streams, lambdas, string formatting).
+WARMUP_SOURCE = r'''
+import java.io.*;
+import java.util.*;
+import java.util.function.*;
+import java.util.stream.*;
+
+public class CdsWarmup {
+    public static void main(String[] args) throws Exception {
+        Scanner scanner = new Scanner(System.in);
+        List<Integer> numbers = new ArrayList<>();
+        while (scanner.hasNextInt()) {
+            numbers.add(scanner.nextInt());
+        }
+        BufferedReader reader = new BufferedReader(new StringReader("a b c\n1 2 3"));
+        StringTokenizer tokens = new StringTokenizer(reader.readLine());
+        while (tokens.hasMoreTokens()) {
+            tokens.nextToken();
+        }
+
+        Map<String, Integer> counts = new HashMap<>();
+        Map<String, Integer> sorted = new TreeMap<>(Comparator.reverseOrder());
+        Set<Integer> seen = new HashSet<>(numbers);
+        Deque<Integer> deque = new ArrayDeque<>(numbers);
+        PriorityQueue<int[]> heap = new PriorityQueue<>((a, b) -> Integer.compare(a[0], b[0]));
+        LinkedList<String> linked = new LinkedList<>(Arrays.asList("x", "y"));
+        for (int n : numbers) {
+            counts.merge(String.valueOf(n), 1, Integer::sum);
+            sorted.put("k" + n, n);
+            heap.offer(new int[]{n, n * n});
+        }
+        Collections.sort(numbers);
+        int[] array = numbers.stream().mapToInt(Integer::intValue).toArray();
+        Arrays.sort(array);
+        long total = IntStream.of(array).asLongStream().sum();
+        String joined = numbers.stream().map(String::valueOf).collect(Collectors.joining(","));
+        Map<Boolean, List<Integer>> parts = numbers.stream().collect(Collectors.partitioningBy(n -> n % 2 == 0));
+        Optional<Integer> max = numbers.stream().max(Integer::compare);
+        Function<Integer, Integer> square = x -> x * x;
+        BiFunction<Integer, Integer, Integer> add = Integer::sum;
+        Supplier<StringBuilder> builder = StringBuilder::new;
+
+        StringBuilder out = builder.get();
+        out.append(String.format("%d %.2f %s%n", total, Math.sqrt(total), joined));
+        out.append(counts).append(sorted).append(seen).append(deque.peekFirst()).append(parts).append(linked);
+        out.append(max.orElse(0)).append(square.apply(3)).append(add.apply(1, 2)).append(heap.size());
+        out.append(String.join("|", Arrays.asList("a", "b"))).append(Character.isDigit('1')).append(Long.parseLong("42"));
+        PrintWriter writer = new PrintWriter(new BufferedWriter(new OutputStreamWriter(System.out)));
+        writer.println(out);
+        writer.flush();
+        System.out.println(Objects.hash(1, 2) + " " + new Random(1).nextInt(10));
+    }
+}
+'''
+
+WARMUP_INPUT = '5 3 8 1 9 2\n'
+
+
+class ClassDataSharing:
+    """Builds and maintains a class-data-sharing archive of commonly used JDK classes."""
+
+    _lock = threading.Lock()
+    _archive = None
+    _fingerprint = None
+    _last_error = None
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Check whether the class-data-sharing archive is enabled."""
+        return os.getenv('JVM_CDS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def _archive_dir(cls) -> str:
+        """Get the directory archives are stored in."""
+        return os.path.join(tempfile.gettempdir(), 'code_gen_daemons', 'cds')
+
+    @classmethod
+    def toolchain_fingerprint(cls) -> Optional[str]:
+        """Identify the installed JDK (version string, binary path and modification time)."""
+        java = shutil.which('java')
+        if java is None:
+            return None
+
+        real_java = os.path.realpath(java)
+        try:
+            probe = subprocess.run(['java', '-version'], capture_output=True, text=True, timeout=15)
+            mtime = os.path.getmtime(real_java)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+
+        identity = f'{real_java}|{mtime}|{probe.stderr.strip()}'
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def ensure_archive(cls) -> Optional[str]:
+        """
+        Make sure an archive exists for the current JDK, rebuilding it when the
+        toolchain changed. Returns the archive path, or None if unavailable.
+        """
+        if not cls.is_enabled():
+            return None
+
+        fingerprint = cls.toolchain_fingerprint()
+        if fingerprint is None:
+            return None
+
+        with cls._lock:
+            archive = os.path.join(cls._archive_dir(), f'jdk_{fingerprint}.jsa')
+            if fingerprint == cls._fingerprint and cls._archive and os.path.isfile(cls._archive):
+                return cls._archive
+
+            if not os.path.isfile(archive):
+                try:
+                    cls._build(archive)
+                except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+                    cls._last_error = str(e)
+                    print(f"[CDS] Failed to build class data sharing archive: {str(e)}")
+                    cls._archive = None
+                    return None
+
+            # Drop archives built for previous toolchains
+            for stale in glob.glob(os.path.join(cls._archive_dir(), 'jdk_*.jsa')):
+                if stale != archive:
+                    try:
+                        os.unlink(stale)
+                    except OSError:
+                        pass
+
+            cls._archive = archive
+            cls._fingerprint = fingerprint
+            return archive
+
+    @classmethod
+    def _build(cls, archive: str):
+        """Record the classes the warmup program loads and dump them into a static archive."""
+        os.makedirs(cls._archive_dir(), exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix='cds_', dir=cls._archive_dir())
+
+        try:
+            source = os.path.join(build_dir, 'CdsWarmup.java')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write(WARMUP_SOURCE)
+
+            compiled = subprocess.run(['javac', '-d', build_dir, source], capture_output=True, text=True, timeout=120)
+            if compiled.returncode != 0:
+                raise RuntimeError(f'warmup compile failed: {compiled.stderr[:300]}')
+
+            class_list = os.path.join(build_dir, 'classes.lst')
+            traced = subprocess.run(
+                ['java', '-Xshare:off', f'-XX:DumpLoadedClassList={class_list}', '-cp', build_dir, 'CdsWarmup'],
+                input=WARMUP_INPUT, capture_output=True, text=True, timeout=120
+            )
+            if traced.returncode != 0 or not os.path.isfile(class_list):
+                raise RuntimeError(f'warmup run failed: {traced.stderr[:300]}')
+
+            # Keep only JDK classes so the archive works with any program classpath
+            jdk_list = os.path.join(build_dir, 'jdk_classes.lst')
+            with open(class_list, encoding='utf-8') as src, open(jdk_list, 'w', encoding='utf-8') as dst:
+                for line in src:
+                    if not line.startswith('CdsWarmup'):
+                        dst.write(line)
+
+            partial = archive + '.tmp'
+            dumped = subprocess.run(
+                ['java', '-Xshare:dump', f'-XX:SharedClassListFile={jdk_list}', f'-XX:SharedArchiveFile={partial}'],
+                capture_output=True, text=True, timeout=300
+            )
+            if dumped.returncode != 0 or not os.path.isfile(partial):
+                raise RuntimeError(f'archive dump failed: {(dumped.stderr or dumped.stdout)[:300]}')
+
+            os.replace(partial, archive)
+            print(f"[CDS] Built class data sharing archive {archive}")
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    @classmethod
+    def jvm_options(cls) -> List[str]:
+        """
+        Get the JVM flags for launching with the archive.
+
+        Only an already built archive is used; -Xshare:auto keeps the JVM
+        starting normally if the archive turns out to be unusable.
+        """
+        archive = cls._archive
+        if archive and os.path.isfile(archive):
+            return [f'-XX:SharedArchiveFile={archive}', '-Xshare:auto']
+        return []
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Get archive information."""
+        archive = cls._archive if cls._archive and os.path.isfile(cls._archive) else None
+        return {
+            'enabled': cls.is_enabled(),
+            'archive': archive,
+            'size_bytes': os.path.getsize(archive) if archive else None,
+            'toolchain': cls._fingerprint,
+            'last_error': cls._last_error
+        }
@@ -0,0 +1,43 @@
+"""
+Code Delta - Line-Based Diffs Between Code Versions
+"""
+import difflib
+from typing import List
+
+
+class CodeDelta:
+    """
+    Compact line deltas for storing code versions against their parent.
+
+    A delta is a list of [start, end, lines] edits: parent lines[start:end]
+    are replaced by `lines`; unchanged ranges are not stored. Lines keep
+    their line endings, so applying a delta reproduces the code exactly.
+    """
+
+    @classmethod
+    def diff(cls, parent: str, code: str) -> List[list]:
+        """Get the delta turning parent into code."""
+        parent_lines = parent.splitlines(keepends=True)
+        code_lines = code.splitlines(keepends=True)
+        matcher = difflib.SequenceMatcher(None, parent_lines, code_lines, autojunk=False)
+        return [[i1, i2, code_lines[j1:j2]]
+                for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+    @classmethod
+    def apply(cls, parent: str, delta: List[list]) -> str:
+        """Rebuild code from its parent and a delta."""
+        parent_lines = parent.splitlines(keepends=True)
+        lines, position = [], 0
+        for start, end, replacement in delta:
+            if start < position or end > len(parent_lines):
+                raise ValueError('Delta does not match its parent version')
+            lines += parent_lines[position:start]
+            lines += replacement
+            position = end
+        lines += parent_lines[position:]
+        return ''.join(lines)
+
+    @classmethod
+    def size(cls, delta: List[list]) -> int:
+        """Approximate stored size of a delta in characters."""
+        return sum(8 + sum(len(line) for line in replacement) for _, _, replacement in delta)
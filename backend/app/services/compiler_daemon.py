@@ -0,0 +1,385 @@
+"""
+Compiler Daemon - Persistent JVM Compile Server for Java and Kotlin
+"""
+import atexit
+import hashlib
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from app.services.class_data_sharing import ClassDataSharing
+
+
+# Compile server run inside a long-lived JVM. It compiles Java through
+# javax.tools and Kotlin through K2JVMCompiler (loaded reflectively so the
+# server still works when no Kotlin compiler is on the classpath).
+#
+# Protocol (one request per connection, tab separated). Every request starts
+# with the random token the server was started with (COMPILE_SERVER_TOKEN),
+# so other local users cannot drive the compiler through the loopback port:
+#   <token>\tPING                          -> "0\n" + "kotlin=<true|false>"
+#   <token>\tJAVA\t<out_dir>\t<source>     -> "<exit code>\n" + diagnostics
+#   <token>\tKOTLIN\t<out_dir>\t<source>   -> "<exit code>\n" + diagnostics
+SERVER_SOURCE = r'''
+import java.io.*;
+import java.net.*;
+import java.nio.charset.StandardCharsets;
+import java.security.MessageDigest;
+import java.util.concurrent.*;
+import javax.tools.*;
+
+public class CompileServer {
+    private static final Object KOTLIN_LOCK = new Object();
+    private static byte[] token;
+
+    public static void main(String[] args) throws Exception {
+        String secret = System.getenv("COMPILE_SERVER_TOKEN");
+        if (secret == null || secret.isEmpty()) {
+            System.err.println("COMPILE_SERVER_TOKEN is not set");
+            System.exit(2);
+        }
+        token = secret.getBytes(StandardCharsets.UTF_8);
+        ServerSocket server = new ServerSocket(0, 50, InetAddress.getLoopbackAddress());
+        System.out.println("PORT " + server.getLocalPort());
+        System.out.flush();
+        ExecutorService pool = Executors.newFixedThreadPool(Math.max(2, Runtime.getRuntime().availableProcessors()));
+        while (true) {
+            Socket socket = server.accept();
+            pool.submit(() -> handle(socket));
+        }
+    }
+
+    private static void handle(Socket socket) {
+        try (Socket s = socket;
+             BufferedReader in = new BufferedReader(new InputStreamReader(s.getInputStream(), StandardCharsets.UTF_8));
+             OutputStream out = s.getOutputStream()) {
+            String line = in.readLine();
+            String[] parts = line == null ? new String[]{""} : line.split("\t", -1);
+            if (!MessageDigest.isEqual(parts[0].getBytes(StandardCharsets.UTF_8), token)) {
+                out.write("2\nUnauthorized".getBytes(StandardCharsets.UTF_8));
+                return;
+            }
+            ByteArrayOutputStream diagnostics = new ByteArrayOutputStream();
+            int code;
+            try {
+                switch (parts.length > 1 ? parts[1] : "") {
+                    case "PING":
+                        code = 0;
+                        diagnostics.write(("kotlin=" + hasKotlin()).getBytes(StandardCharsets.UTF_8));
+                        break;
+                    case "JAVA":
+                        code = compileJava(parts[2], parts[3], diagnostics);
+                        break;
+                    case "KOTLIN":
+                        code = compileKotlin(parts[2], parts[3], diagnostics);
+                        break;
+                    default:
+                        code = 2;
+                        diagnostics.write(("Unknown command: " + parts[1]).getBytes(StandardCharsets.UTF_8));
+                }
+            } catch (Throwable t) {
+                code = 2;
+                diagnostics.write(("Compile server error: " + t).getBytes(StandardCharsets.UTF_8));
+            }
+            out.write((code + "\n").getBytes(StandardCharsets.UTF_8));
+            diagnostics.writeTo(out);
+            out.flush();
+        } catch (IOException e) {
+            // Client went away; nothing to report
+        }
+    }
+
+    private static boolean hasKotlin() {
+        try {
+            Class.forName("org.jetbrains.kotlin.cli.jvm.K2JVMCompiler");
+            return true;
+        } catch (ClassNotFoundException e) {
+            return false;
+        }
+    }
+
+    private static int compileJava(String outDir, String source, ByteArrayOutputStream diagnostics) throws IOException {
+        JavaCompiler compiler = ToolProvider.getSystemJavaCompiler();
+        if (compiler == null) {
+            diagnostics.write("No system Java compiler available (JRE instead of JDK?)".getBytes(StandardCharsets.UTF_8));
+            return 2;
+        }
+        return compiler.run(null, diagnostics, diagnostics, "-d", outDir, source);
+    }
+
+    private static int compileKotlin(String outDir, String source, ByteArrayOutputStream diagnostics) throws Exception {
+        Class<?> compilerClass = Class.forName("org.jetbrains.kotlin.cli.jvm.K2JVMCompiler");
+        PrintStream err = new PrintStream(diagnostics, true, "UTF-8");
+        String kotlinHome = System.getProperty("kotlin.home", "");
+        String[] args = kotlinHome.isEmpty()
+            ? new String[]{"-d", outDir, source}
+            : new String[]{"-kotlin-home", kotlinHome, "-d", outDir, source};
+        // K2JVMCompiler keeps per-invocation state, so runs are serialized
+        synchronized (KOTLIN_LOCK) {
+            Object compiler = compilerClass.getDeclaredConstructor().newInstance();
+            Object exitCode = compilerClass.getMethod("exec", PrintStream.class, String[].class)
+                .invoke(compiler, err, (Object) args);
+            return (Integer) exitCode.getClass().getMethod("getCode").invoke(exitCode);
+        }
+    }
+}
+'''
+
+# Seconds to wait for the JVM to report its port
+STARTUP_TIMEOUT = 30
+
+# Minimum seconds between restart attempts after a failed start
+RESTART_BACKOFF = 60
+
+
+class CompilerDaemon:
+    """Manages the long-lived compile server the backend talks to over a local socket."""
+
+    _lock = threading.Lock()
+    _process = None
+    _port = None
+    _token = None
+    _starting = False
+    _kotlin = False
+    _started_at = None
+    _restarts = 0
+    _last_failure = 0.0
+    _last_error = None
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Check whether compiler daemons are enabled."""
+        return os.getenv('COMPILER_DAEMONS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def kotlin_home(cls) -> Optional[str]:
+        """Locate the Kotlin compiler installation (KOTLIN_HOME or next to kotlinc)."""
+        home = os.getenv('KOTLIN_HOME')
+        if not home:
+            kotlinc = shutil.which('kotlinc')
+            if kotlinc:
+                home = os.path.dirname(os.path.dirname(os.path.realpath(kotlinc)))
+        if home and os.path.isfile(os.path.join(home, 'lib', 'kotlin-compiler.jar')):
+            return home
+        return None
+
+    @classmethod
+    def kotlin_stdlib(cls) -> Optional[str]:
+        """Get the Kotlin standard library jar needed to run compiled Kotlin classes."""
+        home = cls.kotlin_home()
+        if home:
+            stdlib = os.path.join(home, 'lib', 'kotlin-stdlib.jar')
+            if os.path.isfile(stdlib):
+                return stdlib
+        return None
+
+    @classmethod
+    def _private_dir(cls) -> str:
+        """Get the daemon directory, refusing one other users could plant a server class in."""
+        base = os.path.join(tempfile.gettempdir(), 'code_gen_daemons')
+        os.makedirs(base, exist_ok=True)
+        info = os.stat(base)
+        if info.st_uid != os.getuid() or info.st_mode & 0o022:
+            raise RuntimeError(f'{base} must be owned by this user and not writable by others')
+        return base
+
+    @classmethod
+    def _build_server(cls) -> str:
+        """Compile the server once per source version and return its class directory."""
+        digest = hashlib.sha256(SERVER_SOURCE.encode('utf-8')).hexdigest()[:12]
+        server_dir = os.path.join(cls._private_dir(), f'compile_server_{digest}')
+        if os.path.isfile(os.path.join(server_dir, 'CompileServer.class')):
+            return server_dir
+
+        os.makedirs(server_dir, mode=0o700, exist_ok=True)
+        source = os.path.join(server_dir, 'CompileServer.java')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(SERVER_SOURCE)
+
+        build = subprocess.run(['javac', '-d', server_dir, source], capture_output=True, text=True, timeout=120)
+        if build.returncode != 0:
+            raise RuntimeError(f'Failed to build compile server: {build.stderr[:500]}')
+        return server_dir
+
+    @classmethod
+    def _start(cls):
+        """Start the JVM compile server and wait for it to report its port."""
+        classpath = [cls._build_server()]
+        command = ['java', '-XX:+UseSerialGC'] + (ClassDataSharing.jvm_options() or ['-Xshare:auto'])
+
+        home = cls.kotlin_home()
+        if home:
+            classpath.append(os.path.join(home, 'lib', 'kotlin-compiler.jar'))
+            command.append(f'-Dkotlin.home={home}')
+
+        command += ['-cp', os.pathsep.join(classpath), 'CompileServer']
+
+        # Passed through the environment, which unlike argv is not world-readable
+        token = secrets.token_hex(32)
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                                   env=dict(os.environ, COMPILE_SERVER_TOKEN=token))
+
+        banner = {}
+        reader = threading.Thread(target=lambda: banner.setdefault('line', process.stdout.readline()), daemon=True)
+        reader.start()
+        reader.join(STARTUP_TIMEOUT)
+
+        line = banner.get('line', '')
+        if not line.startswith('PORT '):
+            process.kill()
+            raise RuntimeError('Compile server did not report a port')
+
+        cls._process = process
+        cls._port = int(line.split()[1])
+        cls._token = token
+        cls._started_at = time.time()
+        print(f"[CompilerDaemon] Started compile server on port {cls._port} (pid={process.pid})")
+
+    @classmethod
+    def _request(cls, line: str, timeout: float) -> Tuple[int, str]:
+        """Send one request line and return (exit code, diagnostics)."""
+        with socket.create_connection(('127.0.0.1', cls._port), timeout=timeout) as conn:
+            conn.sendall(f'{cls._token}\t{line}\n'.encode('utf-8'))
+            conn.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+
+        header, _, body = b''.join(chunks).decode('utf-8', errors='replace').partition('\n')
+        return int(header), body
+
+    @classmethod
+    def _stop_locked(cls):
+        """Kill the server process (caller holds the lock)."""
+        if cls._process is not None:
+            try:
+                cls._process.kill()
+                cls._process.wait(timeout=5)
+            except Exception:
+                pass
+        cls._process = None
+        cls._port = None
+        cls._token = None
+
+    @classmethod
+    def ensure_running(cls, health_check: bool = False, wait: bool = True) -> bool:
+        """
+        Make sure the server is up, (re)starting it if needed.
+
+        With health_check the running server is also pinged, and restarted if
+        it does not answer. Without wait a stopped server is started on a
+        background thread and False is returned at once, so a request never
+        waits for the JVM start or the server build. Returns True when the
+        server is usable.
+        """
+        if not cls.is_enabled() or shutil.which('java') is None or shutil.which('javac') is None:
+            return False
+
+        if not wait:
+            if cls._process is not None and cls._process.poll() is None:
+                return True
+            with cls._lock:
+                if not cls._starting:
+                    cls._starting = True
+                    threading.Thread(target=cls._start_in_background, name='compiler-daemon-start',
+                                     daemon=True).start()
+            return False
+
+        with cls._lock:
+            if cls._process is not None and cls._process.poll() is None:
+                if not health_check:
+                    return True
+                try:
+                    code, body = cls._request('PING', timeout=5)
+                    cls._kotlin = 'kotlin=true' in body
+                    return code == 0
+                except (OSError, ValueError) as e:
+                    cls._last_error = f'health check failed: {str(e)}'
+
+            if cls._process is not None:
+                cls._restarts += 1
+            cls._stop_locked()
+
+            if time.time() - cls._last_failure < RESTART_BACKOFF:
+                return False
+
+            try:
+                cls._start()
+                code, body = cls._request('PING', timeout=STARTUP_TIMEOUT)
+                cls._kotlin = 'kotlin=true' in body
+                return code == 0
+            except (OSError, ValueError, RuntimeError, subprocess.SubprocessError) as e:
+                cls._last_failure = time.time()
+                cls._last_error = str(e)
+                print(f"[CompilerDaemon] Failed to start compile server: {str(e)}")
+                cls._stop_locked()
+                return False
+
+    @classmethod
+    def _start_in_background(cls):
+        try:
+            cls.ensure_running()
+        finally:
+            cls._starting = False
+
+    @classmethod
+    def supports(cls, language: str) -> bool:
+        """Check whether the running daemon can compile a language (requests fall back while it starts)."""
+        if not cls.ensure_running(wait=False):
+            return False
+        return language == 'java' or (language == 'kotlin' and cls._kotlin)
+
+    @classmethod
+    def compile(cls, language: str, source_file: str, out_dir: str,
+                timeout: float = 30) -> Optional[Tuple[int, str]]:
+        """
+        Compile a source file through the daemon.
+
+        Returns:
+            Tuple of (exit code, diagnostics), or None if the daemon is unavailable
+            and the caller should fall back to the command-line compiler
+        """
+        if not cls.supports(language):
+            return None
+
+        command = 'JAVA' if language == 'java' else 'KOTLIN'
+        try:
+            return cls._request(f'{command}\t{out_dir}\t{source_file}', timeout=timeout)
+        except (OSError, ValueError) as e:
+            cls._last_error = f'compile request failed: {str(e)}'
+            print(f"[CompilerDaemon] {cls._last_error}")
+            with cls._lock:
+                cls._stop_locked()
+            return None
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Get daemon health information."""
+        running = cls._process is not None and cls._process.poll() is None
+        return {
+            'enabled': cls.is_enabled(),
+            'running': running,
+            'pid': cls._process.pid if running else None,
+            'port': cls._port if running else None,
+            'kotlin': cls._kotlin if running else False,
+            'uptime_seconds': round(time.time() - cls._started_at, 1) if running and cls._started_at else None,
+            'restarts': cls._restarts,
+            'last_error': cls._last_error
+        }
+
+    @classmethod
+    def stop(cls):
+        """Stop the compile server."""
+        with cls._lock:
+            cls._stop_locked()
+
+
+atexit.register(CompilerDaemon.stop)
@@ -0,0 +1,375 @@
+"""
+Complexity Service - Empirical Time Complexity Estimation
+"""
+import ast
+import math
+import random
+import re
+import string
+from collections.abc import Sequence
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.execution_service import ExecutionService, DEFAULT_PROFILE
+
+
+# Complexity classes the timings are fitted against (name, growth function)
+COMPLEXITY_CLASSES = [
+    ('O(1)', lambda n: 1.0),
+    ('O(log n)', lambda n: math.log2(n)),
+    ('O(n)', lambda n: float(n)),
+    ('O(n log n)', lambda n: n * math.log2(n)),
+    ('O(n^2)', lambda n: float(n) ** 2),
+    ('O(n^3)', lambda n: float(n) ** 3),
+    ('O(2^n)', lambda n: 2.0 ** n),
+]
+
+# Default input sizes (doubling, so growth rates separate clearly)
+DEFAULT_SIZES = [1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000]
+
+# Request limits (MAX_SIZE 9-digit ints, the largest common input shape, fit in MAX_INPUT_BYTES)
+MAX_SIZES = 12
+MAX_SIZE = 1_000_000
+MAX_REPEATS = 5
+DEFAULT_REPEATS = 3
+MAX_INPUT_BYTES = 16 * 1024 * 1024
+
+# Minimum number of timed sizes needed for a fit
+MIN_POINTS = 4
+
+# Wall-clock budget (seconds) for the whole series
+TIME_BUDGET = 60
+
+# Timing spread (seconds, and at least 10% of the fastest run) below which
+# growth cannot be told apart from startup cost and noise
+NOISE_FLOOR = 0.005
+
+# A lower-order class wins over a better fitting higher-order one when its
+# r_squared is within this margin (single runs are noisy)
+PARSIMONY_MARGIN = 0.01
+
+TEMPLATE_FIELD = re.compile(r'\{([^{}]+)\}')
+
+
+class ComplexityService:
+    """Runs a program over increasing input sizes and fits the timings to complexity classes."""
+
+    # Template Operations
+    @classmethod
+    def _eval_expression(cls, node, n: int):
+        """Evaluate a template argument (integers, n, + - * / //, sqrt, log2 or a string literal)."""
+        if isinstance(node, ast.Expression):
+            return cls._eval_expression(node.body, n)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+            return node.value
+        if isinstance(node, ast.Name) and node.id == 'n':
+            return n
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -cls._eval_expression(node.operand, n)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv)):
+            left, right = cls._eval_expression(node.left, n), cls._eval_expression(node.right, n)
+            if isinstance(node.op, ast.Add):
+                return left + right
+            if isinstance(node.op, ast.Sub):
+                return left - right
+            if isinstance(node.op, ast.Mult):
+                return left * right
+            if isinstance(node.op, ast.Div):
+                return left / right
+            return left // right
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in ('sqrt', 'log2') and len(node.args) == 1 and not node.keywords):
+            value = cls._eval_expression(node.args[0], n)
+            return math.sqrt(value) if node.func.id == 'sqrt' else math.log2(value)
+        raise ValueError('unsupported expression')
+
+    @classmethod
+    def _render_field(cls, field: str, n: int, rng: random.Random, budget: int = MAX_INPUT_BYTES) -> str:
+        """Render one {...} template field, refusing generator calls estimated above budget bytes."""
+        try:
+            node = ast.parse(field.strip(), mode='eval').body
+        except SyntaxError:
+            raise ValueError(f'Invalid template field "{{{field}}}"')
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in GENERATORS:
+            if node.keywords:
+                raise ValueError(f'Template field "{{{field}}}" must use positional arguments')
+            try:
+                args = [cls._eval_expression(arg, n) for arg in node.args]
+            except (ValueError, ZeroDivisionError):
+                raise ValueError(f'Invalid arguments in template field "{{{field}}}"')
+            args = [int(arg) if isinstance(arg, float) else arg for arg in args]
+            try:
+                # Sized before generating, so an oversized field costs no time or memory
+                size = GENERATOR_SIZES[node.func.id](*args)
+                if size <= budget:
+                    return GENERATORS[node.func.id](rng, *args)
+            except (TypeError, ValueError, IndexError):
+                raise ValueError(f'Wrong arguments for {node.func.id}() in template field "{{{field}}}"')
+            raise ValueError(f'Template field "{{{field}}}" generates more than {MAX_INPUT_BYTES} bytes for n={n}')
+
+        try:
+            value = cls._eval_expression(node, n)
+        except (ValueError, ZeroDivisionError):
+            raise ValueError(f'Unsupported template field "{{{field}}}"')
+        return str(int(value) if isinstance(value, float) else value)
+
+    @classmethod
+    def render_template(cls, template: str, n: int, seed: int = 0) -> str:
+        """
+        Generate one input of size n from a template.
+
+        Fields in braces are expressions of n ({n}, {n // 2}, {sqrt(n)}) or
+        generator calls: ints(count, lo, hi), sorted_ints(count, lo, hi),
+        perm(count), chars(count[, alphabet]) and grid(rows, cols, lo, hi).
+        """
+        rng = random.Random(seed)
+        budget = [MAX_INPUT_BYTES - len(TEMPLATE_FIELD.sub('', template))]
+
+        def render(match):
+            value = cls._render_field(match.group(1), n, rng, budget[0])
+            budget[0] -= len(value)
+            return value
+
+        rendered = TEMPLATE_FIELD.sub(render, template)
+        if len(rendered) > MAX_INPUT_BYTES:
+            raise ValueError(f'Generated input for n={n} exceeds {MAX_INPUT_BYTES} bytes')
+        return rendered
+
+    @classmethod
+    def infer_template(cls, sample_input: str) -> str:
+        """
+        Infer an input template from a sample input.
+
+        Recognizes a count line followed by that many integers (on one line or
+        one row per line) or a string of that length, a single line of
+        integers, and a single word. Raises ValueError for anything else.
+        """
+        lines = [line.strip() for line in sample_input.strip().splitlines()]
+        rows = [line.split() for line in lines]
+
+        def int_range(tokens):
+            values = [int(token) for token in tokens]
+            return min(values), max(values)
+
+        def is_int_row(tokens):
+            return bool(tokens) and all(re.fullmatch(r'-?\d+', token) for token in tokens)
+
+        if len(rows) == 1 and is_int_row(rows[0]) and len(rows[0]) > 1:
+            lo, hi = int_range(rows[0])
+            return f'{{ints(n, {lo}, {hi})}}\n'
+
+        if len(rows) == 1 and len(rows[0]) == 1 and not is_int_row(rows[0]):
+            return f'{{chars(n, "{cls._alphabet(rows[0][0])}")}}\n'
+
+        if len(rows) >= 2 and len(rows[0]) == 1 and is_int_row(rows[0]):
+            count = int(rows[0][0])
+            body = rows[1:]
+
+            if len(body) == 1 and is_int_row(body[0]) and len(body[0]) == count:
+                lo, hi = int_range(body[0])
+                return f'{{n}}\n{{ints(n, {lo}, {hi})}}\n'
+
+            if (len(body) == count and all(is_int_row(row) for row in body)
+                    and len({len(row) for row in body}) == 1):
+                lo, hi = int_range([token for row in body for token in row])
+                return f'{{n}}\n{{grid(n, {len(body[0])}, {lo}, {hi})}}\n'
+
+            if len(body) == 1 and len(body[0]) == 1 and len(body[0][0]) == count:
+                return f'{{n}}\n{{chars(n, "{cls._alphabet(body[0][0])}")}}\n'
+
+        raise ValueError('Could not infer an input generator from sample_input; provide input_template instead')
+
+    @classmethod
+    def _alphabet(cls, word: str) -> str:
+        """Get the character class a sample word is drawn from."""
+        if word.isdigit():
+            return string.digits
+        if word.isalpha() and word.islower():
+            return string.ascii_lowercase
+        if word.isalpha() and word.isupper():
+            return string.ascii_uppercase
+        return ''.join(sorted(set(word) - {'"', '\\'})) or string.ascii_lowercase
+
+    # Fitting Operations
+    @classmethod
+    def fit(cls, sizes: List[int], times: List[float]) -> List[Dict[str, Any]]:
+        """
+        Least-squares fit of time = a + b * f(n) for every complexity class.
+
+        Returns:
+            Fits sorted best first, each with class, coefficients and r_squared
+        """
+        mean_time = sum(times) / len(times)
+        total = sum((t - mean_time) ** 2 for t in times)
+        fits = []
+
+        for name, growth in COMPLEXITY_CLASSES:
+            try:
+                xs = [growth(n) for n in sizes]
+            except OverflowError:
+                continue
+            if any(math.isinf(x) for x in xs):
+                continue
+
+            mean_x = sum(xs) / len(xs)
+            spread = sum((x - mean_x) ** 2 for x in xs)
+            slope = sum((x - mean_x) * (t - mean_time) for x, t in zip(xs, times)) / spread if spread else 0.0
+            # Running time never shrinks as inputs grow
+            slope = max(slope, 0.0)
+            intercept = mean_time - slope * mean_x
+
+            residual = sum((t - (intercept + slope * x)) ** 2 for x, t in zip(xs, times))
+            fits.append({
+                'class': name,
+                'intercept': intercept,
+                'coefficient': slope,
+                'residual': residual,
+                'r_squared': round(1 - residual / total, 4) if total else 1.0
+            })
+
+        fits.sort(key=lambda f: f['residual'])
+        return fits
+
+    @classmethod
+    def analyze(cls, code: str, language: str, template: Optional[str] = None, sample_input: Optional[str] = None,
+                sizes: Optional[List[int]] = None, repeats: int = DEFAULT_REPEATS,
+                profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Estimate the time complexity of a program empirically.
+
+        Raises ValueError for an invalid template, sample input or size list.
+
+        Returns:
+            Tuple of (timing table with best-fit class, error message if no backend could run the code)
+        """
+        if template is None:
+            if not sample_input:
+                raise ValueError('Either input_template or sample_input is required')
+            template = cls.infer_template(sample_input)
+
+        sizes = sorted(set(sizes or DEFAULT_SIZES))
+        if len(sizes) < MIN_POINTS or len(sizes) > MAX_SIZES:
+            raise ValueError(f'Provide between {MIN_POINTS} and {MAX_SIZES} distinct sizes')
+        if sizes[0] < 1 or sizes[-1] > MAX_SIZE:
+            raise ValueError(f'Sizes must be between 1 and {MAX_SIZE}')
+
+        # Render the largest input once up front so template errors surface before anything runs
+        cls.render_template(template, sizes[-1], seed=sizes[-1])
+        inputs = RenderedInputs(template, sizes)
+
+        series, error = ExecutionService.execute_series(
+            code, language, inputs, repeats=repeats, time_budget=TIME_BUDGET, profile=profile
+        )
+        if series is None:
+            return None, error
+
+        table = [{
+            'n': sizes[run['index']],
+            'input_bytes': run['input_bytes'],
+            'time': run['execution_time'],
+            'times': run['times'],
+            'timed_out': run['timed_out'],
+            'error': run['error']
+        } for run in series['runs']]
+
+        response = {
+            'success': series['success'],
+            'backend': series.get('backend'),
+            'profile': profile,
+            'compile_time': series['compile_time'],
+            'input_template': template,
+            'table': table,
+            'best_fit': None,
+            'fits': [],
+            'error': series['error']
+        }
+
+        timed = [row for row in table if row['time'] is not None]
+        if not series['success']:
+            return response, None
+        if len(timed) < MIN_POINTS:
+            response['success'] = False
+            response['error'] = (table[-1]['error'] if table and table[-1]['error'] else
+                                 f'Only {len(timed)} sizes finished; at least {MIN_POINTS} are needed for a fit')
+            return response, None
+
+        fits = cls.fit([row['n'] for row in timed], [row['time'] for row in timed])
+        fastest = min(row['time'] for row in timed)
+        measurable = max(row['time'] for row in timed) - fastest >= max(NOISE_FLOOR, 0.1 * fastest)
+
+        response['fits'] = [{
+            'class': f['class'],
+            'r_squared': f['r_squared'],
+            'coefficient': f['coefficient'],
+            'intercept': round(f['intercept'], 6)
+        } for f in fits]
+        order = [name for name, _ in COMPLEXITY_CLASSES]
+        candidates = [f for f in fits if f['r_squared'] >= fits[0]['r_squared'] - PARSIMONY_MARGIN]
+        best = min(candidates, key=lambda f: order.index(f['class']))
+        response['best_fit'] = {
+            # Flat timings are dominated by startup and noise, so only O(1) is supported by them
+            'class': best['class'] if measurable else 'O(1)',
+            'r_squared': best['r_squared'],
+            'alternatives': [f['class'] for f in candidates if f is not best] if measurable else [],
+            'conclusive': measurable and len(candidates) == 1 and best['r_squared'] >= 0.95
+        }
+        return response, None
+
+
+class RenderedInputs(Sequence):
+    """Inputs of a timing series, rendered from the template only when a backend reads them."""
+
+    def __init__(self, template: str, sizes: List[int]):
+        self.template = template
+        self.sizes = sizes
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __getitem__(self, index: int) -> str:
+        n = self.sizes[index]
+        return ComplexityService.render_template(self.template, n, seed=n)
+
+
+def _ints(rng: random.Random, count: int, lo: int, hi: int) -> str:
+    return ' '.join(str(rng.randint(lo, hi)) for _ in range(max(count, 0)))
+
+
+def _sorted_ints(rng: random.Random, count: int, lo: int, hi: int) -> str:
+    return ' '.join(str(v) for v in sorted(rng.randint(lo, hi) for _ in range(max(count, 0))))
+
+
+def _perm(rng: random.Random, count: int) -> str:
+    values = list(range(1, max(count, 0) + 1))
+    rng.shuffle(values)
+    return ' '.join(map(str, values))
+
+
+def _chars(rng: random.Random, count: int, alphabet: str = string.ascii_lowercase) -> str:
+    return ''.join(rng.choice(alphabet) for _ in range(max(count, 0)))
+
+
+def _grid(rng: random.Random, rows: int, cols: int, lo: int, hi: int) -> str:
+    return '\n'.join(_ints(rng, cols, lo, hi) for _ in range(max(rows, 0)))
+
+
+def _int_width(lo: int, hi: int) -> int:
+    return max(len(str(int(lo))), len(str(int(hi)))) + 1
+
+
+# Generator functions available in input templates
+GENERATORS = {
+    'ints': _ints,
+    'sorted_ints': _sorted_ints,
+    'perm': _perm,
+    'chars': _chars,
+    'grid': _grid,
+}
+
+# Upper bounds on each generator's output size in characters (same arguments, without rng)
+GENERATOR_SIZES = {
+    'ints': lambda count, lo, hi: max(count, 0) * _int_width(lo, hi),
+    'sorted_ints': lambda count, lo, hi: max(count, 0) * _int_width(lo, hi),
+    'perm': lambda count: max(count, 0) * _int_width(1, count),
+    'chars': lambda count, alphabet='': max(count, 0),
+    'grid': lambda rows, cols, lo, hi: max(rows, 0) * (max(cols, 0) * _int_width(lo, hi) + 1),
+}
@@ -2,9 +2,93 @@
 Database Service - MongoDB Operations
 """
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from bson.objectid import ObjectId
+from bson.errors import InvalidId
+import base64
 import os
-from datetime import datetime
+import re
+import time
+from datetime import datetime, timedelta
+
+from app.services.blob_store import BlobStore
+from app.services.code_delta import CodeDelta
+from app.services.similarity_service import SimilarityService
+from app.services.write_behind import WriteBehindBuffer
+
+
+# Generations written with the explanation and history metadata embedded.
+# Older documents keep those in the explanations / history collections until
+# migrate_generations.py moves them over.
+GENERATION_SCHEMA_VERSION = 2
+
+# Characters of the prompt kept as the history preview
+PROMPT_PREVIEW_LENGTH = 100
+
+EPOCH = datetime(1970, 1, 1)
+
+# Usage rollup bucket sizes kept in user_stats_rollups
+ROLLUP_PERIODS = ['day', 'week']
+
+# Maximum number of rollup buckets returned per request
+MAX_ROLLUP_BUCKETS = 366
+
+# Indexes created at startup: (collection, keys, options)
+INDEXES = [
+    ('users', [('email', 1)], {'unique': True}),
+    ('code_generations', [('user_id', 1), ('created_at', -1), ('_id', -1)], {}),
+    ('code_generations', [('created_at', 1)], {}),
+    ('history', [('user_id', 1), ('timestamp', -1)], {}),
+    ('history', [('generation_id', 1)], {}),
+    ('explanations', [('generation_id', 1)], {}),
+    ('user_stats_rollups', [('user_id', 1), ('period', 1), ('bucket', -1)], {'unique': True}),
+    ('favorites', [('user_id', 1), ('created_at', -1)], {}),
+    ('favorites', [('user_id', 1), ('generation_id', 1)], {'unique': True}),
+    ('gists', [('user_id', 1), ('created_at', -1)], {}),
+    # Per-user full-text search; documents carry a `language` field of their own,
+    # so the text-language override is pointed at a field that is never set
+    ('code_generations', [('user_id', 1), ('prompt', 'text'), ('language', 'text'), ('code_identifiers', 'text')],
+     {'name': 'generation_search', 'weights': {'prompt': 10, 'code_identifiers': 5, 'language': 3},
+      'default_language': 'english', 'language_override': 'text_language'}),
+    # MinHash/LSH band keys (similar generations, near-identical prompt reuse)
+    ('code_generations', [('user_id', 1), ('code_bands', 1)], {}),
+    ('code_generations', [('user_id', 1), ('language', 1), ('prompt_bands', 1)], {}),
+    ('generation_versions', [('generation_id', 1), ('version', 1)], {'unique': True}),
+    ('generation_versions', [('user_id', 1), ('created_at', 1)], {}),
+    ('generation_reuses', [('user_id', 1), ('created_at', -1)], {}),
+    ('generation_reuses', [('generation_id', 1)], {}),
+]
+
+# Every n-th refinement version stores the full code instead of a delta (bounds checkout cost)
+VERSION_SNAPSHOT_INTERVAL = 10
+
+# A refinement writes its version record before bumping the generation. Attempts
+# to claim a version number, and the age (seconds) after which a record whose
+# refinement never bumped the generation is treated as abandoned
+VERSION_WRITE_ATTEMPTS = 5
+VERSION_CLAIM_TIMEOUT = 60
+
+# Fields derived from the code/prompt for search and similarity, never returned to clients
+DERIVED_FIELDS = {'code_identifiers': 0, 'code_bands': 0, 'prompt_bands': 0}
+
+# Near-duplicate lookups: candidates confirmed per query and default similarity threshold
+MAX_SIMILARITY_CANDIDATES = 200
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+
+# Identifier extraction for the search index
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]{2,}')
+CAMEL_CASE_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+MAX_CODE_IDENTIFIERS = 500
+COMMON_KEYWORDS = {
+    'and', 'auto', 'bool', 'break', 'case', 'catch', 'char', 'class', 'const', 'continue', 'def',
+    'default', 'double', 'elif', 'else', 'end', 'false', 'final', 'float', 'for', 'from', 'func',
+    'function', 'import', 'include', 'int', 'let', 'long', 'main', 'new', 'none', 'not', 'null',
+    'package', 'private', 'public', 'return', 'self', 'static', 'std', 'string', 'struct', 'this',
+    'true', 'try', 'using', 'val', 'var', 'void', 'while'
+}
+
+# Maximum search query length (characters)
+MAX_SEARCH_QUERY = 200
 
 
 class DatabaseService:
@@ -26,18 +110,120 @@ class DatabaseService:
             
             # Create indexes
             cls._create_indexes()
+            
+            if os.getenv('INDEX_AUDIT_ON_STARTUP', 'false').lower() == 'true':
+                for shape in cls.audit_indexes():
+                    if shape['collscan']:
+                        print(f"[IndexAudit] COLLSCAN: {shape['query']} on {shape['collection']}")
     
     @classmethod
     def _create_indexes(cls):
         """Create database indexes for optimized queries."""
-        try:
-            cls._db.users.create_index('email', unique=True)
-            cls._db.code_generations.create_index('user_id')
-            cls._db.code_generations.create_index('created_at')
-            cls._db.history.create_index([('user_id', 1), ('timestamp', -1)])
-            cls._db.explanations.create_index('generation_id')
-        except Exception as e:
-            print(f"Index creation warning: {e}")
+        for collection, keys, options in INDEXES:
+            try:
+                cls._db[collection].create_index(keys, **options)
+            except Exception as e:
+                # e.g. duplicate favorites left over from before the unique index
+                print(f"Index creation warning ({collection} {keys}): {e}")
+    
+    @classmethod
+    def _query_shapes(cls) -> list:
+        """
+        Get one representative filter per query shape this service issues.
+        
+        Returns:
+            List of (name, collection, filter, sort, pipeline) tuples; pipeline is
+            set for aggregations, filter/sort for finds, updates and deletes.
+        """
+        user, other = ObjectId(), ObjectId()
+        now = datetime.utcnow()
+        by_date = [('created_at', -1), ('_id', -1)]
+        return [
+            ('find_user_by_email', 'users', {'email': 'audit@example.com'}, None, None),
+            ('get_generation_by_id', 'code_generations', {'_id': other, 'user_id': user}, None, None),
+            ('history page (skip)', 'code_generations', {'user_id': user}, by_date, None),
+            ('history page (cursor)', 'code_generations', {'user_id': user, '$or': [
+                {'created_at': {'$lt': now}}, {'created_at': now, '_id': {'$lt': other}}
+            ]}, by_date, None),
+            ('history page (summary)', 'code_generations', None, None, [
+                {'$match': {'user_id': user}}, {'$sort': {'created_at': -1, '_id': -1}}, {'$limit': 21},
+                {'$project': {'language': 1, 'created_at': 1}}
+            ]),
+            ('history search', 'code_generations', None, None, [
+                {'$match': {'user_id': user, '$text': {'$search': 'dijkstra'}}},
+                {'$addFields': {'score': {'$meta': 'textScore'}}}, {'$sort': {'score': -1, '_id': -1}},
+                {'$limit': 21}
+            ]),
+            ('similar generations', 'code_generations',
+             {'user_id': user, 'code_bands': {'$in': [1, 2, 3]}, '_id': {'$ne': other}}, None, None),
+            ('reusable generation', 'code_generations',
+             {'user_id': user, 'language': 'python', 'prompt_bands': {'$in': [1, 2, 3]}, 'success': True}, None, None),
+            ('version checkout (snapshot)', 'generation_versions',
+             {'generation_id': other, 'version': {'$lte': 7}, 'kind': 'snapshot'}, [('version', -1)], None),
+            ('version checkout (deltas)', 'generation_versions',
+             {'generation_id': other, 'version': {'$gt': 0, '$lte': 7}}, [('version', 1)], None),
+            ('user versions (stats rebuild)', 'generation_versions',
+             {'user_id': user, 'version': {'$gt': 0}}, None, None),
+            ('user reuses (stats rebuild)', 'generation_reuses', {'user_id': user}, None, None),
+            ('reuse cleanup', 'generation_reuses', {'generation_id': other}, None, None),
+            ('legacy explanation', 'explanations', {'generation_id': other}, None, None),
+            ('legacy history cleanup', 'history', {'generation_id': other}, None, None),
+            ('usage rollups', 'user_stats_rollups', {'user_id': user, 'period': 'day'}, [('bucket', -1)], None),
+            ('get_user_favorites', 'favorites', {'user_id': user}, [('created_at', -1)], None),
+            ('favorite by generation', 'favorites', {'user_id': user, 'generation_id': str(other)}, None, None),
+            ('get_user_gists', 'gists', {'user_id': user}, [('created_at', -1)], None),
+        ]
+    
+    @classmethod
+    def _plan_stages(cls, explain, stages=None) -> list:
+        """Collect the stage names of the winning plan(s) in explain() output."""
+        stages = [] if stages is None else stages
+        if isinstance(explain, dict):
+            if isinstance(explain.get('stage'), str):
+                stages.append(explain['stage'])
+            for key, value in explain.items():
+                if key not in ('rejectedPlans', 'allPlansExecution'):
+                    cls._plan_stages(value, stages)
+        elif isinstance(explain, list):
+            for item in explain:
+                cls._plan_stages(item, stages)
+        return stages
+    
+    @classmethod
+    def audit_indexes(cls) -> list:
+        """
+        Run explain() on every query shape and report the winning plan stages.
+        
+        Returns:
+            List of {query, collection, stages, collscan} per query shape
+        """
+        db = cls.get_db()
+        report = []
+        
+        for name, collection, query, sort, pipeline in cls._query_shapes():
+            try:
+                if pipeline is not None:
+                    explain = db.command('explain', {'aggregate': collection, 'pipeline': pipeline, 'cursor': {}},
+                                         verbosity='queryPlanner')
+                else:
+                    cursor = db[collection].find(query)
+                    if sort:
+                        cursor = cursor.sort(sort)
+                    explain = cursor.limit(20).explain()
+                stages = cls._plan_stages(explain)
+                error = None
+            except Exception as e:
+                stages, error = [], str(e)
+            
+            report.append({
+                'query': name,
+                'collection': collection,
+                'stages': stages,
+                'collscan': 'COLLSCAN' in stages,
+                'error': error
+            })
+        
+        return report
     
     @classmethod
     def get_db(cls):
@@ -74,62 +260,89 @@ class DatabaseService:
         return db.users.find_one({'email': email})
     
     @classmethod
-    def find_user_by_id(cls, user_id: str) -> dict:
-        """Find user by ID."""
+    def find_user_by_id(cls, user_id: str, projection: dict = None) -> dict:
+        """Find user by ID (only the projected fields, when a projection is given)."""
         db = cls.get_db()
-        return db.users.find_one({'_id': ObjectId(user_id)})
+        return db.users.find_one({'_id': ObjectId(user_id)}, projection)
     
     @classmethod
     def update_last_login(cls, user_id: str):
-        """Update user's last login timestamp."""
-        db = cls.get_db()
-        db.users.update_one(
-            {'_id': ObjectId(user_id)},
-            {'$set': {'last_login': datetime.utcnow()}}
-        )
+        """Update user's last login timestamp (write-behind, not on the login latency path)."""
+        WriteBehindBuffer.update('users', {'_id': ObjectId(user_id)}, set_fields={'last_login': datetime.utcnow()})
     
     # Code Generation Operations
     @classmethod
-    def save_generation(cls, user_id: str, prompt: str, language: str,
-                       code: str, explanation: str) -> str:
-        """Save a code generation to the database."""
+    def save_generation(cls, user_id: str, prompt: str, language: str, code: str, explanation: str,
+                        translated_from: str = None, sample_input: str = '') -> str:
+        """
+        Save a code generation to the database (optionally as a translation of another one).
+        
+        History metadata is embedded in the generation document; the code
+        and explanation bodies go to the content-addressed blob store, so
+        identical bodies are stored once.
+        """
         db = cls.get_db()
-        timestamp = datetime.utcnow()
+        code_ref, explanation_ref = BlobStore.put_many(db, [code, explanation])
         
-        # Insert code generation
         generation_doc = {
             'user_id': ObjectId(user_id),
             'prompt': prompt,
             'language': language,
-            'generated_code': code,
-            'created_at': timestamp,
-            'success': True
+            'code_ref': code_ref,
+            'code_size': len(code),
+            'code_identifiers': cls.extract_code_identifiers(code),
+            'code_bands': SimilarityService.code_bands(code),
+            'prompt_bands': SimilarityService.prompt_bands(prompt),
+            'explanation_ref': explanation_ref,
+            'history': {
+                'action_type': 'translate' if translated_from else 'generate',
+                'prompt_preview': prompt[:PROMPT_PREVIEW_LENGTH]
+            },
+            'created_at': datetime.utcnow(),
+            'success': True,
+            'schema_version': GENERATION_SCHEMA_VERSION
         }
-        generation_result = db.code_generations.insert_one(generation_doc)
-        generation_id = generation_result.inserted_id
+        if translated_from:
+            generation_doc['translated_from'] = ObjectId(translated_from)
+        if sample_input:
+            generation_doc['sample_input'] = sample_input
         
-        # Insert explanation
-        explanation_doc = {
-            'generation_id': generation_id,
-            'explanation_text': explanation,
-            'created_at': timestamp
-        }
-        db.explanations.insert_one(explanation_doc)
+        try:
+            result = db.code_generations.insert_one(generation_doc)
+        except Exception:
+            BlobStore.release(db, [code_ref, explanation_ref])
+            raise
+        cls._record_stats(user_id, language, [(generation_doc['history']['action_type'], generation_doc['created_at'])],
+                          generated=1)
+        return str(result.inserted_id)
+    
+    @classmethod
+    def _resolve_bodies(cls, generations: list) -> list:
+        """
+        Fill in generated_code / explanation of generations whose bodies are
+        in the blob store (one blob query for the whole list).
         
-        # Add to history
-        history_doc = {
-            'user_id': ObjectId(user_id),
-            'generation_id': generation_id,
-            'action_type': 'generate',
-            'timestamp': timestamp,
-            'metadata': {
-                'language': language,
-                'prompt_preview': prompt[:100] if len(prompt) > 100 else prompt
-            }
+        Documents saved before the blob store keep their bodies inline and
+        are returned as they are.
+        """
+        refs = [generation.get(field) for generation in generations for field in ('code_ref', 'explanation_ref')]
+        bodies = BlobStore.get_many(cls.get_db(), refs)
+        for generation in generations:
+            code_ref = generation.pop('code_ref', None)
+            explanation_ref = generation.pop('explanation_ref', None)
+            if code_ref:
+                generation['generated_code'] = bodies.get(code_ref, '')
+            if explanation_ref:
+                generation['explanation'] = bodies.get(explanation_ref, '')
+        return generations
+    
+    @classmethod
+    def _history_metadata(cls, generation: dict) -> dict:
+        """Get a generation's history metadata (derived for documents saved before it was embedded)."""
+        return generation.get('history') or {
+            'action_type': 'translate' if generation.get('translated_from') else 'generate',
+            'prompt_preview': (generation.get('prompt') or '')[:PROMPT_PREVIEW_LENGTH]
         }
-        db.history.insert_one(history_doc)
-        
-        return str(generation_id)
     
     @classmethod
     def get_generation_by_id(cls, generation_id: str, user_id: str = None) -> dict:
@@ -140,116 +353,811 @@ class DatabaseService:
         if user_id:
             query['user_id'] = ObjectId(user_id)
         
-        generation = db.code_generations.find_one(query)
+        generation = db.code_generations.find_one(query, dict(DERIVED_FIELDS, history=0, schema_version=0))
         
         if generation:
-            # Get associated explanation
-            explanation = db.explanations.find_one({'generation_id': generation['_id']})
-            generation['explanation'] = explanation['explanation_text'] if explanation else ''
+            cls._resolve_bodies([generation])
+            if 'explanation' not in generation:
+                # Not migrated yet: explanation still lives in its own collection
+                explanation = db.explanations.find_one({'generation_id': generation['_id']})
+                generation['explanation'] = explanation['explanation_text'] if explanation else ''
             generation['_id'] = str(generation['_id'])
             generation['user_id'] = str(generation['user_id'])
+            if generation.get('translated_from'):
+                generation['translated_from'] = str(generation['translated_from'])
         
         return generation
     
+    @classmethod
+    def encode_history_cursor(cls, generation: dict) -> str:
+        """Build the opaque cursor pointing just past a history entry."""
+        millis = (generation['created_at'] - EPOCH) // timedelta(milliseconds=1)
+        raw = f"{millis}:{generation['_id']}".encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    
+    @classmethod
+    def decode_history_cursor(cls, cursor: str) -> tuple:
+        """
+        Decode a history cursor into (created_at, _id).
+        
+        Raises ValueError for malformed cursors.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+            millis, generation_id = raw.split(':')
+            return EPOCH + timedelta(milliseconds=int(millis)), ObjectId(generation_id)
+        except (ValueError, InvalidId, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+    
+    @classmethod
+    def _summary_projection(cls) -> dict:
+        """Aggregation $project for history summaries (no code, no legacy refinements array)."""
+        return {
+            'language': 1,
+            'created_at': 1,
+            'translated_from': 1,
+            'history': 1,
+            'prompt': {'$substrCP': [{'$ifNull': ['$prompt', '']}, 0, PROMPT_PREVIEW_LENGTH]},
+            'code_size': {'$ifNull': ['$code_size', {'$strLenCP': {'$ifNull': ['$generated_code', '']}}]},
+            # Versioned refinements plus any notes-only refinements of older documents
+            'refinement_count': {'$add': [{'$ifNull': ['$version', 0]}, {'$size': {'$ifNull': ['$refinements', []]}}]},
+            'updated_at': {'$ifNull': ['$updated_at', {'$max': '$refinements.timestamp'}]}
+        }
+    
+    @classmethod
+    def _summary_item(cls, generation: dict) -> dict:
+        """Turn a summary projection into a history list item."""
+        metadata = cls._history_metadata(generation)
+        return {
+            '_id': str(generation['_id']),
+            'generation_id': str(generation['_id']),
+            'action_type': metadata['action_type'],
+            'timestamp': generation['created_at'],
+            'updated_at': generation.get('updated_at') or generation['created_at'],
+            'metadata': {
+                'language': generation.get('language'),
+                'prompt_preview': metadata['prompt_preview']
+            },
+            'code_size': generation['code_size'],
+            'refinement_count': generation['refinement_count'],
+            'translated_from': str(generation['translated_from']) if generation.get('translated_from') else None
+        }
+    
     @classmethod
     def get_user_history(cls, user_id: str, limit: int = 20, skip: int = 0) -> list:
         """Retrieve user's generation history."""
+        return cls.get_user_history_page(user_id, limit=limit, skip=skip)['history']
+    
+    @classmethod
+    def get_user_history_page(cls, user_id: str, limit: int = 20, skip: int = 0,
+                              cursor: str = None, summary: bool = False) -> dict:
+        """
+        Retrieve a page of user's generation history.
+        
+        Reads code_generations directly (one indexed query on user_id, created_at, _id);
+        items keep the shape of the former history collection entries. With a
+        cursor the page starts right after the entry it points to (keyset
+        pagination, constant cost at any depth); otherwise `skip` is used.
+        
+        In summary mode the generation itself is left out: Mongo projects only
+        the preview, code size, refinement count and timestamps, so neither the
+        code nor the refinements array is read out or serialized.
+        
+        Returns:
+            Dictionary with history items and next_cursor (None on the last page)
+        """
+        db = cls.get_db()
+        
+        query = {'user_id': ObjectId(user_id)}
+        if cursor:
+            created_at, last_id = cls.decode_history_cursor(cursor)
+            query['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': last_id}}
+            ]
+        
+        if summary:
+            pipeline = [{'$match': query}, {'$sort': {'created_at': -1, '_id': -1}}]
+            if skip and not cursor:
+                pipeline.append({'$skip': skip})
+            pipeline += [{'$limit': limit + 1}, {'$project': cls._summary_projection()}]
+            generations = list(db.code_generations.aggregate(pipeline))
+        else:
+            generations = db.code_generations.find(
+                query,
+                dict(DERIVED_FIELDS, explanation=0, explanation_ref=0, schema_version=0)
+            ).sort([('created_at', -1), ('_id', -1)])
+            if skip and not cursor:
+                generations = generations.skip(skip)
+            # One extra row tells whether another page exists
+            generations = cls._resolve_bodies(list(generations.limit(limit + 1)))
+        
+        next_cursor = cls.encode_history_cursor(generations[limit - 1]) if len(generations) > limit else None
+        
+        history = []
+        for generation in generations[:limit]:
+            metadata = cls._history_metadata(generation)
+            if summary:
+                history.append(cls._summary_item(generation))
+                continue
+            
+            generation.pop('history', None)
+            generation['_id'] = str(generation['_id'])
+            generation['user_id'] = str(generation['user_id'])
+            if generation.get('translated_from'):
+                generation['translated_from'] = str(generation['translated_from'])
+            
+            history.append({
+                '_id': generation['_id'],
+                'user_id': generation['user_id'],
+                'generation_id': generation['_id'],
+                'action_type': metadata['action_type'],
+                'timestamp': generation['created_at'],
+                'metadata': {
+                    'language': generation.get('language'),
+                    'prompt_preview': metadata['prompt_preview']
+                },
+                'generation': generation
+            })
+        
+        return {'history': history, 'next_cursor': next_cursor}
+    
+    # Search Operations
+    @classmethod
+    def extract_code_identifiers(cls, code: str) -> list:
+        """
+        Get the searchable identifiers of a piece of code.
+        
+        Identifiers are lower-cased and also split on camelCase and
+        snake_case (dijkstraShortestPath -> dijkstra, shortest, path), since
+        the text index only matches whole words.
+        """
+        identifiers = []
+        seen = set()
+        for match in IDENTIFIER_PATTERN.findall(code or ''):
+            parts = [match] + [part for chunk in match.split('_') for part in CAMEL_CASE_PATTERN.findall(chunk)]
+            for part in parts:
+                term = part.lower()
+                if len(term) < 3 or term in COMMON_KEYWORDS or term in seen:
+                    continue
+                seen.add(term)
+                identifiers.append(term)
+                if len(identifiers) >= MAX_CODE_IDENTIFIERS:
+                    return identifiers
+        return identifiers
+    
+    @classmethod
+    def search_user_history(cls, user_id: str, query: str, languages: list = None,
+                            limit: int = 20, cursor: str = None) -> dict:
+        """
+        Full-text search over a user's generations (prompt, language, code identifiers).
+        
+        Results are history summaries ranked by text score; the cursor keys
+        on (score, _id) so later pages never re-scan earlier ones.
+        
+        Returns:
+            Dictionary with ranked results and next_cursor (None on the last page)
+        """
         db = cls.get_db()
         
+        match = {'user_id': ObjectId(user_id), '$text': {'$search': query}}
+        if languages:
+            match['language'] = {'$in': languages}
+        
         pipeline = [
-            {'$match': {'user_id': ObjectId(user_id)}},
-            {'$sort': {'timestamp': -1}},
-            {'$skip': skip},
-            {'$limit': limit},
-            {'$lookup': {
-                'from': 'code_generations',
-                'localField': 'generation_id',
-                'foreignField': '_id',
-                'as': 'generation'
-            }},
-            {'$unwind': {'path': '$generation', 'preserveNullAndEmptyArrays': True}}
+            {'$match': match},
+            {'$addFields': {'score': {'$meta': 'textScore'}}}
         ]
+        if cursor:
+            score, last_id = cls.decode_search_cursor(cursor)
+            pipeline.append({'$match': {'$or': [
+                {'score': {'$lt': score}},
+                {'score': score, '_id': {'$lt': last_id}}
+            ]}})
+        pipeline += [
+            {'$sort': {'score': -1, '_id': -1}},
+            {'$limit': limit + 1},
+            {'$project': dict(cls._summary_projection(), score=1)}
+        ]
+        
+        generations = list(db.code_generations.aggregate(pipeline))
+        next_cursor = cls.encode_search_cursor(generations[limit - 1]) if len(generations) > limit else None
         
-        history = list(db.history.aggregate(pipeline))
+        results = []
+        for generation in generations[:limit]:
+            item = cls._summary_item(generation)
+            item['score'] = round(generation['score'], 4)
+            results.append(item)
         
-        # Convert ObjectIds to strings
-        for item in history:
-            item['_id'] = str(item['_id'])
-            item['user_id'] = str(item['user_id'])
-            item['generation_id'] = str(item['generation_id'])
-            if 'generation' in item and item['generation']:
-                item['generation']['_id'] = str(item['generation']['_id'])
-                item['generation']['user_id'] = str(item['generation']['user_id'])
+        return {'results': results, 'next_cursor': next_cursor}
+    
+    @classmethod
+    def encode_search_cursor(cls, generation: dict) -> str:
+        """Build the opaque cursor pointing just past a search result."""
+        raw = f"{generation['score']!r}:{generation['_id']}".encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    
+    @classmethod
+    def decode_search_cursor(cls, cursor: str) -> tuple:
+        """
+        Decode a search cursor into (score, _id).
         
-        return history
+        Raises ValueError for malformed cursors.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+            score, generation_id = raw.split(':')
+            return float(score), ObjectId(generation_id)
+        except (ValueError, InvalidId, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+    
+    # Similarity Operations
+    @classmethod
+    def find_similar_generations(cls, generation_id: str, user_id: str, limit: int = 10,
+                                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> list:
+        """
+        Find the user's generations whose code is near-identical to a generation's.
+        
+        Candidates share at least one LSH band key with the generation; each
+        is confirmed with the exact Jaccard similarity of the code shingles.
+        
+        Returns:
+            History summaries with a `similarity` score, most similar first,
+            or None if the generation does not exist
+        """
+        db = cls.get_db()
+        user = ObjectId(user_id)
+        
+        generation = db.code_generations.find_one(
+            {'_id': ObjectId(generation_id), 'user_id': user},
+            {'generated_code': 1, 'code_ref': 1, 'code_bands': 1}
+        )
+        if not generation:
+            return None
+        
+        code = cls._resolve_bodies([generation])[0].get('generated_code', '')
+        bands = generation.get('code_bands')
+        if bands is None:
+            # Saved before band keys existed (see migrate_generations.py)
+            bands = SimilarityService.code_bands(code)
+        if not bands:
+            return []
+        
+        candidates = cls._resolve_bodies(list(db.code_generations.aggregate([
+            {'$match': {'user_id': user, 'code_bands': {'$in': bands}, '_id': {'$ne': generation['_id']}}},
+            {'$limit': MAX_SIMILARITY_CANDIDATES},
+            {'$project': dict(cls._summary_projection(), generated_code=1, code_ref=1)}
+        ])))
+        
+        shingles = SimilarityService.code_shingles(code)
+        similar = []
+        for candidate in candidates:
+            similarity = SimilarityService.jaccard(shingles, SimilarityService.code_shingles(candidate['generated_code']))
+            if similarity >= threshold:
+                item = cls._summary_item(candidate)
+                item['similarity'] = round(similarity, 4)
+                similar.append(item)
+        
+        similar.sort(key=lambda item: (item['similarity'], item['timestamp']), reverse=True)
+        return similar[:limit]
+    
+    @classmethod
+    def find_reusable_generation(cls, user_id: str, prompt: str, language: str,
+                                 threshold: float) -> dict:
+        """
+        Find an earlier successful generation of the user for a near-identical prompt.
+        
+        Returns:
+            The best matching generation (as get_generation_by_id) with its
+            prompt `similarity`, or None
+        """
+        db = cls.get_db()
+        
+        bands = SimilarityService.prompt_bands(prompt)
+        if not bands:
+            return None
+        
+        candidates = db.code_generations.find(
+            {'user_id': ObjectId(user_id), 'language': language, 'prompt_bands': {'$in': bands}, 'success': True},
+            {'prompt': 1, 'created_at': 1}
+        ).limit(MAX_SIMILARITY_CANDIDATES)
+        
+        shingles = SimilarityService.prompt_shingles(prompt)
+        matches = []
+        for candidate in candidates:
+            similarity = SimilarityService.jaccard(shingles, SimilarityService.prompt_shingles(candidate['prompt']))
+            if similarity >= threshold:
+                matches.append((similarity, candidate['created_at'], candidate['_id']))
+        if not matches:
+            return None
+        
+        # Most similar prompt wins, the newest generation among equals
+        similarity, _, best_id = max(matches)
+        generation = cls.get_generation_by_id(str(best_id), user_id)
+        if generation:
+            generation['similarity'] = round(similarity, 4)
+        return generation
+    
+    @classmethod
+    def record_generation_reuse(cls, user_id: str, generation: dict, prompt: str) -> str:
+        """
+        Log that a prompt was answered with an earlier generation.
+        
+        Reuses are kept in generation_reuses (with the prompt that was asked)
+        and counted as `reuse` actions in the user's stats.
+        """
+        db = cls.get_db()
+        
+        reuse_doc = {
+            'user_id': ObjectId(user_id),
+            'generation_id': ObjectId(generation['_id']),
+            'language': generation.get('language'),
+            'prompt': prompt,
+            'similarity': generation.get('similarity'),
+            'created_at': datetime.utcnow()
+        }
+        result = db.generation_reuses.insert_one(reuse_doc)
+        cls._record_stats(user_id, reuse_doc['language'], [('reuse', reuse_doc['created_at'])])
+        return str(result.inserted_id)
     
     @classmethod
     def delete_generation(cls, generation_id: str, user_id: str) -> bool:
         """Delete a code generation and its related data."""
         db = cls.get_db()
         
-        # Verify ownership
-        generation = db.code_generations.find_one({
-            '_id': ObjectId(generation_id),
-            'user_id': ObjectId(user_id)
-        })
+        # Ownership is part of the filter
+        result = db.code_generations.find_one_and_delete(
+            {'_id': ObjectId(generation_id), 'user_id': ObjectId(user_id)},
+            {'schema_version': 1, 'language': 1, 'prompt': 1, 'created_at': 1, 'code_ref': 1,
+             'explanation_ref': 1, 'translated_from': 1, 'history': 1, 'refinements.timestamp': 1}
+        )
         
-        if not generation:
+        if not result:
             return False
         
-        # Delete related documents
-        db.explanations.delete_many({'generation_id': ObjectId(generation_id)})
-        db.history.delete_many({'generation_id': ObjectId(generation_id)})
-        db.code_generations.delete_one({'_id': ObjectId(generation_id)})
+        BlobStore.release(db, [result.get('code_ref'), result.get('explanation_ref')])
+        
+        refined_at = [version['created_at'] for version in db.generation_versions.find(
+            {'generation_id': result['_id'], 'version': {'$gt': 0}}, {'created_at': 1})]
+        db.generation_versions.delete_many({'generation_id': result['_id']})
+        reused_at = [reuse['created_at'] for reuse in db.generation_reuses.find(
+            {'generation_id': result['_id']}, {'created_at': 1})]
+        db.generation_reuses.delete_many({'generation_id': result['_id']})
+        
+        # Stats describe the generations that exist, so take back everything this one counted
+        cls._record_stats(user_id, result.get('language'), cls._stats_events(result, refined_at, reused_at),
+                          generated=-1, sign=-1)
+        
+        # Documents saved before the consolidation still have related rows
+        if result.get('schema_version', 1) < GENERATION_SCHEMA_VERSION:
+            db.explanations.delete_many({'generation_id': ObjectId(generation_id)})
+            db.history.delete_many({'generation_id': ObjectId(generation_id)})
         
         return True
     
+    # User Stats Operations
+    @classmethod
+    def _bucket_start(cls, timestamp: datetime, period: str) -> datetime:
+        """Get the start of the day or (ISO, Monday-based) week a timestamp falls in."""
+        day = datetime(timestamp.year, timestamp.month, timestamp.day)
+        return day - timedelta(days=day.weekday()) if period == 'week' else day
+    
+    @classmethod
+    def _stats_events(cls, generation: dict, refined_at: list = (), reused_at: list = ()) -> list:
+        """
+        Get the (action, timestamp) pairs a generation contributes to the stats.
+        
+        refined_at holds the creation times of its stored versions and
+        reused_at the times it answered a later prompt; older documents also
+        carry notes-only refinements in the document itself.
+        """
+        events = [(cls._history_metadata(generation)['action_type'], generation['created_at'])]
+        for refinement in generation.get('refinements') or []:
+            if refinement.get('timestamp'):
+                events.append(('refine', refinement['timestamp']))
+        events += [('refine', timestamp) for timestamp in refined_at]
+        events += [('reuse', timestamp) for timestamp in reused_at]
+        return events
+    
+    @classmethod
+    def _record_stats(cls, user_id: str, language: str, events: list,
+                      generated: int = 0, sign: int = 1):
+        """
+        Apply one write to the user's running totals and usage rollups.
+        
+        Totals are incremented in place, so they never race with a rebuild
+        that replaces them; the rollups go through the write-behind buffer
+        (failed flushes are logged and left for rebuild_user_stats to repair).
+        """
+        language = language or 'unknown'
+        increments = {}
+        if generated:
+            increments['total_generations'] = generated
+            increments[f'languages.{language}'] = generated
+        
+        buckets = {}
+        for action, timestamp in events:
+            increments[f'actions.{action}'] = increments.get(f'actions.{action}', 0) + sign
+            for period in ROLLUP_PERIODS:
+                key = (period, cls._bucket_start(timestamp, period))
+                buckets.setdefault(key, {})
+                field = f'counts.{language}.{action}'
+                buckets[key][field] = buckets[key].get(field, 0) + sign
+        
+        update = {'$set': {'updated_at': datetime.utcnow()}}
+        if increments:
+            update['$inc'] = increments
+        cls.get_db().user_stats.update_one({'_id': ObjectId(user_id)}, update, upsert=True)
+        for (period, bucket), counts in buckets.items():
+            WriteBehindBuffer.update('user_stats_rollups',
+                                     {'user_id': ObjectId(user_id), 'period': period, 'bucket': bucket},
+                                     inc_fields=counts, upsert=True)
+    
+    @classmethod
+    def rebuild_user_stats(cls, user_id: str) -> dict:
+        """
+        Rebuild a user's totals and usage rollups from code_generations.
+        
+        Used on the first stats read of users without a rebuilt document and
+        by repair_user_stats.py to correct any drift.
+        """
+        db = cls.get_db()
+        owner = ObjectId(user_id)
+        # This user's pending rollup increments would otherwise land on top of the rebuilt buckets
+        WriteBehindBuffer.flush(
+            lambda collection, query: collection == 'user_stats_rollups' and query.get('user_id') == owner
+        )
+        
+        languages, actions, rollups = {}, {}, {}
+        
+        def count(language, action, timestamp):
+            actions[action] = actions.get(action, 0) + 1
+            for period in ROLLUP_PERIODS:
+                bucket = rollups.setdefault((period, cls._bucket_start(timestamp, period)), {})
+                bucket.setdefault(language, {})
+                bucket[language][action] = bucket[language].get(action, 0) + 1
+        
+        refined_at = {}
+        for version in db.generation_versions.find({'user_id': owner, 'version': {'$gt': 0}},
+                                                   {'generation_id': 1, 'created_at': 1}):
+            refined_at.setdefault(version['generation_id'], []).append(version['created_at'])
+        
+        reused_at = {}
+        for reuse in db.generation_reuses.find({'user_id': owner}, {'generation_id': 1, 'created_at': 1}):
+            reused_at.setdefault(reuse['generation_id'], []).append(reuse['created_at'])
+        
+        generations = db.code_generations.find(
+            {'user_id': owner},
+            {'language': 1, 'prompt': 1, 'created_at': 1, 'translated_from': 1,
+             'history': 1, 'refinements.timestamp': 1}
+        )
+        total = 0
+        for generation in generations:
+            language = generation.get('language') or 'unknown'
+            total += 1
+            languages[language] = languages.get(language, 0) + 1
+            for action, timestamp in cls._stats_events(generation, refined_at.get(generation['_id'], []),
+                                                       reused_at.get(generation['_id'], [])):
+                count(language, action, timestamp)
+        
+        now = datetime.utcnow()
+        stats = {
+            'total_generations': total,
+            'languages': languages,
+            'actions': actions,
+            'updated_at': now,
+            'rebuilt_at': now
+        }
+        db.user_stats.replace_one({'_id': owner}, stats, upsert=True)
+        
+        db.user_stats_rollups.delete_many({'user_id': owner})
+        if rollups:
+            db.user_stats_rollups.insert_many([
+                {'user_id': owner, 'period': period, 'bucket': bucket, 'counts': counts}
+                for (period, bucket), counts in rollups.items()
+            ])
+        
+        return stats
+    
     @classmethod
     def get_user_stats(cls, user_id: str) -> dict:
-        """Get user's usage statistics."""
+        """
+        Get user's usage statistics (one document read).
+        
+        Counters still in the write-behind buffer (at most WRITE_BEHIND_INTERVAL
+        old) are not included yet.
+        """
         db = cls.get_db()
         
-        total_generations = db.code_generations.count_documents({'user_id': ObjectId(user_id)})
+        stats = db.user_stats.find_one({'_id': ObjectId(user_id)})
+        if not stats or 'rebuilt_at' not in stats:
+            # Users whose totals were never built from their existing generations
+            stats = cls.rebuild_user_stats(user_id)
         
-        # Get language distribution
-        pipeline = [
-            {'$match': {'user_id': ObjectId(user_id)}},
-            {'$group': {'_id': '$language', 'count': {'$sum': 1}}},
-            {'$sort': {'count': -1}}
-        ]
-        language_stats = list(db.code_generations.aggregate(pipeline))
+        language_stats = sorted(
+            ({'_id': language, 'count': n} for language, n in stats.get('languages', {}).items() if n > 0),
+            key=lambda item: item['count'],
+            reverse=True
+        )
         
         return {
-            'total_generations': total_generations,
-            'language_distribution': language_stats
+            'total_generations': stats.get('total_generations', 0),
+            'language_distribution': language_stats,
+            'actions': {action: n for action, n in stats.get('actions', {}).items() if n > 0}
         }
     
+    @classmethod
+    def get_usage_rollups(cls, user_id: str, period: str = 'day', limit: int = 30) -> list:
+        """
+        Get the user's most recent usage buckets, oldest first.
+        
+        Each bucket has its start, the total and per-action counts, and the
+        per-language breakdown of actions.
+        """
+        db = cls.get_db()
+        
+        if not db.user_stats.find_one({'_id': ObjectId(user_id), 'rebuilt_at': {'$exists': True}}, {'_id': 1}):
+            cls.rebuild_user_stats(user_id)
+        
+        buckets = list(db.user_stats_rollups.find(
+            {'user_id': ObjectId(user_id), 'period': period},
+            {'_id': 0, 'bucket': 1, 'counts': 1}
+        ).sort('bucket', -1).limit(min(limit, MAX_ROLLUP_BUCKETS)))
+        
+        series = []
+        for item in reversed(buckets):
+            actions, languages = {}, {}
+            for language, counts in item.get('counts', {}).items():
+                for action, n in counts.items():
+                    if n > 0:
+                        actions[action] = actions.get(action, 0) + n
+                        languages.setdefault(language, {})[action] = n
+            if actions:
+                series.append({
+                    'bucket': item['bucket'],
+                    'total': sum(actions.values()),
+                    'actions': actions,
+                    'languages': languages
+                })
+        return series
+    
     # Update generation code (for refinement)
     @classmethod
     def update_generation_code(cls, generation_id: str, user_id: str, 
                                new_code: str, refinement_note: str = '') -> bool:
-        """Update a generation's code after refinement."""
+        """
+        Update a generation's code after refinement.
+        
+        The generation keeps only the current code and version number; the
+        refinement is stored in generation_versions as a delta against the
+        previous version (the code before the first refinement becomes
+        version 0).
+        
+        The version record is written first (its unique index claims the
+        version number) and the generation is then moved to that version only
+        if no other refinement got there first, so a generation never points
+        at a version that was not stored.
+        """
         db = cls.get_db()
+        timestamp = datetime.utcnow()
+        owner_query = {'_id': ObjectId(generation_id), 'user_id': ObjectId(user_id)}
+        code_ref = BlobStore.put(db, new_code)
         
-        result = db.code_generations.update_one(
-            {'_id': ObjectId(generation_id), 'user_id': ObjectId(user_id)},
-            {
-                '$set': {'generated_code': new_code},
-                '$push': {
-                    'refinements': {
-                        'note': refinement_note,
-                        'timestamp': datetime.utcnow()
+        # Until the generation points at the new blob, any way out takes its reference back
+        try:
+            for _ in range(VERSION_WRITE_ATTEMPTS):
+                generation = db.code_generations.find_one(
+                    owner_query,
+                    {'user_id': 1, 'language': 1, 'generated_code': 1, 'code_ref': 1, 'version': 1, 'created_at': 1}
+                )
+                if not generation:
+                    break
+                
+                previous_ref = generation.get('code_ref')
+                parent_code = cls._resolve_bodies([generation])[0].get('generated_code', '')
+                current = generation.get('version', 0)
+                version = current + 1
+                versions = []
+                if version == 1:
+                    versions.append(cls._version_doc(generation, 0, parent_code, None, None, generation['created_at']))
+                versions.append(cls._version_doc(generation, version, new_code, parent_code, refinement_note, timestamp))
+                
+                if not cls._claim_version(db, versions):
+                    time.sleep(0.05)
+                    continue
+                
+                result = db.code_generations.update_one(
+                    dict(owner_query, version=current if current else {'$in': [0, None]}),
+                    {
+                        '$set': {'code_ref': code_ref,
+                                 'code_size': len(new_code),
+                                 'code_identifiers': cls.extract_code_identifiers(new_code),
+                                 'code_bands': SimilarityService.code_bands(new_code),
+                                 'updated_at': timestamp},
+                        '$unset': {'generated_code': ''},
+                        '$inc': {'version': 1}
                     }
-                }
+                )
+                if result.matched_count:
+                    break
+                
+                # Deleted or changed since it was read: take the claim back and start over
+                db.generation_versions.delete_many({'_id': {'$in': [doc['_id'] for doc in versions]}})
+            else:
+                raise RuntimeError(f'Could not store version of generation {generation_id}: concurrent refinements')
+        except Exception:
+            BlobStore.release(db, [code_ref])
+            raise
+        
+        if not generation:
+            BlobStore.release(db, [code_ref])
+            return False
+        
+        BlobStore.release(db, [previous_ref])
+        cls._record_stats(user_id, generation.get('language'), [('refine', timestamp)])
+        return True
+    
+    @classmethod
+    def _claim_version(cls, db, versions: list) -> bool:
+        """
+        Insert a refinement's version records (version 0 may already exist).
+        
+        Returns False when the new version number is taken; a record that its
+        refinement abandoned more than VERSION_CLAIM_TIMEOUT seconds ago is
+        removed so the next attempt can take the number.
+        """
+        try:
+            db.generation_versions.insert_many(versions, ordered=False)
+            return True
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != 11000 for error in errors):
+                raise
+            claimed = versions[-1]
+            if not any(error['index'] == len(versions) - 1 for error in errors):
+                return True
+            db.generation_versions.delete_one({
+                'generation_id': claimed['generation_id'],
+                'version': claimed['version'],
+                'created_at': {'$lt': datetime.utcnow() - timedelta(seconds=VERSION_CLAIM_TIMEOUT)}
+            })
+            return False
+    
+    # Version Operations
+    @classmethod
+    def _version_doc(cls, generation: dict, version: int, code: str, parent_code: str,
+                     note: str, created_at: datetime) -> dict:
+        """Build a generation_versions document: a delta against the parent, or a full snapshot."""
+        doc = {
+            'generation_id': generation['_id'],
+            'user_id': generation['user_id'],
+            'version': version,
+            'note': note,
+            'code_size': len(code),
+            'created_at': created_at
+        }
+        delta = None
+        if parent_code is not None and version % VERSION_SNAPSHOT_INTERVAL:
+            delta = CodeDelta.diff(parent_code, code)
+        if delta is None or CodeDelta.size(delta) >= len(code):
+            doc.update(kind='snapshot', code=code)
+        else:
+            doc.update(kind='delta', delta=delta)
+        return doc
+    
+    @classmethod
+    def get_generation_versions(cls, generation_id: str, user_id: str) -> dict:
+        """
+        List a generation's versions, oldest first (without their code).
+        
+        Returns:
+            Dictionary with current_version and versions, or None if the
+            generation does not exist
+        """
+        db = cls.get_db()
+        
+        generation = db.code_generations.find_one(
+            {'_id': ObjectId(generation_id), 'user_id': ObjectId(user_id)},
+            {'version': 1, 'created_at': 1, 'code_size': 1, 'generated_code': 1}
+        )
+        if not generation:
+            return None
+        
+        versions = [{
+            'version': version['version'],
+            'note': version.get('note'),
+            'kind': version['kind'],
+            'code_size': version['code_size'],
+            'created_at': version['created_at']
+        } for version in db.generation_versions.find(
+            # Records above the current version belong to refinements still being saved
+            {'generation_id': generation['_id'], 'version': {'$lte': generation.get('version', 0)}},
+            {'version': 1, 'note': 1, 'kind': 1, 'code_size': 1, 'created_at': 1}
+        ).sort('version', 1)]
+        
+        if not versions:
+            # Never refined: the generation itself is version 0
+            versions = [{'version': 0, 'note': None, 'kind': 'snapshot',
+                         'code_size': generation.get('code_size', len(generation.get('generated_code', ''))),
+                         'created_at': generation['created_at']}]
+        
+        return {'current_version': generation.get('version', 0), 'versions': versions}
+    
+    @classmethod
+    def checkout_generation_version(cls, generation_id: str, user_id: str, version: int) -> dict:
+        """
+        Get the code of one version of a generation.
+        
+        The current version is read from the generation itself; older ones
+        are rebuilt from the nearest snapshot at or below them plus fewer
+        than VERSION_SNAPSHOT_INTERVAL deltas.
+        
+        Returns:
+            Dictionary with version, code, note and created_at, or None if
+            the generation or version does not exist
+        """
+        db = cls.get_db()
+        
+        generation = db.code_generations.find_one(
+            {'_id': ObjectId(generation_id), 'user_id': ObjectId(user_id)},
+            {'version': 1, 'created_at': 1, 'updated_at': 1, 'generated_code': 1, 'code_ref': 1, 'language': 1}
+        )
+        current = generation.get('version', 0) if generation else -1
+        if not 0 <= version <= current:
+            return None
+        
+        if version == current:
+            cls._resolve_bodies([generation])
+            stored = db.generation_versions.find_one(
+                {'generation_id': generation['_id'], 'version': version}, {'note': 1}) if version else None
+            return {
+                'version': version,
+                'current': True,
+                'language': generation.get('language'),
+                'code': generation.get('generated_code', ''),
+                'note': stored.get('note') if stored else None,
+                'created_at': generation.get('updated_at') or generation['created_at']
             }
+        
+        snapshot = db.generation_versions.find_one(
+            {'generation_id': generation['_id'], 'version': {'$lte': version}, 'kind': 'snapshot'},
+            sort=[('version', -1)]
         )
-        return result.modified_count > 0
+        if not snapshot:
+            return None
+        
+        code, target = snapshot['code'], snapshot
+        if snapshot['version'] < version:
+            deltas = list(db.generation_versions.find(
+                {'generation_id': generation['_id'], 'version': {'$gt': snapshot['version'], '$lte': version}}
+            ).sort('version', 1))
+            if [delta['version'] for delta in deltas] != list(range(snapshot['version'] + 1, version + 1)):
+                raise ValueError(f'Version history of {generation_id} is incomplete')
+            for delta in deltas:
+                code = delta['code'] if delta['kind'] == 'snapshot' else CodeDelta.apply(code, delta['delta'])
+            target = deltas[-1]
+        
+        return {
+            'version': version,
+            'current': False,
+            'language': generation.get('language'),
+            'code': code,
+            'note': target.get('note'),
+            'created_at': target['created_at']
+        }
     
     # Favorites Operations
     @classmethod
     def add_favorite(cls, user_id: str, generation_id: str, title: str,
                      language: str = '', prompt_preview: str = '') -> dict:
-        """Add a generation to user's favorites."""
+        """
+        Add a generation to user's favorites.
+        
+        One upsert against the unique (user_id, generation_id) index.
+        
+        Returns:
+            The new favorite, or None if the generation was already a favorite
+        """
         db = cls.get_db()
         
         favorite_doc = {
@@ -261,10 +1169,22 @@ class DatabaseService:
             'created_at': datetime.utcnow()
         }
         
-        result = db.favorites.insert_one(favorite_doc)
-        favorite_doc['_id'] = str(result.inserted_id)
+        try:
+            result = db.favorites.update_one(
+                {'user_id': favorite_doc['user_id'], 'generation_id': generation_id},
+                {'$setOnInsert': favorite_doc},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # A concurrent request inserted it first
+            return None
+        
+        if result.upserted_id is None:
+            return None
+        
+        favorite_doc['_id'] = str(result.upserted_id)
         favorite_doc['user_id'] = str(favorite_doc['user_id'])
-        favorite_doc['favorite_id'] = str(result.inserted_id)
+        favorite_doc['favorite_id'] = str(result.upserted_id)
         
         return favorite_doc
     
@@ -0,0 +1,173 @@
+"""
+Execution Cache - Deterministic Execution Result Cache
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+class ExecutionCache:
+    """
+    Bounded LRU cache of execution results with a TTL.
+
+    Results are served from the cache only when the caller marked the program
+    as deterministic, or when two real runs produced the same result.
+    """
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+    _toolchain_versions = {}  # (language, backend) -> version string
+
+    # Version probes for the local toolchains (the first that answers wins)
+    VERSION_COMMANDS = {
+        'python': [['python', '--version']],
+        'javascript': [['node', '--version']],
+        'typescript': [['npx', '--no-install', 'ts-node', '--version'], ['node', '--version']],
+        'java': [['javac', '-version'], ['java', '-version']],
+        'cpp': [['g++', '--version']],
+        'c': [['gcc', '--version']],
+        'csharp': [['dotnet', '--version']],
+        'ruby': [['ruby', '--version']],
+        'go': [['go', 'version']],
+        'php': [['php', '--version']],
+        'swift': [['swift', '--version']],
+        'kotlin': [['kotlinc', '-version']],
+        'rust': [['rustc', '--version']],
+    }
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Check whether result caching is enabled."""
+        return os.getenv('EXECUTION_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def get_max_entries(cls) -> int:
+        """Get the maximum number of cached results."""
+        return int(os.getenv('EXECUTION_CACHE_SIZE', 512))
+
+    @classmethod
+    def get_ttl_seconds(cls) -> int:
+        """Get how long a cached result stays valid."""
+        return int(os.getenv('EXECUTION_CACHE_TTL', 600))
+
+    @classmethod
+    def probe_toolchain_version(cls, language: str) -> str:
+        """Run the version probes of the local toolchain for a language."""
+        for command in cls.VERSION_COMMANDS.get(language, []):
+            try:
+                probe = subprocess.run(command, capture_output=True, text=True, timeout=15)
+            except (OSError, subprocess.TimeoutExpired):
+                continue
+            output = (probe.stdout or probe.stderr).strip()
+            if probe.returncode == 0 and output:
+                return output.splitlines()[0]
+        return 'unavailable'
+
+    @classmethod
+    def toolchain_version(cls, language: str, backend: str = 'local') -> str:
+        """
+        Get the toolchain version a backend runs a language with.
+
+        Local versions are probed on first use; other backends report theirs
+        through set_toolchain_version ('unknown' until they do).
+        """
+        if (language, backend) not in cls._toolchain_versions:
+            if backend != 'local':
+                return 'unknown'
+            cls._toolchain_versions[(language, backend)] = cls.probe_toolchain_version(language)
+        return cls._toolchain_versions[(language, backend)]
+
+    @classmethod
+    def set_toolchain_version(cls, language: str, backend: str, version: str):
+        """
+        Record the toolchain version a backend probe found.
+
+        Results keyed on a previous version no longer match and age out of the cache.
+        """
+        previous = cls._toolchain_versions.get((language, backend))
+        cls._toolchain_versions[(language, backend)] = version
+        if previous is not None and previous != version:
+            print(f"[ExecutionCache] {language} toolchain on {backend} changed: {previous} -> {version}")
+
+    @classmethod
+    def make_key(cls, code: str, language: str, stdin: Any = '', backend: str = 'local', **options) -> str:
+        """
+        Build the cache key from code, language, stdin, the backend and its
+        toolchain version, and run options (e.g. profile).
+        """
+        payload = json.dumps({
+            'code': code,
+            'language': language,
+            'stdin': stdin,
+            'backend': backend,
+            'toolchain': cls.toolchain_version(language, backend),
+            'options': options
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def get(cls, key: str) -> Optional[Dict[str, Any]]:
+        """Return a confirmed, unexpired result for the key, if any."""
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry['expires_at'] < time.time():
+                del cls._entries[key]
+                return None
+
+            if not entry['confirmed']:
+                return None
+
+            cls._entries.move_to_end(key)
+            return dict(entry['result'])
+
+    @classmethod
+    def put(cls, key: str, result: Dict[str, Any], deterministic: bool = False):
+        """
+        Record a result for the key.
+
+        Deterministic results are confirmed immediately; otherwise the entry is
+        confirmed once a second run returns the same output.
+        """
+        fingerprint = cls._fingerprint(result)
+
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry and entry['expires_at'] >= time.time() and not deterministic:
+                confirmed = entry['confirmed'] or entry['fingerprint'] == fingerprint
+            else:
+                confirmed = deterministic
+
+            cls._entries[key] = {
+                'result': dict(result),
+                'fingerprint': fingerprint,
+                'confirmed': confirmed,
+                'expires_at': time.time() + cls.get_ttl_seconds()
+            }
+            cls._entries.move_to_end(key)
+
+            while len(cls._entries) > cls.get_max_entries():
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        """Drop every cached result and memoized toolchain version."""
+        with cls._lock:
+            cls._entries.clear()
+        cls._toolchain_versions.clear()
+
+    @classmethod
+    def _fingerprint(cls, result: Dict[str, Any]) -> str:
+        """Hash the parts of a result that must match across runs (timings excluded)."""
+        if 'results' in result:
+            stable = [(c.get('verdict'), c.get('output'), c.get('error')) for c in result['results']]
+        else:
+            stable = (result.get('success'), result.get('output'), result.get('error'))
+        return hashlib.sha256(json.dumps(stable, sort_keys=True).encode('utf-8')).hexdigest()
@@ -0,0 +1,1518 @@
+"""
+Execution Service - Sandboxed Code Execution
+ Runs code locally or through the Judge0 API (local Docker instance)
+"""
+import subprocess
+import tempfile
+import os
+import re
+import sys
+import time
+import shutil
+import difflib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import requests
+from app.services.execution_cache import ExecutionCache
+from app.services.backend_router import BackendRouter
+from app.services.compiler_daemon import CompilerDaemon
+from app.services.typescript_transpiler import TypeScriptTranspiler
+from app.services.execution_spool import ExecutionSpool
+from app.services.python_profiler import PythonProfiler
+from app.services.sandbox import Sandbox
+from app.services.class_data_sharing import ClassDataSharing
+from app.services.precompiled_headers import PrecompiledHeaders
+
+
+# Judge0 API endpoint (local Docker instance)
+JUDGE0_API_URL = "http://localhost:2358"
+
+# Language mapping for Judge0 API (language name -> Judge0 language_id)
+JUDGE0_LANGUAGES = {
+    'python': 71,       # Python (3.8.1)
+    'javascript': 63,   # JavaScript (Node.js 12.14.0)
+    'typescript': 74,   # TypeScript (3.7.4)
+    'java': 62,         # Java (OpenJDK 13.0.1)
+    'cpp': 54,          # C++ (GCC 9.2.0)
+    'c': 50,            # C (GCC 9.2.0)
+    'csharp': 51,       # C# (Mono 6.6.0.161)
+    'ruby': 72,         # Ruby (2.7.0)
+    'go': 60,           # Go (1.13.5)
+    'php': 68,          # PHP (7.4.1)
+    'swift': 83,        # Swift (5.2.3)
+    'kotlin': 78,       # Kotlin (1.3.70)
+    'rust': 73,         # Rust (1.40.0)
+}
+
+# Supported languages for execution
+SUPPORTED_LANGUAGES = {
+    'python': {
+        'extension': '.py',
+        'requires': ['python'],  # Binaries needed to run locally
+        'command': ['python'],
+        'timeout': 10,
+        'compile': None
+    },
+    'javascript': {
+        'extension': '.js',
+        'requires': ['node'],
+        'command': ['node'],
+        'timeout': 10,
+        'compile': None
+    },
+    'typescript': {
+        'extension': '.ts',
+        'requires': ['npx'],
+        'command': ['npx', 'ts-node'],
+        'timeout': 15,
+        'compile': None
+    },
+    'java': {
+        'extension': '.java',
+        'requires': ['javac', 'java'],
+        'command': ['java'],
+        'timeout': 15,
+        'compile': ['javac'],
+        'class_based': True
+    },
+    'cpp': {
+        'extension': '.cpp',
+        'requires': ['g++'],
+        'command': None,  # Will be set after compilation
+        'timeout': 10,
+        'compile': ['g++', '-o'],
+        'compiled': True
+    },
+    'c': {
+        'extension': '.c',
+        'requires': ['gcc'],
+        'command': None,
+        'timeout': 10,
+        'compile': ['gcc', '-o'],
+        'compiled': True
+    },
+    'csharp': {
+        'extension': '.cs',
+        'requires': ['dotnet'],
+        'command': ['dotnet', 'script'],
+        'timeout': 15,
+        'compile': None,
+        'alt_command': ['csc']  # Alternative: compile with csc
+    },
+    'ruby': {
+        'extension': '.rb',
+        'requires': ['ruby'],
+        'command': ['ruby'],
+        'timeout': 10,
+        'compile': None
+    },
+    'go': {
+        'extension': '.go',
+        'requires': ['go'],
+        'command': ['go', 'run'],
+        'timeout': 15,
+        'compile': None
+    },
+    'php': {
+        'extension': '.php',
+        'requires': ['php'],
+        'command': ['php'],
+        'timeout': 10,
+        'compile': None
+    },
+    'swift': {
+        'extension': '.swift',
+        'requires': ['swift'],
+        'command': ['swift'],
+        'timeout': 15,
+        'compile': None
+    },
+    'kotlin': {
+        'extension': '.kt',
+        'requires': ['kotlin'],
+        'command': ['kotlin'],
+        'timeout': 20,
+        'compile': ['kotlinc', '-include-runtime', '-d'],
+        'jar_based': True
+    },
+    'rust': {
+        'extension': '.rs',
+        'requires': ['rustc'],
+        'command': None,
+        'timeout': 15,
+        'compile': ['rustc', '-o'],
+        'compiled': True
+    }
+}
+
+# Compile profiles per language: 'quick' favours compile latency, 'bench' favours run speed.
+#   flags        - extra compiler flags (also sent to Judge0 as compiler_options)
+#   fast_linker  - link with mold/lld/gold when one is installed
+#   jvm_options  - extra flags for launching the compiled program on the JVM
+COMPILE_PROFILES = {
+    'quick': {
+        'c': {'flags': ['-O0', '-g0'], 'fast_linker': True},
+        'cpp': {'flags': ['-O0', '-g0'], 'fast_linker': True},
+        'rust': {'flags': ['-C', 'opt-level=0', '-C', 'debuginfo=0'], 'fast_linker': True},
+        'java': {'jvm_options': ['-XX:TieredStopAtLevel=1', '-XX:+UseSerialGC']},
+        'kotlin': {'jvm_options': ['-XX:TieredStopAtLevel=1', '-XX:+UseSerialGC']},
+    },
+    'bench': {
+        'c': {'flags': ['-O2', '-march=native']},
+        'cpp': {'flags': ['-O2', '-march=native']},
+        'rust': {'flags': ['-C', 'opt-level=3', '-C', 'target-cpu=native']},
+        'java': {'jvm_options': []},
+        'kotlin': {'jvm_options': []},
+    }
+}
+
+DEFAULT_PROFILE = 'quick'
+
+# Fast linkers in order of preference (binary, gcc -fuse-ld value)
+FAST_LINKERS = [('mold', 'mold'), ('ld.lld', 'lld'), ('ld.gold', 'gold')]
+
+# Languages that should use Judge0 API when no local sandbox is available
+# (compiled languages or those without local runtime)
+JUDGE0_FIRST_LANGUAGES = ['java', 'cpp', 'c', 'csharp', 'ruby', 'go', 'php', 'swift', 'kotlin', 'rust']
+
+# Execution backends
+BACKEND_LOCAL = 'local'
+BACKEND_JUDGE0 = 'judge0'
+
+# Concurrent local runs before further requests overflow to Judge0
+LOCAL_MAX_CONCURRENCY = int(os.getenv('LOCAL_MAX_CONCURRENCY', os.cpu_count() or 4))
+
+# Seconds between backend capability probes (0 = probe once at startup)
+BACKEND_PROBE_INTERVAL = int(os.getenv('BACKEND_PROBE_INTERVAL', 300))
+
+# Security checks - block dangerous operations per language
+DANGEROUS_PATTERNS = {
+    'common': [
+        'rm -rf', 'del /f', 'format c:', 'rmdir', 'deltree',
+        'shutdown', 'reboot', ':(){:|:&};:'  # Fork bomb
+    ],
+    'python': [
+        'import os', 'import subprocess', 'import sys',
+        'eval(', 'exec(', '__import__', 'compile(',
+        'socket', 'requests.', 'urllib', 'http.client',
+        'open(', 'with open', 'os.system', 'os.popen',
+        'pty.', 'fcntl.'
+    ],
+    'javascript': [
+        'require("child_process")', 'require("fs")',
+        'require(\'child_process\')', 'require(\'fs\')',
+        'process.exit', 'process.env', 'process.kill',
+        'spawn(', 'exec(', 'execSync', 'execFile',
+        'fs.writeFile', 'fs.unlink', 'fs.rmdir'
+    ],
+    'typescript': [
+        'require("child_process")', 'require("fs")',
+        'require(\'child_process\')', 'require(\'fs\')',
+        'process.exit', 'process.env', 'process.kill',
+        'spawn(', 'exec(', 'execSync', 'execFile'
+    ],
+    'java': [
+        'Runtime.getRuntime().exec', 'ProcessBuilder',
+        'System.exit', 'FileWriter', 'FileOutputStream',
+        'FileInputStream', 'new File(', 'Files.delete',
+        'SecurityManager'
+    ],
+    'cpp': [
+        'system(', 'popen(', 'exec(', 'fork(',
+        'remove(', 'unlink(', 'fopen(', 'freopen(',
+        '#include <fstream>', '#include <cstdlib>',
+        'asm(', '__asm'
+    ],
+    'c': [
+        'system(', 'popen(', 'exec(', 'fork(',
+        'remove(', 'unlink(', 'fopen(', 'freopen(',
+        'asm(', '__asm'
+    ],
+    'csharp': [
+        'Process.Start', 'System.Diagnostics.Process',
+        'File.Delete', 'File.WriteAllText', 'FileStream',
+        'StreamWriter', 'Environment.Exit'
+    ],
+    'ruby': [
+        'system(', 'exec(', '`', '%x{', 'IO.popen',
+        'File.open', 'File.delete', 'FileUtils',
+        'Kernel.exit', 'Process.kill'
+    ],
+    'go': [
+        'os/exec', 'os.Remove', 'os.Exit',
+        'syscall.', 'os.OpenFile'
+    ],
+    'php': [
+        'exec(', 'shell_exec', 'system(', 'passthru(',
+        'popen(', 'proc_open', 'pcntl_exec',
+        'file_put_contents', 'unlink(', 'rmdir('
+    ],
+    'swift': [
+        'Process()', 'FileManager', 'shell(',
+        'NSTask', 'exit('
+    ],
+    'kotlin': [
+        'Runtime.getRuntime().exec', 'ProcessBuilder',
+        'System.exit', 'File(', 'FileWriter'
+    ],
+    'rust': [
+        'std::process::Command', 'std::fs::remove',
+        'std::process::exit', 'std::fs::write'
+    ]
+}
+
+# Maximum output size (in characters)
+MAX_OUTPUT_SIZE = 50000
+
+# Maximum execution time (in seconds)
+MAX_EXECUTION_TIME = 10
+
+# Maximum number of test cases accepted in a single request
+MAX_TEST_CASES = 50
+
+# Maximum number of lines returned in a test case diff snippet
+MAX_DIFF_LINES = 20
+
+# Judge0 batch polling settings
+JUDGE0_POLL_INTERVAL = 0.5
+JUDGE0_BATCH_TIMEOUT = 60
+
+# Submissions per Judge0 batch request (Judge0's MAX_SUBMISSION_BATCH_SIZE, 20 by default)
+JUDGE0_MAX_BATCH_SIZE = int(os.getenv('JUDGE0_MAX_BATCH_SIZE', 20))
+
+# Largest spooled stdin sent to Judge0 (it takes stdin inline in the JSON payload)
+JUDGE0_MAX_STDIN_BYTES = int(os.getenv('JUDGE0_MAX_STDIN_BYTES', 1024 * 1024))
+
+# Seconds between timeout/output-size checks of a spooled run
+SPOOL_POLL_INTERVAL = 0.02
+
+
+def run_with_timeout(process, timeout, stdin_input=''):
+    """Run process with timeout and return output."""
+    result = {'stdout': '', 'stderr': '', 'timed_out': False}
+
+    def target():
+        try:
+            # Pass stdin input to the process
+            stdout, stderr = process.communicate(input=stdin_input if stdin_input else None)
+            result['stdout'] = stdout
+            result['stderr'] = stderr
+        except Exception as e:
+            result['stderr'] = str(e)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join(timeout)
+
+    if thread.is_alive():
+        process.kill()
+        thread.join()
+        result['timed_out'] = True
+
+    return result
+
+
+def _normalize_output(text: str) -> str:
+    """Normalize program output for comparison (trailing whitespace and blank lines)."""
+    lines = [line.rstrip() for line in (text or '').replace('\r\n', '\n').split('\n')]
+    while lines and not lines[-1]:
+        lines.pop()
+    return '\n'.join(lines)
+
+
+def _diff_snippet(expected: str, actual: str) -> str:
+    """Build a short unified diff between expected and actual output."""
+    diff = list(difflib.unified_diff(
+        expected.split('\n'), actual.split('\n'),
+        fromfile='expected', tofile='actual', lineterm='', n=1
+    ))
+    if len(diff) > MAX_DIFF_LINES:
+        diff = diff[:MAX_DIFF_LINES] + ['...']
+    return '\n'.join(diff)
+
+
+class ExecutionService:
+    """Service class for compiling and running code in the sandbox."""
+
+    _pool = None
+    _pool_lock = threading.Lock()
+    _local_in_flight = 0
+    _local_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls) -> ThreadPoolExecutor:
+        """Get the shared worker pool used for parallel local runs."""
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    workers = int(os.getenv('EXECUTION_WORKERS', os.cpu_count() or 4))
+                    cls._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='execute')
+        return cls._pool
+
+    @classmethod
+    def find_dangerous_pattern(cls, code: str, language: str) -> Optional[str]:
+        """Return the first dangerous pattern found in the code, if any."""
+        patterns_to_check = DANGEROUS_PATTERNS.get('common', []) + DANGEROUS_PATTERNS.get(language, [])
+
+        code_lower = code.lower()
+        for pattern in patterns_to_check:
+            if pattern.lower() in code_lower:
+                return pattern
+        return None
+
+    # Judge0 Operations
+    @classmethod
+    def execute_with_judge0(cls, code: str, language: str, stdin: str = '',
+                            profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """Execute code using Judge0 API (local Docker instance)."""
+        if language not in JUDGE0_LANGUAGES:
+            return None, f'Language {language} not supported by Judge0 API'
+
+        language_id = JUDGE0_LANGUAGES[language]
+
+        payload = {
+            'language_id': language_id,
+            'source_code': code,
+            'stdin': stdin or ''
+        }
+        compiler_options = cls.compile_flags(language, profile, local=False)
+        if compiler_options:
+            payload['compiler_options'] = ' '.join(compiler_options)
+
+        try:
+            print(f"[Judge0] Executing {language} code (language_id={language_id})...")
+
+            response = requests.post(
+                f"{JUDGE0_API_URL}/submissions/?base64_encoded=false&wait=true",
+                json=payload,
+                timeout=60,
+                headers={'Content-Type': 'application/json'}
+            )
+
+            print(f"[Judge0] Response status: {response.status_code}")
+
+            if response.status_code in (200, 201):
+                result = response.json()
+                print(f"[Judge0] Result: {result}")
+
+                status = result.get('status', {})
+                status_id = status.get('id', 0)
+                stdout = result.get('stdout') or ''
+                stderr = result.get('stderr') or ''
+                compile_output = result.get('compile_output') or ''
+                execution_time = float(result.get('time') or 0)
+
+                # Status 6 = Compilation Error
+                if status_id == 6:
+                    return {
+                        'success': False,
+                        'output': '',
+                        'error': f"Compilation error:\n{compile_output}" if compile_output else "Compilation failed",
+                        'execution_time': execution_time
+                    }, None
+
+                # Status 5 = Time Limit Exceeded
+                if status_id == 5:
+                    return {
+                        'success': False,
+                        'output': stdout[:MAX_OUTPUT_SIZE],
+                        'error': 'Execution timed out',
+                        'execution_time': execution_time
+                    }, None
+
+                # Status 13 = Internal Error (sandbox/isolate failure)
+                if status_id == 13:
+                    message = result.get('message') or ''
+                    print(f"[Judge0] Internal Error: {message}")
+                    return None, f'Judge0 sandbox error: {message}. The Judge0 sandbox (isolate) may not be configured correctly.'
+
+                # Status 3 = Accepted (successful execution)
+                # Status 4 = Wrong Answer (still ran successfully)
+                if status_id == 3:
+                    return {
+                        'success': True,
+                        'output': stdout[:MAX_OUTPUT_SIZE],
+                        'error': stderr[:MAX_OUTPUT_SIZE] if stderr else None,
+                        'execution_time': execution_time
+                    }, None
+
+                # Status 7-12 = Runtime errors
+                error_msg = stderr or compile_output or status.get('description', 'Execution failed')
+                return {
+                    'success': False,
+                    'output': stdout[:MAX_OUTPUT_SIZE],
+                    'error': error_msg[:MAX_OUTPUT_SIZE],
+                    'execution_time': execution_time
+                }, None
+            else:
+                print(f"[Judge0] Error response: {response.text}")
+                return None, f'Judge0 API error: {response.status_code}'
+
+        except requests.exceptions.Timeout:
+            print("[Judge0] Request timed out")
+            return None, 'Code execution timed out'
+        except requests.exceptions.RequestException as e:
+            return None, f'Judge0 API request failed: {str(e)}'
+
+    @classmethod
+    def execute_batch_with_judge0(cls, code: str, language: str, inputs: List[str],
+                                  profile: str = DEFAULT_PROFILE) -> Tuple[Optional[list], Optional[str]]:
+        """
+        Execute the same code against several inputs as Judge0 batch submissions.
+
+        Inputs are submitted in chunks of JUDGE0_MAX_BATCH_SIZE (Judge0 rejects
+        larger batches) and all chunks are polled until every run has finished.
+
+        Returns:
+            Tuple of (list of raw run dicts in input order, error message)
+        """
+        if language not in JUDGE0_LANGUAGES:
+            return None, f'Language {language} not supported by Judge0 API'
+
+        language_id = JUDGE0_LANGUAGES[language]
+        submission = {'language_id': language_id, 'source_code': code}
+        compiler_options = cls.compile_flags(language, profile, local=False)
+        if compiler_options:
+            submission['compiler_options'] = ' '.join(compiler_options)
+        chunks = [inputs[i:i + JUDGE0_MAX_BATCH_SIZE] for i in range(0, len(inputs), JUDGE0_MAX_BATCH_SIZE)]
+
+        try:
+            print(f"[Judge0] Submitting {len(inputs)} {language} runs in {len(chunks)} batches...")
+
+            tokens = []
+            for chunk in chunks:
+                response = requests.post(
+                    f"{JUDGE0_API_URL}/submissions/batch?base64_encoded=false",
+                    json={'submissions': [dict(submission, stdin=stdin or '') for stdin in chunk]},
+                    timeout=30,
+                    headers={'Content-Type': 'application/json'}
+                )
+
+                if response.status_code not in (200, 201):
+                    print(f"[Judge0] Batch error response: {response.text}")
+                    return None, f'Judge0 API error: {response.status_code}'
+
+                chunk_tokens = [item.get('token') for item in response.json()]
+                if len(chunk_tokens) != len(chunk) or not all(chunk_tokens):
+                    return None, 'Judge0 rejected one or more batch submissions'
+                tokens += chunk_tokens
+
+            # Poll until every submission has left the queue (1 = In Queue, 2 = Processing)
+            finished = {}
+            deadline = time.time() + JUDGE0_BATCH_TIMEOUT
+            while True:
+                pending = [token for token in tokens if token not in finished]
+                for i in range(0, len(pending), JUDGE0_MAX_BATCH_SIZE):
+                    chunk_tokens = pending[i:i + JUDGE0_MAX_BATCH_SIZE]
+                    poll = requests.get(
+                        f"{JUDGE0_API_URL}/submissions/batch",
+                        params={
+                            'tokens': ','.join(chunk_tokens),
+                            'base64_encoded': 'false',
+                            'fields': 'status,stdout,stderr,compile_output,message,time'
+                        },
+                        timeout=30
+                    )
+                    if poll.status_code != 200:
+                        return None, f'Judge0 API error: {poll.status_code}'
+
+                    # Submissions come back in the order of the requested tokens
+                    for token, result in zip(chunk_tokens, poll.json().get('submissions', [])):
+                        if (result.get('status') or {}).get('id', 0) not in (1, 2):
+                            finished[token] = result
+
+                if len(finished) == len(tokens):
+                    break
+                if time.time() > deadline:
+                    return None, 'Code execution timed out'
+                time.sleep(JUDGE0_POLL_INTERVAL)
+
+        except requests.exceptions.Timeout:
+            print("[Judge0] Batch request timed out")
+            return None, 'Code execution timed out'
+        except requests.exceptions.RequestException as e:
+            return None, f'Judge0 API request failed: {str(e)}'
+
+        submissions = [finished[token] for token in tokens]
+        runs = []
+        for submission in submissions:
+            status_id = (submission.get('status') or {}).get('id', 0)
+
+            # Status 13 = Internal Error (sandbox/isolate failure)
+            if status_id == 13:
+                message = submission.get('message') or ''
+                return None, f'Judge0 sandbox error: {message}. The Judge0 sandbox (isolate) may not be configured correctly.'
+
+            stdout = submission.get('stdout') or ''
+            stderr = submission.get('stderr') or ''
+            compile_output = submission.get('compile_output') or ''
+            runs.append({
+                'output': stdout[:MAX_OUTPUT_SIZE],
+                'error': (stderr or compile_output or None) if status_id != 3 else (stderr[:MAX_OUTPUT_SIZE] or None),
+                'execution_time': float(submission.get('time') or 0),
+                'timed_out': status_id == 5,
+                'compile_error': compile_output if status_id == 6 else None,
+                'exit_ok': status_id == 3
+            })
+
+        return runs, None
+
+    # Compile Profile Operations
+    @classmethod
+    def compile_flags(cls, language: str, profile: str = DEFAULT_PROFILE, local: bool = True) -> List[str]:
+        """
+        Get the compiler flags of a profile for a language.
+
+        Fast-linker flags are only added for local compiles, since the linker
+        has to be installed on the host doing the build.
+        """
+        settings = COMPILE_PROFILES[profile].get(language, {})
+        flags = list(settings.get('flags', []))
+
+        if local and settings.get('fast_linker'):
+            for binary, name in FAST_LINKERS:
+                if shutil.which(binary):
+                    flags += ['-C', f'link-arg=-fuse-ld={name}'] if language == 'rust' else [f'-fuse-ld={name}']
+                    break
+
+        return flags
+
+    @classmethod
+    def jvm_options(cls, language: str, profile: str = DEFAULT_PROFILE) -> List[str]:
+        """Get the JVM launch flags of a profile for a language."""
+        return list(COMPILE_PROFILES[profile].get(language, {}).get('jvm_options', []))
+
+    # Local Operations
+    @classmethod
+    def compile_program(cls, code: str, language: str, work_dir: str,
+                        profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+        """
+        Write the source into work_dir and compile it if the language needs it.
+
+        Raises FileNotFoundError when the local toolchain is missing and
+        subprocess.TimeoutExpired when compilation takes too long.
+
+        Returns:
+            Dictionary with success status, run command (or compile error), and compile time
+        """
+        lang_config = SUPPORTED_LANGUAGES[language]
+        start_time = time.time()
+
+        # Handle Java specially - needs class name to match filename
+        if language == 'java':
+            # Extract public class name from code
+            class_match = re.search(r'public\s+class\s+(\w+)', code)
+            if class_match:
+                class_name = class_match.group(1)
+            else:
+                class_name = 'Main'
+                # Wrap code in a Main class if no public class found
+                if 'class ' not in code:
+                    code = f'public class Main {{\n    public static void main(String[] args) {{\n        {code}\n    }}\n}}'
+
+            source_file = os.path.join(work_dir, f'{class_name}.java')
+            with open(source_file, 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            # Compile through the warm compiler daemon, falling back to javac
+            daemon_result = CompilerDaemon.compile('java', source_file, work_dir)
+            if daemon_result is not None:
+                returncode, diagnostics = daemon_result
+            else:
+                compile_process = subprocess.run(
+                    ['javac', source_file],
+                    capture_output=True,
+                    text=True,
+                    cwd=work_dir,
+                    timeout=30
+                )
+                returncode, diagnostics = compile_process.returncode, compile_process.stderr
+
+            if returncode != 0:
+                return {'success': False, 'error': f'Compilation error:\n{diagnostics}'}
+
+            command = ['java'] + ClassDataSharing.jvm_options() + cls.jvm_options(language, profile) + [
+                '-cp', work_dir, class_name
+            ]
+
+        # Handle Kotlin - compile through the daemon, or run as a kotlin script
+        elif language == 'kotlin':
+            source_file = os.path.join(work_dir, 'Main.kt')
+            with open(source_file, 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            stdlib = CompilerDaemon.kotlin_stdlib()
+            daemon_result = CompilerDaemon.compile('kotlin', source_file, work_dir) if stdlib else None
+            if daemon_result is not None:
+                returncode, diagnostics = daemon_result
+                if returncode != 0:
+                    return {'success': False, 'error': f'Compilation error:\n{diagnostics}'}
+
+                # Top-level main() in Main.kt compiles to class MainKt
+                main_class = 'MainKt' if re.search(r'^\s*fun\s+main\s*\(', code, re.MULTILINE) else 'Main'
+                command = ['java'] + ClassDataSharing.jvm_options() + cls.jvm_options(language, profile) + [
+                    '-cp', os.pathsep.join([work_dir, stdlib]), main_class
+                ]
+            else:
+                # The kotlin launcher hands -J options to the JVM it starts
+                command = ['kotlin'] + [f'-J{option}' for option in
+                                        ClassDataSharing.jvm_options() + cls.jvm_options(language, profile)] + [
+                    source_file
+                ]
+
+        # Handle compiled languages (C, C++, Rust)
+        elif lang_config.get('compiled'):
+            source_file = os.path.join(work_dir, 'main' + lang_config['extension'])
+            with open(source_file, 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            # Create output executable name
+            exe_suffix = '.exe' if sys.platform == 'win32' else ''
+            output_file = os.path.join(work_dir, 'main' + exe_suffix)
+
+            # Build compile command (C++ picks up a precompiled header when its includes match)
+            flags = cls.compile_flags(language, profile)
+            compile_cmd = lang_config['compile'][:1] + flags + lang_config['compile'][1:] + [output_file, source_file]
+            if language == 'cpp':
+                compile_cmd += PrecompiledHeaders.options_for(code, flags)
+
+            compile_process = subprocess.run(
+                compile_cmd,
+                capture_output=True,
+                text=True,
+                cwd=work_dir,
+                timeout=30
+            )
+
+            if compile_process.returncode != 0:
+                return {'success': False, 'error': f'Compilation error:\n{compile_process.stderr}'}
+
+            command = [output_file]
+
+        # Handle TypeScript - transpile through the warm worker and run on node
+        elif language == 'typescript':
+            transpiled = TypeScriptTranspiler.transpile(code)
+            if transpiled is not None:
+                if transpiled['errors']:
+                    return {'success': False, 'error': 'Compilation error:\n' + '\n'.join(transpiled['errors'])}
+
+                source_file = os.path.join(work_dir, 'main.js')
+                with open(source_file, 'w', encoding='utf-8') as f:
+                    f.write(transpiled['output'])
+
+                command = ['node', source_file]
+            else:
+                source_file = os.path.join(work_dir, 'main' + lang_config['extension'])
+                with open(source_file, 'w', encoding='utf-8') as f:
+                    f.write(code)
+
+                command = lang_config['command'] + [source_file]
+
+        # Handle C# with dotnet-script
+        elif language == 'csharp':
+            source_file = os.path.join(work_dir, 'main.csx')
+            with open(source_file, 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            command = ['dotnet', 'script', source_file]
+
+        # Handle interpreted languages (Python, JS, Ruby, PHP, Go, Swift)
+        else:
+            source_file = os.path.join(work_dir, 'main' + lang_config['extension'])
+            with open(source_file, 'w', encoding='utf-8') as f:
+                f.write(code)
+
+            command = lang_config['command'] + [source_file]
+
+        return {
+            'success': True,
+            'command': command,
+            'compile_time': round(time.time() - start_time, 3)
+        }
+
+    @classmethod
+    def run_program(cls, command: list, stdin: str, timeout: int, work_dir: str) -> Dict[str, Any]:
+        """Run an already prepared command once and collect its output."""
+        start_time = time.time()
+        command, pass_fds = Sandbox.wrap(command, work_dir)
+
+        try:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                cwd=work_dir,
+                env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+                pass_fds=pass_fds
+            )
+        finally:
+            for fd in pass_fds:
+                os.close(fd)
+
+        result = run_with_timeout(process, timeout, stdin)
+
+        execution_time = time.time() - start_time
+
+        if result['timed_out']:
+            return {
+                'output': '',
+                'error': f'Execution timed out after {timeout} seconds',
+                'execution_time': timeout,
+                'timed_out': True,
+                'exit_ok': False
+            }
+
+        stdout = result['stdout'][:MAX_OUTPUT_SIZE] if result['stdout'] else ''
+        stderr = result['stderr'][:MAX_OUTPUT_SIZE] if result['stderr'] else ''
+
+        return {
+            'output': stdout,
+            'error': stderr or None,
+            'execution_time': round(execution_time, 3),
+            'timed_out': False,
+            'exit_ok': process.returncode == 0
+        }
+
+    @classmethod
+    def execute_locally(cls, code: str, language: str, stdin: str = '',
+                        profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+        """Compile and run code once on this host."""
+        lang_config = SUPPORTED_LANGUAGES[language]
+        work_dir = tempfile.mkdtemp(prefix='exec_')
+
+        try:
+            compiled = cls.compile_program(code, language, work_dir, profile)
+            if not compiled['success']:
+                return {
+                    'success': False,
+                    'output': '',
+                    'error': compiled['error'],
+                    'execution_time': 0
+                }
+
+            run = cls.run_program(compiled['command'], stdin, lang_config['timeout'], work_dir)
+
+            if run['timed_out']:
+                return {
+                    'success': False,
+                    'output': '',
+                    'error': run['error'],
+                    'execution_time': run['execution_time'],
+                    'compile_time': compiled['compile_time']
+                }
+
+            return {
+                'success': run['exit_ok'],
+                'output': run['output'],
+                'error': run['error'] if run['exit_ok'] else (run['error'] or 'Execution failed with non-zero exit code'),
+                'execution_time': run['execution_time'],
+                'compile_time': compiled['compile_time']
+            }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Spooled I/O Operations
+    @classmethod
+    def run_program_spooled(cls, command: list, stdin_path: Optional[str], stdout_path: str,
+                            timeout: int, work_dir: str) -> Dict[str, Any]:
+        """
+        Run an already prepared command with stdin read from a file and stdout
+        written to a size-bounded file, without buffering either in memory.
+        """
+        limit = ExecutionSpool.get_max_output_bytes()
+        stderr_path = os.path.join(work_dir, '.stderr')
+
+        start_time = time.time()
+        timed_out = False
+        # Hard cap on anything the program writes (including redirected stdout);
+        # the size check below still stops runs where no limit could be applied
+        command, pass_fds = Sandbox.wrap(command, work_dir, max_file_size=limit)
+
+        with open(stdin_path or os.devnull, 'rb') as stdin_file, \
+                open(stdout_path, 'wb') as stdout_file, \
+                open(stderr_path, 'wb') as stderr_file:
+            try:
+                process = subprocess.Popen(
+                    command,
+                    stdin=stdin_file,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    cwd=work_dir,
+                    env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+                    pass_fds=pass_fds
+                )
+            finally:
+                for fd in pass_fds:
+                    os.close(fd)
+
+            while True:
+                try:
+                    process.wait(timeout=SPOOL_POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+
+                if time.time() - start_time > timeout:
+                    timed_out = True
+                elif os.path.getsize(stdout_path) < limit:
+                    continue
+
+                process.kill()
+                process.wait()
+                break
+
+        execution_time = time.time() - start_time
+
+        if timed_out:
+            return {
+                'error': f'Execution timed out after {timeout} seconds',
+                'execution_time': timeout,
+                'timed_out': True,
+                'exit_ok': False,
+                'output_limit_exceeded': False
+            }
+
+        with open(stderr_path, 'rb') as f:
+            stderr = f.read(MAX_OUTPUT_SIZE).decode('utf-8', errors='replace')
+
+        return {
+            'error': stderr or None,
+            'execution_time': round(execution_time, 3),
+            'timed_out': False,
+            'exit_ok': process.returncode == 0,
+            'output_limit_exceeded': os.path.getsize(stdout_path) >= limit
+        }
+
+    @classmethod
+    def execute_locally_spooled(cls, code: str, language: str, stdin_path: Optional[str], output_path: str,
+                                profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+        """Compile and run code once on this host, spooling stdout to output_path."""
+        lang_config = SUPPORTED_LANGUAGES[language]
+        work_dir = tempfile.mkdtemp(prefix='exec_')
+
+        try:
+            compiled = cls.compile_program(code, language, work_dir, profile)
+            if not compiled['success']:
+                return {
+                    'success': False,
+                    'error': compiled['error'],
+                    'execution_time': 0
+                }
+
+            run = cls.run_program_spooled(compiled['command'], stdin_path, output_path,
+                                          lang_config['timeout'], work_dir)
+
+            if run['timed_out']:
+                return {
+                    'success': False,
+                    'error': run['error'],
+                    'execution_time': run['execution_time']
+                }
+
+            if run['output_limit_exceeded']:
+                return {
+                    'success': False,
+                    'error': f'Output exceeded the maximum size of {ExecutionSpool.get_max_output_bytes()} bytes',
+                    'execution_time': run['execution_time']
+                }
+
+            return {
+                'success': run['exit_ok'],
+                'error': run['error'] if run['exit_ok'] else (run['error'] or 'Execution failed with non-zero exit code'),
+                'execution_time': run['execution_time']
+            }
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @classmethod
+    def execute_spooled(cls, code: str, language: str, stdin_path: Optional[str], user_id: str,
+                        profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Execute code with file-backed stdin and stdout.
+
+        Spooled runs are not cached. The result carries head/tail excerpts of
+        the output and, when the excerpts do not hold all of it, a handle to
+        download the full output.
+
+        Args:
+            code: Source code to run
+            language: Execution language id
+            stdin_path: Spooled stdin file (None for empty input)
+            user_id: Owner of the download handle
+            profile: Compile profile ('quick' or 'bench')
+
+        Returns:
+            Tuple of (result dictionary, error message if no backend could run the code)
+        """
+        output_path = ExecutionSpool.create_output()
+
+        def run_locally():
+            try:
+                return cls.execute_locally_spooled(code, language, stdin_path, output_path, profile), None
+            except subprocess.TimeoutExpired:
+                return {
+                    'success': False,
+                    'error': 'Compilation timed out',
+                    'execution_time': 0
+                }, None
+
+        def run_with_judge0():
+            if stdin_path and os.path.getsize(stdin_path) > JUDGE0_MAX_STDIN_BYTES:
+                return None, f'Input larger than {JUDGE0_MAX_STDIN_BYTES} bytes cannot be sent to Judge0'
+
+            stdin = ''
+            if stdin_path:
+                with open(stdin_path, encoding='utf-8', errors='replace') as f:
+                    stdin = f.read()
+
+            result, error = cls.execute_with_judge0(code, language, stdin, profile)
+            if result is not None:
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(result.pop('output', ''))
+            return result, error
+
+        result, error = cls._route(language, profile, {
+            BACKEND_JUDGE0: run_with_judge0,
+            BACKEND_LOCAL: run_locally
+        })
+
+        if result is None:
+            ExecutionSpool.discard(output_path)
+            return None, error
+
+        excerpt = ExecutionSpool.excerpt(output_path)
+        result['output'] = excerpt['head']
+        result['output_tail'] = excerpt['tail']
+        result['output_bytes'] = excerpt['size']
+        result['output_truncated'] = excerpt['truncated']
+
+        if excerpt['tail'] is not None:
+            result['download_handle'] = ExecutionSpool.register_output(output_path, user_id)
+        else:
+            result['download_handle'] = None
+            ExecutionSpool.discard(output_path)
+
+        return result, None
+
+    # Cached Operations
+    @classmethod
+    def _is_cacheable(cls, result: Dict[str, Any]) -> bool:
+        """Timeouts depend on host load, so they are never cached."""
+        if 'results' in result:
+            return all(c['verdict'] != 'time_limit_exceeded' for c in result['results'])
+        error = result.get('error') or ''
+        return not (error.startswith('Execution timed out') or error.startswith('Compilation timed out'))
+
+    @classmethod
+    def _run_cached(cls, key_parts: dict, runner, deterministic: bool,
+                    no_cache: bool) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Serve a run from the result cache, or run it and record the result.
+
+        Results are keyed on the backend that produced them (and its toolchain
+        version), so a lookup checks the entry of every backend.
+        """
+        use_cache = not no_cache and ExecutionCache.is_enabled()
+
+        if use_cache:
+            for backend in (BACKEND_LOCAL, BACKEND_JUDGE0):
+                cached = ExecutionCache.get(ExecutionCache.make_key(backend=backend, **key_parts))
+                if cached is not None:
+                    cached['cached'] = True
+                    return cached, None
+
+        result, error = runner()
+
+        if result is not None:
+            result['cached'] = False
+            if use_cache and cls._is_cacheable(result):
+                key = ExecutionCache.make_key(backend=result['backend'], **key_parts)
+                ExecutionCache.put(key, result, deterministic=deterministic)
+
+        return result, error
+
+    @classmethod
+    def execute(cls, code: str, language: str, stdin: str = '', deterministic: bool = False,
+                no_cache: bool = False, profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Execute code once, serving repeats from the result cache.
+
+        Args:
+            code: Source code to run
+            language: Execution language id
+            stdin: Standard input for the program
+            deterministic: Cache the result on the first run instead of after two matching runs
+            no_cache: Bypass the result cache entirely
+            profile: Compile profile ('quick' or 'bench')
+
+        Returns:
+            Tuple of (result dictionary, error message if no backend could run the code)
+        """
+        return cls._run_cached(
+            {'code': code, 'language': language, 'stdin': stdin, 'profile': profile},
+            lambda: cls._execute_uncached(code, language, stdin, profile),
+            deterministic, no_cache
+        )
+
+    @classmethod
+    def _execute_uncached(cls, code: str, language: str, stdin: str = '',
+                          profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """Execute code once on the best available backend."""
+        def run_locally():
+            try:
+                return cls.execute_locally(code, language, stdin, profile), None
+            except subprocess.TimeoutExpired:
+                return {
+                    'success': False,
+                    'output': '',
+                    'error': 'Compilation timed out',
+                    'execution_time': 0
+                }, None
+
+        return cls._route(language, profile, {
+            BACKEND_JUDGE0: lambda: cls.execute_with_judge0(code, language, stdin, profile),
+            BACKEND_LOCAL: run_locally
+        })
+
+    @classmethod
+    def execute_profiled(cls, code: str, stdin: str = '', options: Optional[dict] = None,
+                         profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Execute Python code under cProfile (and optionally line tracing and
+        tracemalloc). Profiled runs are never cached.
+
+        Args:
+            code: Python source code to run
+            stdin: Standard input for the program
+            options: Normalized profiling options (see PythonProfiler.parse_options)
+            profile: Compile profile (unused by Python, kept for routing statistics)
+
+        Returns:
+            Tuple of (result dictionary with a 'profiling' report, error message)
+        """
+        options = options or PythonProfiler.parse_options(True)
+        # Stop one second before the sandbox timeout so the report is still written
+        harness, marker = PythonProfiler.build_harness(code, options, SUPPORTED_LANGUAGES['python']['timeout'] - 1)
+
+        result, error = cls._execute_uncached(harness, 'python', stdin, profile)
+        if result is None:
+            return None, error
+
+        program_error, report = PythonProfiler.extract_report(result.get('error'), marker)
+        if not result['success'] and not program_error:
+            program_error = 'Execution failed with non-zero exit code'
+        result['error'] = program_error
+        result['profiling'] = report
+        return result, None
+
+    @classmethod
+    def check_types(cls, code: str, language: str) -> Optional[List[str]]:
+        """
+        Type check source on request (runs skip type checking for speed).
+
+        Returns:
+            List of type errors, or None if the language has no type checker available
+        """
+        if language != 'typescript':
+            return None
+        return TypeScriptTranspiler.typecheck(code)
+
+    # Timing Series Operations
+    @classmethod
+    def _run_series_locally(cls, code: str, language: str, inputs: Sequence[str], repeats: int,
+                            time_budget: float, profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+        """
+        Compile once, then run the inputs one at a time (never in parallel, so
+        runs do not compete for CPU), stopping at the first failure or once the
+        time budget is spent.
+        """
+        lang_config = SUPPORTED_LANGUAGES[language]
+        work_dir = tempfile.mkdtemp(prefix='exec_')
+
+        try:
+            compiled = cls.compile_program(code, language, work_dir, profile)
+            if not compiled['success']:
+                return {'success': False, 'error': compiled['error'], 'compile_time': 0, 'runs': []}
+
+            deadline = time.time() + time_budget
+            runs = []
+            for index, stdin in enumerate(inputs):
+                times = []
+                for _ in range(repeats):
+                    run = cls.run_program(compiled['command'], stdin, lang_config['timeout'], work_dir)
+                    if run['timed_out'] or not run['exit_ok']:
+                        break
+                    times.append(run['execution_time'])
+
+                runs.append({
+                    'index': index,
+                    'input_bytes': len(stdin.encode('utf-8')),
+                    'execution_time': min(times) if len(times) == repeats else None,
+                    'times': times,
+                    'timed_out': run['timed_out'],
+                    'error': None if run['exit_ok'] else (run['error'] or 'Execution failed with non-zero exit code')
+                })
+                if runs[-1]['execution_time'] is None or time.time() > deadline:
+                    break
+
+            return {'success': True, 'error': None, 'compile_time': compiled['compile_time'], 'runs': runs}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @classmethod
+    def _run_series_with_judge0(cls, code: str, language: str, inputs: Sequence[str], repeats: int,
+                                profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Run each input `repeats` times as its own Judge0 batch (Judge0 reports
+        per-run CPU time), one input at a time, stopping at the first failure.
+        """
+        runs = []
+        for index, stdin in enumerate(inputs):
+            input_bytes = len(stdin.encode('utf-8'))
+            if input_bytes > JUDGE0_MAX_STDIN_BYTES:
+                error = f'Input larger than {JUDGE0_MAX_STDIN_BYTES} bytes cannot be sent to Judge0'
+                if not runs:
+                    return None, error
+                runs.append({'index': index, 'input_bytes': input_bytes, 'execution_time': None, 'times': [],
+                             'timed_out': False, 'error': error})
+                break
+
+            attempts, error = cls.execute_batch_with_judge0(code, language, [stdin] * repeats, profile)
+            if attempts is None:
+                return None, error
+
+            if not runs and attempts[0].get('compile_error') is not None:
+                message = attempts[0]['compile_error']
+                return {
+                    'success': False,
+                    'error': f"Compilation error:\n{message}" if message else 'Compilation failed',
+                    'compile_time': 0,
+                    'runs': []
+                }, None
+
+            failed = next((run for run in attempts if not run['exit_ok']), None)
+            runs.append({
+                'index': index,
+                'input_bytes': input_bytes,
+                'execution_time': min(run['execution_time'] for run in attempts) if failed is None else None,
+                'times': [run['execution_time'] for run in attempts],
+                'timed_out': failed is not None and failed['timed_out'],
+                'error': (failed['error'] or 'Execution failed') if failed is not None else None
+            })
+            if failed is not None:
+                break
+
+        return {'success': True, 'error': None, 'compile_time': 0, 'runs': runs}, None
+
+    @classmethod
+    def execute_series(cls, code: str, language: str, inputs: Sequence[str], repeats: int = 3,
+                       time_budget: float = 60,
+                       profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Time one program over a series of inputs under the usual per-run limits.
+
+        Each input is run `repeats` times and its fastest run kept. The series
+        stops at the first input that fails or times out. Inputs are read one
+        at a time, so they may be rendered lazily. Results are never cached.
+
+        Returns:
+            Tuple of (dictionary with compile_time and per-input 'runs', error message)
+        """
+        def run_locally():
+            try:
+                return cls._run_series_locally(code, language, inputs, repeats, time_budget, profile), None
+            except subprocess.TimeoutExpired:
+                return {'success': False, 'error': 'Compilation timed out', 'compile_time': 0, 'runs': []}, None
+
+        return cls._route(language, profile, {
+            BACKEND_JUDGE0: lambda: cls._run_series_with_judge0(code, language, inputs, repeats, profile),
+            BACKEND_LOCAL: run_locally
+        })
+
+    # Backend Routing Operations
+    @classmethod
+    def default_backend_order(cls, language: str) -> List[str]:
+        """
+        Get the static backend preference for a language.
+
+        With a working local sandbox every language runs locally first and
+        Judge0 is only the overflow/fallback backend.
+        """
+        if language in JUDGE0_FIRST_LANGUAGES and not Sandbox.is_available():
+            return [BACKEND_JUDGE0, BACKEND_LOCAL]
+        return [BACKEND_LOCAL, BACKEND_JUDGE0]
+
+    @classmethod
+    def _backend_order(cls, language: str) -> List[str]:
+        """Get the routing order, sending work to Judge0 while local runs are saturated."""
+        order = BackendRouter.choose(language, cls.default_backend_order(language))
+        with cls._local_lock:
+            saturated = cls._local_in_flight >= LOCAL_MAX_CONCURRENCY
+        if saturated and order[:1] == [BACKEND_LOCAL] and BACKEND_JUDGE0 in order:
+            return [BACKEND_JUDGE0] + [backend for backend in order if backend != BACKEND_JUDGE0]
+        return order
+
+    @classmethod
+    def _route(cls, language: str, profile: str, runners: dict) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Try each backend in routing order until one produces a result.
+
+        Every attempt feeds the router's latency and error statistics; a missing
+        local toolchain marks the local backend unavailable until the next probe.
+        """
+        errors = []
+
+        for backend in cls._backend_order(language):
+            start_time = time.time()
+            if backend == BACKEND_LOCAL:
+                with cls._local_lock:
+                    cls._local_in_flight += 1
+            try:
+                result, error = runners[backend]()
+            except FileNotFoundError:
+                BackendRouter.set_availability(language, backend, False, 'toolchain not found')
+                result, error = None, f'Runtime for {language} is not available locally'
+            finally:
+                if backend == BACKEND_LOCAL:
+                    with cls._local_lock:
+                        cls._local_in_flight -= 1
+
+            BackendRouter.record(language, backend, time.time() - start_time, result is not None)
+
+            if result is not None:
+                result['backend'] = backend
+                result['profile'] = profile
+                return result, None
+
+            print(f"{backend} backend failed for {language}: {error}")
+            errors.append(f'{backend}: {error}')
+
+        return None, f'No execution backend could run {language} code. Errors: {"; ".join(errors)}'
+
+    @classmethod
+    def probe_backends(cls):
+        """Probe local toolchains and Judge0 and feed the results to the router."""
+        # Decides whether compiled languages can run locally
+        Sandbox.probe()
+
+        # Toolchain versions are re-read on every probe, so cached results of an upgraded toolchain stop matching
+        for language, config in SUPPORTED_LANGUAGES.items():
+            missing = [binary for binary in config['requires'] if shutil.which(binary) is None]
+            BackendRouter.set_availability(
+                language, BACKEND_LOCAL, not missing,
+                f'missing {", ".join(missing)}' if missing else 'toolchain found'
+            )
+            ExecutionCache.set_toolchain_version(
+                language, BACKEND_LOCAL, 'unavailable' if missing else ExecutionCache.probe_toolchain_version(language)
+            )
+
+        try:
+            response = requests.get(f"{JUDGE0_API_URL}/languages", timeout=5)
+            judge0_names = {item.get('id'): item.get('name') for item in response.json()} \
+                if response.status_code == 200 else {}
+            judge0_detail = 'language not installed' if response.status_code == 200 else f'HTTP {response.status_code}'
+        except (requests.exceptions.RequestException, ValueError) as e:
+            judge0_names = {}
+            judge0_detail = f'unreachable: {str(e)[:100]}'
+
+        for language in SUPPORTED_LANGUAGES:
+            language_id = JUDGE0_LANGUAGES.get(language)
+            available = language_id in judge0_names
+            BackendRouter.set_availability(
+                language, BACKEND_JUDGE0, available,
+                f'language_id={language_id}' if available else judge0_detail
+            )
+            if available:
+                # e.g. "Python (3.8.1)"; the id alone does not change when Judge0 is upgraded
+                ExecutionCache.set_toolchain_version(language, BACKEND_JUDGE0,
+                                                     f'{language_id}:{judge0_names[language_id]}')
+
+        # Precompile the common STL include sets
+        if BackendRouter.get_availability('cpp', BACKEND_LOCAL):
+            PrecompiledHeaders.prebuild_common(cls.compile_flags('cpp', DEFAULT_PROFILE))
+
+        # Keep the JDK class archive current and the JVM compiler daemon warm
+        if BackendRouter.get_availability('java', BACKEND_LOCAL):
+            ClassDataSharing.ensure_archive()
+            CompilerDaemon.ensure_running(health_check=True)
+
+        # Start the TypeScript transpile worker ahead of the first submission
+        if BackendRouter.get_availability('typescript', BACKEND_LOCAL):
+            TypeScriptTranspiler.transpile('')
+
+    @classmethod
+    def start_backend_probing(cls):
+        """Probe backends at startup and periodically afterwards."""
+        BackendRouter.start_probing(cls.probe_backends, BACKEND_PROBE_INTERVAL)
+
+    @classmethod
+    def get_backend_status(cls) -> Dict[str, Any]:
+        """Get the current per-language routing table and statistics."""
+        status = BackendRouter.snapshot(
+            {language: cls.default_backend_order(language) for language in SUPPORTED_LANGUAGES}
+        )
+        status['compiler_daemon'] = CompilerDaemon.status()
+        status['class_data_sharing'] = ClassDataSharing.status()
+        status['precompiled_headers'] = PrecompiledHeaders.status()
+        status['typescript_transpiler'] = TypeScriptTranspiler.status()
+        status['sandbox'] = dict(Sandbox.status(), local_in_flight=cls._local_in_flight,
+                                 local_max_concurrency=LOCAL_MAX_CONCURRENCY)
+        return status
+
+    # Multi Test Case Operations
+    @classmethod
+    def _case_result(cls, index: int, run: dict, expected: Optional[str]) -> Dict[str, Any]:
+        """Turn a raw run into a per-case verdict."""
+        case = {
+            'index': index,
+            'output': run['output'],
+            'error': run['error'],
+            'execution_time': run['execution_time'],
+            'passed': None,
+            'diff': None
+        }
+
+        if run.get('compile_error') is not None:
+            case['verdict'] = 'compilation_error'
+            case['passed'] = False
+        elif run['timed_out']:
+            case['verdict'] = 'time_limit_exceeded'
+            case['passed'] = False
+        elif not run['exit_ok']:
+            case['verdict'] = 'runtime_error'
+            case['passed'] = False
+            case['error'] = run['error'] or 'Execution failed with non-zero exit code'
+        elif expected is None:
+            case['verdict'] = 'completed'
+        else:
+            expected_norm = _normalize_output(expected)
+            actual_norm = _normalize_output(run['output'])
+            case['passed'] = expected_norm == actual_norm
+            case['verdict'] = 'accepted' if case['passed'] else 'wrong_answer'
+            if not case['passed']:
+                case['diff'] = _diff_snippet(expected_norm, actual_norm)
+
+        if expected is not None:
+            case['expected_output'] = expected
+
+        return case
+
+    @classmethod
+    def _summarize_cases(cls, cases: list, backend: str, compile_time: float = 0) -> Dict[str, Any]:
+        """Build the response body for a multi test case run."""
+        passed = sum(1 for c in cases if c['passed'] is True)
+        failed = sum(1 for c in cases if c['passed'] is False)
+
+        return {
+            'success': failed == 0,
+            'backend': backend,
+            'compile_time': compile_time,
+            'total_time': round(sum(c['execution_time'] for c in cases), 3),
+            'summary': {
+                'total': len(cases),
+                'passed': passed,
+                'failed': failed,
+                'unchecked': len(cases) - passed - failed
+            },
+            'results': cases
+        }
+
+    @classmethod
+    def _compile_failure_cases(cls, test_cases: list, error: str) -> Dict[str, Any]:
+        """Test-case response for a program that did not compile (every case fails)."""
+        run = {
+            'output': '', 'error': error, 'execution_time': 0,
+            'timed_out': False, 'compile_error': error, 'exit_ok': False
+        }
+        cases = [cls._case_result(i, run, tc.get('expected_output'))
+                 for i, tc in enumerate(test_cases)]
+        response = cls._summarize_cases(cases, 'local')
+        response['error'] = error
+        return response
+
+    @classmethod
+    def _run_cases_locally(cls, code: str, language: str, test_cases: list,
+                           profile: str = DEFAULT_PROFILE) -> Dict[str, Any]:
+        """Compile once, then run every test case in parallel on the local pool."""
+        lang_config = SUPPORTED_LANGUAGES[language]
+        work_dir = tempfile.mkdtemp(prefix='exec_')
+
+        try:
+            compiled = cls.compile_program(code, language, work_dir, profile)
+            if not compiled['success']:
+                return cls._compile_failure_cases(test_cases, compiled['error'])
+
+            pool = cls.get_pool()
+            futures = [
+                pool.submit(cls.run_program, compiled['command'], tc.get('input', ''),
+                            lang_config['timeout'], work_dir)
+                for tc in test_cases
+            ]
+            cases = [cls._case_result(i, future.result(), tc.get('expected_output'))
+                     for i, (future, tc) in enumerate(zip(futures, test_cases))]
+
+            return cls._summarize_cases(cases, 'local', compiled['compile_time'])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @classmethod
+    def _run_cases_with_judge0(cls, code: str, language: str, test_cases: list,
+                               profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """Run every test case as one Judge0 batch submission."""
+        runs, error = cls.execute_batch_with_judge0(
+            code, language, [tc.get('input', '') for tc in test_cases], profile
+        )
+        if runs is None:
+            return None, error
+
+        cases = [cls._case_result(i, run, tc.get('expected_output'))
+                 for i, (run, tc) in enumerate(zip(runs, test_cases))]
+        response = cls._summarize_cases(cases, 'judge0')
+
+        compile_errors = [run['compile_error'] for run in runs if run.get('compile_error') is not None]
+        if compile_errors:
+            response['error'] = f"Compilation error:\n{compile_errors[0]}" if compile_errors[0] else 'Compilation failed'
+
+        return response, None
+
+    @classmethod
+    def execute_test_cases(cls, code: str, language: str, test_cases: list, deterministic: bool = False,
+                           no_cache: bool = False,
+                           profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Compile code once and run it against several test cases.
+
+        Args:
+            code: Source code to run
+            language: Execution language id
+            test_cases: List of dicts with 'input' and optional 'expected_output'
+            deterministic: Cache the result on the first run instead of after two matching runs
+            no_cache: Bypass the result cache entirely
+            profile: Compile profile ('quick' or 'bench')
+
+        Returns:
+            Tuple of (response dictionary with per-case verdicts, error message)
+        """
+        return cls._run_cached(
+            {'code': code, 'language': language, 'stdin': test_cases, 'profile': profile},
+            lambda: cls._execute_test_cases_uncached(code, language, test_cases, profile),
+            deterministic, no_cache
+        )
+
+    @classmethod
+    def _execute_test_cases_uncached(cls, code: str, language: str, test_cases: list,
+                                     profile: str = DEFAULT_PROFILE) -> Tuple[Optional[dict], Optional[str]]:
+        """Run test cases on the best available backend."""
+        def run_locally():
+            try:
+                return cls._run_cases_locally(code, language, test_cases, profile), None
+            except subprocess.TimeoutExpired:
+                return cls._compile_failure_cases(test_cases, 'Compilation timed out'), None
+
+        return cls._route(language, profile, {
+            BACKEND_JUDGE0: lambda: cls._run_cases_with_judge0(code, language, test_cases, profile),
+            BACKEND_LOCAL: run_locally
+        })
@@ -0,0 +1,239 @@
+"""
+Execution Spool - Disk-Backed Program Input and Output
+"""
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+from flask import Request
+
+
+# Chunk size used when copying uploads to disk
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Room left for the code and other form fields next to a stdin upload
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+# Download handles are uuid4 hex strings
+HANDLE_PATTERN = re.compile(r'[0-9a-f]{32}')
+
+
+class ExecutionSpool:
+    """
+    Spools large program stdin and stdout to temporary files.
+
+    Uploaded input is written into the spool once, while the request is
+    parsed, and handed to the program as a file descriptor; output is written
+    straight to a size-bounded file and only head/tail excerpts are returned,
+    with a handle to download the rest.
+    """
+
+    @classmethod
+    def get_max_input_bytes(cls) -> int:
+        """Get the largest accepted stdin upload."""
+        return int(os.getenv('SPOOL_MAX_INPUT_BYTES', 64 * 1024 * 1024))
+
+    @classmethod
+    def get_max_request_bytes(cls) -> int:
+        """Get the largest accepted request body (a stdin upload plus the rest of the form)."""
+        return cls.get_max_input_bytes() + FORM_OVERHEAD_BYTES
+
+    @classmethod
+    def get_max_output_bytes(cls) -> int:
+        """Get the largest program output kept on disk before the run is stopped."""
+        return int(os.getenv('SPOOL_MAX_OUTPUT_BYTES', 64 * 1024 * 1024))
+
+    @classmethod
+    def get_excerpt_bytes(cls) -> int:
+        """Get the size of the head and tail excerpts returned inline."""
+        return int(os.getenv('SPOOL_EXCERPT_BYTES', 16 * 1024))
+
+    @classmethod
+    def get_ttl_seconds(cls) -> int:
+        """Get how long spooled output stays downloadable."""
+        return int(os.getenv('SPOOL_TTL', 600))
+
+    @classmethod
+    def _spool_dir(cls, kind: str) -> str:
+        """Get (and create) the directory spooled files of a kind are stored in."""
+        path = os.path.join(tempfile.gettempdir(), 'code_gen_spool', kind)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    # Input Operations
+    @classmethod
+    def upload_file(cls):
+        """Create the file an uploaded stream is parsed into (deleted when the request closes it)."""
+        return tempfile.NamedTemporaryFile('wb+', prefix='stdin_', dir=cls._spool_dir('input'))
+
+    @classmethod
+    def spool_input(cls, stream) -> Tuple[str, bool]:
+        """
+        Get a spool file holding an uploaded stream.
+
+        Uploads parsed by SpoolingRequest already are spool files and are used
+        in place; other streams are copied in chunks. Raises ValueError when
+        the upload exceeds the input limit.
+
+        Returns:
+            Tuple of (file path, whether the caller must discard the file)
+        """
+        limit = cls.get_max_input_bytes()
+
+        name = getattr(stream, 'name', None)
+        if isinstance(name, str) and os.path.dirname(name) == cls._spool_dir('input'):
+            stream.flush()
+            if os.fstat(stream.fileno()).st_size > limit:
+                raise ValueError(f'Input exceeds the maximum size of {limit} bytes')
+            return name, False
+
+        size = 0
+        fd, path = tempfile.mkstemp(prefix='stdin_', dir=cls._spool_dir('input'))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    size += len(chunk)
+                    if size > limit:
+                        raise ValueError(f'Input exceeds the maximum size of {limit} bytes')
+                    f.write(chunk)
+        except Exception:
+            cls.discard(path)
+            raise
+
+        return path, True
+
+    @classmethod
+    def spool_text(cls, text: str) -> str:
+        """Write a stdin string to a spool file and return its path."""
+        fd, path = tempfile.mkstemp(prefix='stdin_', dir=cls._spool_dir('input'))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text or '')
+        return path
+
+    @classmethod
+    def discard(cls, path: Optional[str]):
+        """Delete a spool file if it exists."""
+        if path:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    # Output Operations
+    @classmethod
+    def create_output(cls) -> str:
+        """Create an empty output spool file and return its path."""
+        fd, path = tempfile.mkstemp(prefix='stdout_', dir=cls._spool_dir('output'))
+        os.close(fd)
+        return path
+
+    @classmethod
+    def excerpt(cls, path: str) -> Dict[str, Any]:
+        """
+        Read head and tail excerpts of a spooled output file.
+
+        Returns:
+            Dictionary with head, tail (None when the head already holds everything),
+            total size in bytes and whether the excerpts omit part of the output
+        """
+        size = os.path.getsize(path)
+        excerpt_bytes = cls.get_excerpt_bytes()
+
+        with open(path, 'rb') as f:
+            head = f.read(excerpt_bytes)
+            tail = b''
+            if size > excerpt_bytes:
+                f.seek(max(excerpt_bytes, size - excerpt_bytes))
+                tail = f.read()
+
+        return {
+            'head': head.decode('utf-8', errors='replace'),
+            'tail': tail.decode('utf-8', errors='replace') if tail else None,
+            'size': size,
+            'truncated': size > 2 * excerpt_bytes
+        }
+
+    @classmethod
+    def register_output(cls, path: str, user_id: str) -> str:
+        """
+        Make a spooled output downloadable by its owner and return the handle.
+
+        The handle names the output file and an owner file next to it in the
+        output spool, so any worker process of the server can resolve it.
+        """
+        cls.cleanup_expired()
+
+        handle = uuid.uuid4().hex
+        directory = cls._spool_dir('output')
+        with open(os.path.join(directory, f'{handle}.owner'), 'w', encoding='utf-8') as f:
+            f.write(str(user_id))
+        os.replace(path, os.path.join(directory, f'{handle}.out'))
+        os.utime(os.path.join(directory, f'{handle}.out'))
+        return handle
+
+    @classmethod
+    def get_output(cls, handle: str, user_id: str) -> Optional[str]:
+        """Get the file path of a downloadable output, if it exists and belongs to the user."""
+        if not HANDLE_PATTERN.fullmatch(handle or ''):
+            return None
+
+        directory = cls._spool_dir('output')
+        path = os.path.join(directory, f'{handle}.out')
+        try:
+            with open(os.path.join(directory, f'{handle}.owner'), encoding='utf-8') as f:
+                owner = f.read()
+            expired = os.path.getmtime(path) < time.time() - cls.get_ttl_seconds()
+        except OSError:
+            return None
+
+        if owner != str(user_id) or expired:
+            return None
+        return path
+
+    @classmethod
+    def cleanup_expired(cls):
+        """Delete expired output files."""
+        cutoff = time.time() - cls.get_ttl_seconds()
+        directory = cls._spool_dir('output')
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if name.endswith(('.out', '.owner')) and os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+            except OSError:
+                pass
+
+    @classmethod
+    def sweep(cls):
+        """Delete spool files older than the TTL (left behind by earlier or crashed processes)."""
+        cutoff = time.time() - cls.get_ttl_seconds()
+        for kind in ('input', 'output'):
+            directory = cls._spool_dir(kind)
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                except OSError:
+                    pass
+
+    @classmethod
+    def clear(cls):
+        """Drop every spooled file."""
+        shutil.rmtree(os.path.join(tempfile.gettempdir(), 'code_gen_spool'), ignore_errors=True)
+
+
+class SpoolingRequest(Request):
+    """Request class that parses uploaded files directly into the input spool."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return ExecutionSpool.upload_file()
@@ -377,3 +377,88 @@ IMPORTANT:
                 'success': False,
                 'error': f'Failed to refine code: {error_message}'
             }
+    
+    @classmethod
+    def translate_code(cls, code: str, source_language: str, target_language: str,
+                       original_prompt: str = '') -> Dict[str, Any]:
+        """
+        Translate existing code into another language, keeping its behavior.
+        
+        Args:
+            code: The code to translate
+            source_language: Language of the code
+            target_language: Language to translate into
+            original_prompt: Original generation prompt
+            
+        Returns:
+            Dictionary containing success status, translated code, and explanation
+        """
+        cls.initialize()
+        
+        engineered_prompt = f"""You are an expert programming assistant translating code between languages.
+
+**Original Request**: {original_prompt}
+
+**Source Code** ({source_language}):
+```{source_language}
+{code}
+```
+
+Translate this program into {target_language}. Provide your response in EXACTLY this format:
+
+**CODE:**
+```{target_language}
+[Your complete translated code here]
+```
+
+**EXPLANATION:**
+[Briefly explain any language-specific differences in the translation.]
+
+IMPORTANT:
+1. Keep the same algorithm and time complexity - do not optimize or simplify it
+2. Read input from stdin in exactly the same format and print output in exactly the same format
+3. Use idiomatic {target_language} and only its standard library
+4. Use only single-line comments in the code
+5. For Java code, the main class MUST be named "Main" (capital M)
+6. Code must be complete, syntactically correct and runnable
+"""
+        
+        try:
+            response = cls._model.generate_content(engineered_prompt)
+            
+            if not response or not response.text:
+                return {
+                    'success': False,
+                    'error': 'Empty response received from AI service'
+                }
+            
+            parsed = cls._parse_response(response.text, target_language)
+            
+            if not parsed['code']:
+                return {
+                    'success': False,
+                    'error': 'No code found in the translation response'
+                }
+            
+            return {
+                'success': True,
+                'code': parsed['code'],
+                'explanation': parsed['explanation']
+            }
+            
+        except Exception as e:
+            error_message = str(e)
+            error_lower = error_message.lower()
+            
+            print(f"Gemini API Error (translate): {error_message}")
+            
+            if 'quota' in error_lower or 'rate' in error_lower or '429' in error_message:
+                return {
+                    'success': False,
+                    'error': 'API rate limit reached. Please try again in a few moments.'
+                }
+            
+            return {
+                'success': False,
+                'error': f'Failed to translate code: {error_message}'
+            }
@@ -0,0 +1,210 @@
+"""
+Precompiled Headers - Cached STL Header Builds for C++ Submissions
+"""
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from app.services.execution_cache import ExecutionCache
+
+
+# Standard headers a precompiled header may contain. Submissions including
+# anything else (or project headers) are compiled normally.
+STANDARD_HEADERS = {
+    'bits/stdc++.h',
+    'algorithm', 'array', 'bitset', 'cassert', 'cctype', 'chrono', 'climits', 'cmath',
+    'complex', 'cstdint', 'cstdio', 'cstring', 'deque', 'functional', 'iomanip',
+    'iostream', 'iterator', 'limits', 'list', 'map', 'memory', 'numeric', 'optional',
+    'queue', 'random', 'set', 'sstream', 'stack', 'string', 'tuple', 'unordered_map',
+    'unordered_set', 'utility', 'vector'
+}
+
+# Include sets prebuilt at startup (order does not matter, standard headers are self-contained)
+COMMON_HEADER_SETS = [
+    ('bits/stdc++.h',),
+    ('iostream',),
+    ('iostream', 'vector'),
+    ('iostream', 'string', 'vector'),
+    ('algorithm', 'iostream', 'string', 'vector'),
+    ('algorithm', 'iostream', 'vector'),
+]
+
+# Number of times an uncommon include set must be seen before it is precompiled
+BUILD_AFTER_USES = 2
+
+# Maximum number of precompiled header sets kept on disk
+MAX_HEADER_SETS = 16
+
+# Maximum number of uncommon include sets whose use counts are tracked
+MAX_TRACKED_SETS = 1000
+
+INCLUDE_PATTERN = re.compile(r'^\s*#\s*include\s*<([^>]+)>\s*$')
+
+
+class PrecompiledHeaders:
+    """Maintains precompiled headers for common STL include sets."""
+
+    _lock = threading.Lock()
+    _ready = OrderedDict()
+    _building = set()
+    _uses = {}
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Check whether precompiled headers are enabled."""
+        return os.getenv('CPP_PCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def _pch_dir(cls) -> str:
+        """Get the directory precompiled headers are stored in."""
+        return os.path.join(tempfile.gettempdir(), 'code_gen_daemons', 'pch')
+
+    @classmethod
+    def header_set(cls, code: str) -> Optional[Tuple[str, ...]]:
+        """
+        Get the sorted standard include set of a submission.
+
+        Only submissions whose includes all come first and are all standard
+        headers qualify, so injecting them with -include cannot change meaning.
+        """
+        lines = code.splitlines()
+        headers = []
+        body_start = len(lines)
+
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if not stripped or stripped.startswith('//'):
+                continue
+            match = INCLUDE_PATTERN.match(line)
+            if not match:
+                body_start = i
+                break
+            headers.append(match.group(1).strip())
+
+        if not headers or any(header not in STANDARD_HEADERS for header in headers):
+            return None
+        if any('#include' in line for line in lines[body_start:]):
+            return None
+
+        return tuple(sorted(set(headers)))
+
+    @classmethod
+    def _key(cls, headers: Tuple[str, ...], flags: List[str]) -> str:
+        """Identify a precompiled header by compiler version, flags and headers."""
+        identity = '|'.join([ExecutionCache.toolchain_version('cpp'), ' '.join(flags), ','.join(headers)])
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def options_for(cls, code: str, flags: Optional[List[str]] = None) -> List[str]:
+        """
+        Get the extra g++ options that use a ready precompiled header for this code.
+
+        Returns an empty list (plain compile) when the include set does not
+        qualify or its header is not built yet; popular sets get built in the
+        background for the next submission.
+        """
+        if not cls.is_enabled():
+            return []
+
+        headers = cls.header_set(code)
+        if headers is None:
+            return []
+
+        flags = list(flags or [])
+        key = cls._key(headers, flags)
+
+        with cls._lock:
+            header_path = cls._ready.get(key)
+            if header_path and os.path.isfile(header_path + '.gch'):
+                cls._ready.move_to_end(key)
+                cls._hits += 1
+                return ['-include', header_path, '-Winvalid-pch']
+
+            cls._misses += 1
+            if key not in cls._uses and len(cls._uses) >= MAX_TRACKED_SETS:
+                cls._uses.clear()
+            cls._uses[key] = cls._uses.get(key, 0) + 1
+            should_build = headers in COMMON_HEADER_SETS or cls._uses[key] >= BUILD_AFTER_USES
+
+        if should_build:
+            cls.build_async(headers, flags)
+        return []
+
+    @classmethod
+    def build_async(cls, headers: Tuple[str, ...], flags: Optional[List[str]] = None):
+        """Build a precompiled header on a background thread (no-op if built or building)."""
+        flags = list(flags or [])
+        key = cls._key(headers, flags)
+
+        with cls._lock:
+            if key in cls._ready or key in cls._building:
+                return
+            cls._building.add(key)
+
+        threading.Thread(target=cls._build, args=(key, headers, flags), name='pch-build', daemon=True).start()
+
+    @classmethod
+    def prebuild_common(cls, flags: Optional[List[str]] = None):
+        """Queue builds for the common include sets."""
+        if not cls.is_enabled() or shutil.which('g++') is None:
+            return
+        for headers in COMMON_HEADER_SETS:
+            cls.build_async(headers, flags)
+
+    @classmethod
+    def _build(cls, key: str, headers: Tuple[str, ...], flags: List[str]):
+        """Compile the header set into a .gch next to its header file."""
+        target_dir = os.path.join(cls._pch_dir(), key)
+        header_path = os.path.join(target_dir, 'pch.hpp')
+
+        try:
+            if not os.path.isfile(header_path + '.gch'):
+                os.makedirs(target_dir, exist_ok=True)
+                with open(header_path, 'w', encoding='utf-8') as f:
+                    f.write(''.join(f'#include <{header}>\n' for header in headers))
+
+                partial = header_path + '.gch.tmp'
+                build = subprocess.run(
+                    ['g++'] + flags + ['-x', 'c++-header', header_path, '-o', partial],
+                    capture_output=True, text=True, timeout=120
+                )
+                if build.returncode != 0:
+                    print(f"[PCH] Failed to precompile {', '.join(headers)}: {build.stderr[:300]}")
+                    shutil.rmtree(target_dir, ignore_errors=True)
+                    return
+                os.replace(partial, header_path + '.gch')
+
+            with cls._lock:
+                cls._ready[key] = header_path
+                cls._uses.pop(key, None)
+                evicted = []
+                while len(cls._ready) > MAX_HEADER_SETS:
+                    evicted.append(cls._ready.popitem(last=False)[0])
+
+            for old_key in evicted:
+                shutil.rmtree(os.path.join(cls._pch_dir(), old_key), ignore_errors=True)
+
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"[PCH] Failed to precompile {', '.join(headers)}: {str(e)}")
+        finally:
+            with cls._lock:
+                cls._building.discard(key)
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Get precompiled header statistics."""
+        with cls._lock:
+            return {
+                'enabled': cls.is_enabled(),
+                'ready': len(cls._ready),
+                'building': len(cls._building),
+                'hits': cls._hits,
+                'misses': cls._misses
+            }
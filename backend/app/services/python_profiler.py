@@ -0,0 +1,234 @@
+"""
+Python Profiler - cProfile, Line Counts and tracemalloc for Python Sandbox Runs
+"""
+import base64
+import json
+import uuid
+from typing import Dict, Any, Optional, Tuple
+
+
+# Harness that runs the submission as main.py under cProfile (plus optional
+# line tracing and tracemalloc) and writes a JSON report to stderr after a
+# marker line. The submission's own stderr is capped so the report always fits.
+HARNESS_TEMPLATE = r'''
+import base64 as _b64
+import collections as _collections
+import cProfile as _cProfile
+import json as _json
+import linecache as _linecache
+import pstats as _pstats
+import signal as _signal
+import sys as _sys
+import traceback as _traceback
+import tracemalloc as _tracemalloc
+
+_SOURCE = _b64.b64decode('__SOURCE__').decode('utf-8')
+_OPTIONS = _json.loads(_b64.b64decode('__OPTIONS__').decode('utf-8'))
+_MARKER = '__MARKER__'
+_FILENAME = 'main.py'
+_HARNESS = __file__ if '__file__' in globals() else '<harness>'
+
+
+class _CappedStream:
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._left = limit
+
+    def write(self, text):
+        if self._left > 0:
+            self._stream.write(text[:self._left])
+            self._left -= len(text)
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class _ProfilingTimeout(BaseException):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _ProfilingTimeout()
+
+
+_line_hits = _collections.Counter()
+
+
+def _trace_lines(frame, event, arg):
+    if frame.f_code.co_filename != _FILENAME:
+        return None
+    if event == 'line':
+        _line_hits[frame.f_lineno] += 1
+    return _trace_lines
+
+
+def _report(profiler, status):
+    entries = []
+    for (filename, line, name), (cc, nc, tt, ct, callers) in _pstats.Stats(profiler).stats.items():
+        if filename == _HARNESS or name == '<method \'disable\' of \'_lsprof.Profiler\' objects>':
+            continue
+        if name == '<built-in method builtins.exec>' and (not callers or any(c[0] == _HARNESS for c in callers)):
+            continue
+        entries.append({
+            'function': name,
+            'file': filename if filename in (_FILENAME, '~') else filename.rsplit('/', 1)[-1],
+            'line': line,
+            'calls': nc,
+            'primitive_calls': cc,
+            'total_time': round(tt, 6),
+            'cumulative_time': round(ct, 6),
+            'per_call': round(ct / nc, 9) if nc else 0.0
+        })
+    entries.sort(key=lambda e: e['cumulative_time'], reverse=True)
+    report = {'status': status, 'functions': entries[:_OPTIONS['top']], 'lines': None, 'memory': None}
+
+    if _OPTIONS['lines']:
+        source_lines = _SOURCE.splitlines()
+        hottest = sorted(_line_hits.items(), key=lambda item: item[1], reverse=True)[:_OPTIONS['max_lines']]
+        report['lines'] = [{
+            'line': line,
+            'hits': hits,
+            'source': source_lines[line - 1].strip()[:80] if 0 < line <= len(source_lines) else ''
+        } for line, hits in sorted(hottest)]
+
+    if _OPTIONS['memory']:
+        current, peak = _tracemalloc.get_traced_memory()
+        snapshot = _tracemalloc.take_snapshot().filter_traces([_tracemalloc.Filter(True, _FILENAME)])
+        report['memory'] = {
+            'current_bytes': current,
+            'peak_bytes': peak,
+            'top_allocations': [{
+                'line': stat.traceback[0].lineno,
+                'size_bytes': stat.size,
+                'count': stat.count
+            } for stat in snapshot.statistics('lineno')[:10]]
+        }
+        _tracemalloc.stop()
+
+    return report
+
+
+def _main():
+    _sys.stderr = _CappedStream(_sys.stderr, _OPTIONS['max_stderr'])
+    _linecache.cache[_FILENAME] = (len(_SOURCE), None, _SOURCE.splitlines(True), _FILENAME)
+    code = compile(_SOURCE, _FILENAME, 'exec')
+    program_globals = {'__name__': '__main__', '__file__': _FILENAME, '__builtins__': __builtins__}
+
+    if hasattr(_signal, 'setitimer') and _OPTIONS['time_limit'] > 0:
+        _signal.signal(_signal.SIGALRM, _on_alarm)
+        _signal.setitimer(_signal.ITIMER_REAL, _OPTIONS['time_limit'])
+
+    if _OPTIONS['memory']:
+        _tracemalloc.start()
+    if _OPTIONS['lines']:
+        _sys.settrace(_trace_lines)
+
+    profiler = _cProfile.Profile()
+    status, exit_code = 'completed', 0
+    profiler.enable()
+    try:
+        exec(code, program_globals)
+    except _ProfilingTimeout:
+        status, exit_code = 'timed_out', 1
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException:
+        status, exit_code = 'error', 1
+        _traceback.print_exc()
+    finally:
+        profiler.disable()
+        _sys.settrace(None)
+        if hasattr(_signal, 'setitimer'):
+            _signal.setitimer(_signal.ITIMER_REAL, 0)
+
+    _sys.stdout.flush()
+    if status == 'timed_out':
+        _sys.stderr.write('Execution stopped by the profiler time limit\n')
+    _sys.stderr.flush()
+    _sys.__stderr__.write('\n' + _MARKER + '\n' + _json.dumps(_report(profiler, status)) + '\n')
+    _sys.__stderr__.flush()
+    _sys.exit(exit_code)
+
+
+_main()
+'''
+
+# Default and maximum number of functions returned
+DEFAULT_TOP_FUNCTIONS = 20
+MAX_TOP_FUNCTIONS = 50
+
+# Maximum number of line hit counts returned (the most executed lines)
+MAX_LINE_COUNTS = 100
+
+# Characters of the program's own stderr kept, so the report always fits in MAX_OUTPUT_SIZE
+MAX_PROGRAM_STDERR = 16000
+
+
+class PythonProfiler:
+    """Builds the profiling harness for Python runs and extracts its report."""
+
+    @classmethod
+    def parse_options(cls, value: Any) -> Dict[str, Any]:
+        """
+        Normalize the `profiling` request option.
+
+        Accepts true or an object with top (int), lines (bool) and memory (bool).
+        Raises ValueError for anything else.
+        """
+        options = {'top': DEFAULT_TOP_FUNCTIONS, 'lines': False, 'memory': True}
+        if value is True:
+            return options
+        if not isinstance(value, dict):
+            raise ValueError('profiling must be true or an object with top, lines and memory')
+
+        top = value.get('top', DEFAULT_TOP_FUNCTIONS)
+        if not isinstance(top, int) or isinstance(top, bool) or not 1 <= top <= MAX_TOP_FUNCTIONS:
+            raise ValueError(f'profiling.top must be an integer between 1 and {MAX_TOP_FUNCTIONS}')
+
+        options['top'] = top
+        options['lines'] = bool(value.get('lines', False))
+        options['memory'] = bool(value.get('memory', True))
+        return options
+
+    @classmethod
+    def build_harness(cls, code: str, options: Dict[str, Any], time_limit: float) -> Tuple[str, str]:
+        """
+        Wrap a submission in the profiling harness.
+
+        The harness stops the program itself shortly before the sandbox
+        timeout so slow programs still produce a (partial) profile.
+
+        Returns:
+            Tuple of (harness source, report marker)
+        """
+        marker = f'__PROFILE_REPORT_{uuid.uuid4().hex}__'
+        harness_options = dict(options, max_lines=MAX_LINE_COUNTS, max_stderr=MAX_PROGRAM_STDERR,
+                               time_limit=max(time_limit, 0))
+
+        harness = (HARNESS_TEMPLATE
+                   .replace('__SOURCE__', base64.b64encode(code.encode('utf-8')).decode('ascii'))
+                   .replace('__OPTIONS__', base64.b64encode(json.dumps(harness_options).encode('utf-8')).decode('ascii'))
+                   .replace('__MARKER__', marker))
+        return harness, marker
+
+    @classmethod
+    def extract_report(cls, error: Optional[str], marker: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Split the profile report off a run's stderr.
+
+        Returns:
+            Tuple of (program stderr without the report, report or None if missing)
+        """
+        if not error or marker not in error:
+            return error, None
+
+        program_error, _, report = error.partition(marker)
+        program_error = program_error.rstrip('\n') or None
+        try:
+            return program_error, json.loads(report.strip())
+        except ValueError:
+            return program_error, None
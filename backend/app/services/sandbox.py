@@ -0,0 +1,303 @@
+"""
+Sandbox - Namespace Isolation for Local Program Runs
+"""
+import errno
+import os
+import platform
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+
+# Host directories mounted read-only inside the sandbox (toolchains and shared libraries)
+READ_ONLY_ROOTS = ['/usr', '/bin', '/sbin', '/lib', '/lib64', '/lib32', '/etc', '/opt']
+
+# Syscalls denied (EPERM) inside the sandbox, per architecture
+DENIED_SYSCALLS = {
+    'x86_64': {
+        'ptrace': 101, 'syslog': 103, 'pivot_root': 155, 'adjtimex': 159, 'chroot': 161,
+        'acct': 163, 'settimeofday': 164, 'mount': 165, 'umount2': 166, 'swapon': 167,
+        'swapoff': 168, 'reboot': 169, 'sethostname': 170, 'setdomainname': 171, 'iopl': 172,
+        'ioperm': 173, 'init_module': 175, 'delete_module': 176, 'quotactl': 179,
+        'clock_settime': 227, 'kexec_load': 246, 'add_key': 248, 'request_key': 249,
+        'keyctl': 250, 'unshare': 272, 'perf_event_open': 298, 'fanotify_init': 300,
+        'name_to_handle_at': 303, 'open_by_handle_at': 304, 'setns': 308,
+        'process_vm_readv': 310, 'process_vm_writev': 311, 'finit_module': 313,
+        'kexec_file_load': 320, 'bpf': 321, 'userfaultfd': 323,
+    },
+    'aarch64': {
+        'umount2': 39, 'mount': 40, 'pivot_root': 41, 'chroot': 51, 'quotactl': 60,
+        'acct': 89, 'unshare': 97, 'kexec_load': 104, 'init_module': 105,
+        'delete_module': 106, 'clock_settime': 112, 'syslog': 116, 'ptrace': 117,
+        'reboot': 142, 'sethostname': 161, 'setdomainname': 162, 'settimeofday': 170,
+        'adjtimex': 171, 'add_key': 217, 'request_key': 218, 'keyctl': 219, 'swapon': 224,
+        'swapoff': 225, 'perf_event_open': 241, 'fanotify_init': 262,
+        'name_to_handle_at': 264, 'open_by_handle_at': 265, 'setns': 268,
+        'process_vm_readv': 270, 'process_vm_writev': 271, 'finit_module': 273,
+        'bpf': 280, 'userfaultfd': 282, 'kexec_file_load': 294,
+    },
+}
+
+# AUDIT_ARCH_* values checked by the seccomp filter
+AUDIT_ARCH = {'x86_64': 0xC000003E, 'aarch64': 0xC00000B7}
+
+# Classic BPF / seccomp constants
+BPF_LD_W_ABS = 0x20
+BPF_JEQ_K = 0x15
+BPF_JGE_K = 0x35
+BPF_RET_K = 0x06
+SECCOMP_RET_ALLOW = 0x7FFF0000
+SECCOMP_RET_ERRNO = 0x00050000
+SECCOMP_RET_KILL_PROCESS = 0x80000000
+X32_SYSCALL_BIT = 0x40000000
+EPERM = 1
+
+SANDBOX_TOOLS = ['bwrap', 'nsjail']
+
+
+class Sandbox:
+    """
+    Wraps local program runs in a bubblewrap or nsjail sandbox.
+
+    Programs get fresh user, PID, network, IPC and UTS namespaces, a read-only
+    view of the host toolchain directories, a private /tmp with only their
+    work directory writable, and a seccomp filter denying kernel-administration
+    and cross-process syscalls.
+    """
+
+    _lock = threading.Lock()
+    _tool = None
+    _usable = None
+    _detail = 'not probed yet'
+    _filter_path = None
+
+    @classmethod
+    def get_mode(cls) -> str:
+        """Get the configured sandbox mode ('auto', 'bwrap', 'nsjail' or 'off')."""
+        return os.getenv('LOCAL_SANDBOX', 'auto').lower()
+
+    @classmethod
+    def _find_tool(cls) -> Optional[str]:
+        """Pick the sandbox tool to use for the configured mode."""
+        mode = cls.get_mode()
+        if mode == 'off' or not platform.system() == 'Linux':
+            return None
+        candidates = SANDBOX_TOOLS if mode == 'auto' else [mode]
+        for tool in candidates:
+            if tool in SANDBOX_TOOLS and shutil.which(tool):
+                return tool
+        return None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """Check whether a probed, working sandbox is available."""
+        return bool(cls._usable)
+
+    # Seccomp Operations
+    @classmethod
+    def seccomp_filter(cls, machine: Optional[str] = None) -> Optional[bytes]:
+        """
+        Build the seccomp BPF program (struct sock_filter array) for an architecture.
+
+        Returns None when the architecture has no syscall table here.
+        """
+        machine = machine or platform.machine()
+        denied = sorted(DENIED_SYSCALLS.get(machine, {}).values())
+        if not denied:
+            return None
+
+        x32_check = machine == 'x86_64'
+        first_check = 4 + (1 if x32_check else 0)
+        allow = first_check + len(denied)
+        deny, kill = allow + 1, allow + 2
+
+        def instruction(code, jt, jf, k):
+            return struct.pack('=HBBI', code, jt, jf, k)
+
+        program = [
+            instruction(BPF_LD_W_ABS, 0, 0, 4),                      # A = seccomp_data.arch
+            instruction(BPF_JEQ_K, 1, 0, AUDIT_ARCH[machine]),       # foreign arch -> kill
+            instruction(BPF_RET_K, 0, 0, SECCOMP_RET_KILL_PROCESS),
+            instruction(BPF_LD_W_ABS, 0, 0, 0),                      # A = seccomp_data.nr
+        ]
+        if x32_check:
+            program.append(instruction(BPF_JGE_K, kill - first_check, 0, X32_SYSCALL_BIT))
+        for index, number in enumerate(denied):
+            position = first_check + index
+            program.append(instruction(BPF_JEQ_K, deny - position - 1, 0, number))
+        program += [
+            instruction(BPF_RET_K, 0, 0, SECCOMP_RET_ALLOW),
+            instruction(BPF_RET_K, 0, 0, SECCOMP_RET_ERRNO | EPERM),
+            instruction(BPF_RET_K, 0, 0, SECCOMP_RET_KILL_PROCESS),
+        ]
+        return b''.join(program)
+
+    @classmethod
+    def _seccomp_file(cls) -> Optional[str]:
+        """Write the seccomp program once and return its path."""
+        if cls._filter_path and os.path.isfile(cls._filter_path):
+            return cls._filter_path
+
+        program = cls.seccomp_filter()
+        if program is None:
+            return None
+
+        directory = os.path.join(tempfile.gettempdir(), 'code_gen_daemons')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'seccomp_{platform.machine()}.bpf')
+        with open(path, 'wb') as f:
+            f.write(program)
+        cls._filter_path = path
+        return path
+
+    @classmethod
+    def _kafel_policy(cls) -> str:
+        """Get the seccomp policy in nsjail's kafel syntax."""
+        names = sorted(DENIED_SYSCALLS.get(platform.machine(), {}))
+        return f'POLICY sandbox {{ ERRNO({EPERM}) {{ {", ".join(names)} }} }} USE sandbox DEFAULT ALLOW'
+
+    # Command Operations
+    @classmethod
+    def _extra_roots(cls, command: List[str], work_dir: str) -> List[str]:
+        """
+        Find host paths the command needs that are outside the standard
+        read-only roots (e.g. nvm, rustup or Kotlin installs, the CDS archive).
+        """
+        candidates = []
+        executable = shutil.which(command[0]) if command else None
+        if executable:
+            real = os.path.realpath(executable)
+            # Mount the install prefix (…/bin/tool -> …) so its libraries come along
+            candidates.append(os.path.dirname(os.path.dirname(real)))
+
+        for argument in command[1:]:
+            for token in argument.replace('=', os.pathsep).split(os.pathsep):
+                if os.path.isabs(token) and os.path.exists(token):
+                    candidates.append(token if os.path.isdir(token) else os.path.dirname(token))
+
+        roots = []
+        for path in candidates:
+            path = os.path.realpath(path)
+            if path == '/' or path.startswith(os.path.realpath(work_dir)):
+                continue
+            if any(path == root or path.startswith(root + os.sep) for root in READ_ONLY_ROOTS):
+                continue
+            if path not in roots:
+                roots.append(path)
+        return roots
+
+    @classmethod
+    def wrap(cls, command: List[str], work_dir: str,
+             max_file_size: Optional[int] = None) -> Tuple[List[str], Tuple[int, ...]]:
+        """
+        Wrap a run command in the sandbox.
+
+        With max_file_size the program cannot write files (including a
+        redirected stdout) larger than that many bytes.
+
+        Returns:
+            Tuple of (command to launch, file descriptors to pass to it). The
+            command is only limited, not sandboxed, when no working sandbox is
+            available. Callers must close the returned descriptors after launching.
+
+        Raises FileNotFoundError when the program does not exist, since inside
+        the sandbox (or under prlimit) it would only show up as a failed run.
+        """
+        if not command or shutil.which(command[0]) is None:
+            name = command[0] if command else ''
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), name)
+
+        if not cls.is_available():
+            return cls._limit_file_size(command, max_file_size), ()
+        return cls._wrap_with(cls._tool, command, work_dir, max_file_size)
+
+    @classmethod
+    def _limit_file_size(cls, command: List[str], max_file_size: Optional[int]) -> List[str]:
+        """Prefix a command with prlimit so it and its children get RLIMIT_FSIZE."""
+        if max_file_size and shutil.which('prlimit'):
+            return ['prlimit', f'--fsize={max_file_size}', '--'] + command
+        return command
+
+    @classmethod
+    def _wrap_with(cls, tool: str, command: List[str], work_dir: str,
+                   max_file_size: Optional[int] = None) -> Tuple[List[str], Tuple[int, ...]]:
+        """Build the sandboxed command line for a specific tool."""
+        extra_roots = cls._extra_roots(command, work_dir)
+
+        if tool == 'nsjail':
+            # nsjail sets the limit itself (in MiB, rounded up)
+            fsize = str(-(-max_file_size // (1024 * 1024))) if max_file_size else 'inf'
+            wrapped = ['nsjail', '-Mo', '--quiet', '--keep_env', '--time_limit', '0',
+                       '--rlimit_as', 'inf', '--rlimit_fsize', fsize, '--rlimit_nofile', '256',
+                       '--hostname', 'sandbox']
+            for root in READ_ONLY_ROOTS:
+                if os.path.exists(root):
+                    wrapped += ['-R', root]
+            wrapped += ['-T', '/tmp', '-T', '/dev', '-R', '/dev/null', '-R', '/dev/urandom']
+            for root in extra_roots:
+                wrapped += ['-R', root]
+            wrapped += ['-B', work_dir, '--cwd', work_dir, '--seccomp_string', cls._kafel_policy(), '--']
+            return wrapped + command, ()
+
+        wrapped = ['bwrap', '--unshare-all', '--die-with-parent', '--new-session', '--cap-drop', 'ALL']
+        for root in READ_ONLY_ROOTS:
+            wrapped += ['--ro-bind-try', root, root]
+        wrapped += ['--proc', '/proc', '--dev', '/dev', '--tmpfs', '/tmp', '--hostname', 'sandbox']
+        for root in extra_roots:
+            wrapped += ['--ro-bind', root, root]
+        wrapped += ['--bind', work_dir, work_dir, '--chdir', work_dir]
+
+        pass_fds = ()
+        filter_path = cls._seccomp_file()
+        if filter_path:
+            fd = os.open(filter_path, os.O_RDONLY)
+            wrapped += ['--seccomp', str(fd)]
+            pass_fds = (fd,)
+
+        return cls._limit_file_size(wrapped + ['--'] + command, max_file_size), pass_fds
+
+    @classmethod
+    def probe(cls) -> bool:
+        """Check that the sandbox tool can actually start a program (namespaces may be disabled)."""
+        with cls._lock:
+            tool = cls._find_tool()
+            if tool is None:
+                usable = False
+                detail = 'disabled' if cls.get_mode() == 'off' else 'no bwrap or nsjail found'
+            else:
+                work_dir = tempfile.mkdtemp(prefix='sandbox_probe_')
+                try:
+                    command, pass_fds = cls._wrap_with(tool, ['sh', '-c', 'echo ok > probe && cat probe'], work_dir)
+                    try:
+                        probe = subprocess.run(command, capture_output=True, text=True, timeout=15,
+                                               cwd=work_dir, pass_fds=pass_fds)
+                    finally:
+                        for fd in pass_fds:
+                            os.close(fd)
+                    usable = probe.returncode == 0 and probe.stdout.strip() == 'ok'
+                    detail = f'{tool} ready' if usable else f'{tool} failed: {probe.stderr.strip()[:200]}'
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    usable = False
+                    detail = f'{tool} failed: {str(e)}'
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+            cls._tool, cls._usable, cls._detail = tool, usable, detail
+
+        if not usable and tool is not None:
+            print(f"[Sandbox] Local sandbox unavailable: {cls._detail}")
+        return usable
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Get sandbox information."""
+        return {
+            'mode': cls.get_mode(),
+            'tool': cls._tool,
+            'available': cls.is_available(),
+            'seccomp': platform.machine() in DENIED_SYSCALLS,
+            'detail': cls._detail
+        }
@@ -0,0 +1,123 @@
+"""
+Similarity Service - MinHash/LSH Signatures for Near-Duplicate Detection
+"""
+import hashlib
+import os
+import re
+from typing import List, Set
+
+
+# MinHash signature length and its split into LSH bands (NUM_PERMUTATIONS = BANDS * ROWS).
+# With 16 bands of 4 rows, pairs above ~0.5 Jaccard similarity almost always
+# share a band and pairs below ~0.2 almost never do.
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = 4
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Shingle sizes in tokens
+CODE_SHINGLE_SIZE = 5
+PROMPT_SHINGLE_SIZE = 2
+
+# Upper bound on code tokens considered (keeps signing cheap on huge outputs)
+MAX_CODE_TOKENS = 5000
+
+# Comments are dropped so reworded comments do not count as differences
+COMMENT_PATTERN = re.compile(r'//[^\n]*|/\*.*?\*/|#[^\n]*|--[^\n]*', re.DOTALL)
+CODE_TOKEN_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\d+(?:\.\d+)?|"[^"\n]*"|\'[^\'\n]*\'|\S')
+WORD_PATTERN = re.compile(r'[a-z0-9+#]+')
+
+
+def _hash64(value: str) -> int:
+    """Stable 64-bit hash (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+# Fixed (a, b) pairs of the universal hash family; identical in every process
+PERMUTATIONS = [
+    (_hash64(f'minhash-a-{i}') % (MERSENNE_PRIME - 1) + 1, _hash64(f'minhash-b-{i}') % MERSENNE_PRIME)
+    for i in range(NUM_PERMUTATIONS)
+]
+
+
+class SimilarityService:
+    """
+    MinHash signatures and LSH band keys over token shingles.
+
+    Generations store the band keys of their code and prompt; two documents
+    sharing any band key are candidates, which are then confirmed with the
+    exact Jaccard similarity of their shingle sets.
+    """
+
+    @classmethod
+    def code_shingles(cls, code: str) -> Set[int]:
+        """Hashed k-token shingles of code, ignoring comments, whitespace and case."""
+        tokens = CODE_TOKEN_PATTERN.findall(COMMENT_PATTERN.sub(' ', (code or '').lower()))
+        return cls._shingles(tokens[:MAX_CODE_TOKENS], CODE_SHINGLE_SIZE)
+
+    @classmethod
+    def prompt_shingles(cls, prompt: str) -> Set[int]:
+        """Hashed word-pair shingles of a prompt, ignoring punctuation and case."""
+        return cls._shingles(WORD_PATTERN.findall((prompt or '').lower()), PROMPT_SHINGLE_SIZE)
+
+    @classmethod
+    def _shingles(cls, tokens: List[str], size: int) -> Set[int]:
+        if not tokens:
+            return set()
+        if len(tokens) <= size:
+            return {_hash64(' '.join(tokens))}
+        return {_hash64(' '.join(tokens[i:i + size])) for i in range(len(tokens) - size + 1)}
+
+    @classmethod
+    def signature(cls, shingles: Set[int]) -> List[int]:
+        """MinHash signature of a shingle set."""
+        values = [shingle & MAX_HASH for shingle in shingles]
+        return [min((a * value + b) % MERSENNE_PRIME for value in values) & MAX_HASH
+                for a, b in PERMUTATIONS]
+
+    @classmethod
+    def band_keys(cls, shingles: Set[int]) -> List[int]:
+        """
+        LSH band keys of a shingle set (empty for an empty set).
+
+        Keys are signed 64-bit so they store as BSON int64; the band number is
+        part of each key so equal rows in different bands never collide.
+        """
+        if not shingles:
+            return []
+        signature = cls.signature(shingles)
+        keys = []
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            key = _hash64(f'{band}:' + ','.join(map(str, rows)))
+            keys.append(key - (1 << 64) if key >= (1 << 63) else key)
+        return keys
+
+    @classmethod
+    def code_bands(cls, code: str) -> List[int]:
+        """LSH band keys of a piece of code."""
+        return cls.band_keys(cls.code_shingles(code))
+
+    @classmethod
+    def prompt_bands(cls, prompt: str) -> List[int]:
+        """LSH band keys of a prompt."""
+        return cls.band_keys(cls.prompt_shingles(prompt))
+
+    @classmethod
+    def jaccard(cls, first: Set[int], second: Set[int]) -> float:
+        """Exact Jaccard similarity of two shingle sets."""
+        if not first or not second:
+            return 0.0
+        return len(first & second) / len(first | second)
+
+    @classmethod
+    def is_reuse_enabled(cls) -> bool:
+        """Check whether /api/generate may answer reuse requests from a near-identical earlier generation."""
+        return os.getenv('GENERATION_REUSE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def get_reuse_threshold(cls) -> float:
+        """Minimum prompt similarity for reusing an earlier generation."""
+        return float(os.getenv('GENERATION_REUSE_THRESHOLD', 0.8))
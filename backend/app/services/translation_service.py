@@ -0,0 +1,168 @@
+"""
+Translation Service - Cross-Language Translate and Benchmark
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from app.services.gemini_service import GeminiService
+from app.services.db_service import DatabaseService
+from app.services.execution_service import ExecutionService, _normalize_output
+
+
+# Maximum number of target languages per request
+MAX_TARGET_LANGUAGES = 12
+
+
+class TranslationService:
+    """Translates a generation into several languages and benchmarks every variant."""
+
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls) -> ThreadPoolExecutor:
+        """Get the worker pool translations (and their runs) are processed on."""
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    workers = int(os.getenv('TRANSLATION_WORKERS', 4))
+                    cls._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='translate')
+        return cls._pool
+
+    @classmethod
+    def _run(cls, code: str, language: str, stdin: str, profile: str) -> Dict[str, Any]:
+        """Run one variant and reduce the result to a benchmark row."""
+        pattern = ExecutionService.find_dangerous_pattern(code, language)
+        if pattern:
+            return {
+                'success': False,
+                'error': f'Potentially dangerous operation detected: {pattern}',
+                'output': None,
+                'compile_time': None,
+                'execution_time': None,
+                'backend': None
+            }
+
+        result, error = ExecutionService.execute(code, language, stdin, no_cache=True, profile=profile)
+        if result is None:
+            return {
+                'success': False,
+                'error': error,
+                'output': None,
+                'compile_time': None,
+                'execution_time': None,
+                'backend': None
+            }
+
+        return {
+            'success': result['success'],
+            'error': result.get('error'),
+            'output': result.get('output'),
+            'compile_time': result.get('compile_time'),
+            'execution_time': result.get('execution_time'),
+            'backend': result.get('backend')
+        }
+
+    @classmethod
+    def _translate_and_run(cls, user_id: str, generation: dict, target: str,
+                           stdin: str, profile: str) -> Dict[str, Any]:
+        """Translate the generation into one language, persist it and run it."""
+        translation = GeminiService.translate_code(
+            code=generation.get('generated_code', ''),
+            source_language=generation.get('language', 'python'),
+            target_language=target,
+            original_prompt=generation.get('prompt', '')
+        )
+
+        if not translation['success']:
+            return {
+                'language': target,
+                'generation_id': None,
+                'code': None,
+                'translation_error': translation['error'],
+                'success': False,
+                'error': None,
+                'output': None,
+                'compile_time': None,
+                'execution_time': None,
+                'backend': None
+            }
+
+        generation_id = DatabaseService.save_generation(
+            user_id=user_id,
+            prompt=generation.get('prompt', ''),
+            language=target,
+            code=translation['code'],
+            explanation=translation['explanation'],
+            translated_from=generation['_id']
+        )
+
+        row = {
+            'language': target,
+            'generation_id': generation_id,
+            'code': translation['code'],
+            'translation_error': None
+        }
+        row.update(cls._run(translation['code'], target, stdin, profile))
+        return row
+
+    @classmethod
+    def translate_and_benchmark(cls, user_id: str, generation: dict, targets: List[str],
+                                stdin: str = '', profile: str = 'bench') -> Dict[str, Any]:
+        """
+        Translate a generation into every target language concurrently, run
+        each variant (and the original) on the same stdin in parallel, and
+        compare their timings and outputs.
+
+        Args:
+            user_id: Owner of the generation and of the saved translations
+            generation: Source generation (as returned by DatabaseService.get_generation_by_id)
+            targets: Languages to translate into
+            stdin: Standard input given to every variant
+            profile: Compile profile used for every run
+
+        Returns:
+            Dictionary with the source row and one row per target language
+        """
+        pool = cls.get_pool()
+        source_future = pool.submit(
+            cls._run, generation.get('generated_code', ''), generation.get('language', 'python'), stdin, profile
+        )
+        target_futures = [
+            pool.submit(cls._translate_and_run, user_id, generation, target, stdin, profile)
+            for target in targets
+        ]
+
+        source = dict(source_future.result(), language=generation.get('language', 'python'),
+                      generation_id=generation['_id'])
+        reference = _normalize_output(source['output']) if source['success'] else None
+
+        rows = []
+        for future in target_futures:
+            row = future.result()
+            row['output_matches_source'] = (
+                _normalize_output(row['output']) == reference
+                if reference is not None and row['output'] is not None else None
+            )
+            rows.append(row)
+
+        return {
+            'source': source,
+            'profile': profile,
+            'results': rows,
+            'summary': {
+                'translated': sum(1 for row in rows if row['generation_id']),
+                'ran': sum(1 for row in rows if row['success']),
+                'matching': sum(1 for row in rows if row['output_matches_source']),
+                'fastest': cls._fastest(source, rows)
+            }
+        }
+
+    @classmethod
+    def _fastest(cls, source: dict, rows: List[dict]) -> Optional[str]:
+        """Get the language whose successful run took the least time."""
+        timed = [row for row in [source] + rows if row['success'] and row['execution_time'] is not None]
+        if not timed:
+            return None
+        return min(timed, key=lambda row: row['execution_time'])['language']
@@ -0,0 +1,267 @@
+"""
+TypeScript Transpiler - Persistent Transpile-Only TypeScript Worker
+"""
+import atexit
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+
+# Worker run in a long-lived Node process. Reads one JSON request per line on
+# stdin and writes one JSON response per line on stdout:
+#   {"op": "ping"}                         -> {"ok": true, "version": "<ts version>"}
+#   {"op": "transpile", "source": "..."}   -> {"ok": true, "output": "...", "errors": [...]}
+#   {"op": "typecheck", "source": "..."}   -> {"ok": true, "errors": [...]}
+WORKER_SOURCE = r'''
+const ts = require('typescript');
+const readline = require('readline');
+
+const compilerOptions = {
+    target: ts.ScriptTarget.ES2020,
+    module: ts.ModuleKind.CommonJS,
+    esModuleInterop: true,
+    skipLibCheck: true,
+};
+
+function formatDiagnostics(diagnostics) {
+    return diagnostics
+        .filter((d) => d.category === ts.DiagnosticCategory.Error)
+        .map((d) => {
+            const message = ts.flattenDiagnosticMessageText(d.messageText, '\n');
+            if (d.file && d.start !== undefined) {
+                const pos = d.file.getLineAndCharacterOfPosition(d.start);
+                return `main.ts(${pos.line + 1},${pos.character + 1}): error TS${d.code}: ${message}`;
+            }
+            return `error TS${d.code}: ${message}`;
+        });
+}
+
+function transpile(source) {
+    const result = ts.transpileModule(source, {
+        compilerOptions,
+        fileName: 'main.ts',
+        reportDiagnostics: true,
+    });
+    return { output: result.outputText, errors: formatDiagnostics(result.diagnostics || []) };
+}
+
+// Library declaration files are parsed once and reused across type checks
+const libraryFiles = new Map();
+
+function typecheck(source) {
+    const options = Object.assign({}, compilerOptions, { noEmit: true, types: [] });
+    const host = ts.createCompilerHost(options);
+    const getSourceFile = host.getSourceFile;
+    host.getSourceFile = (fileName, languageVersion, onError) => {
+        if (fileName === 'main.ts') {
+            return ts.createSourceFile(fileName, source, languageVersion);
+        }
+        if (!libraryFiles.has(fileName)) {
+            libraryFiles.set(fileName, getSourceFile.call(host, fileName, languageVersion, onError));
+        }
+        return libraryFiles.get(fileName);
+    };
+    const program = ts.createProgram(['main.ts'], options, host);
+    return { errors: formatDiagnostics(ts.getPreEmitDiagnostics(program)) };
+}
+
+const rl = readline.createInterface({ input: process.stdin });
+rl.on('line', (line) => {
+    let response;
+    try {
+        const request = JSON.parse(line);
+        if (request.op === 'ping') {
+            response = { ok: true, version: ts.version };
+        } else if (request.op === 'transpile') {
+            response = Object.assign({ ok: true }, transpile(request.source));
+        } else if (request.op === 'typecheck') {
+            response = Object.assign({ ok: true }, typecheck(request.source));
+        } else {
+            response = { ok: false, error: `unknown op ${request.op}` };
+        }
+    } catch (e) {
+        response = { ok: false, error: String(e) };
+    }
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+'''
+
+# Maximum number of transpiled outputs kept in memory
+MAX_CACHE_ENTRIES = 256
+
+# Seconds to wait for a worker response
+REQUEST_TIMEOUT = 30
+
+# Seconds to wait before trying to start the worker again after a failure
+RESTART_BACKOFF = 60
+
+
+class TypeScriptTranspiler:
+    """Manages the long-lived Node worker that transpiles TypeScript without type checking."""
+
+    _lock = threading.Lock()
+    _process = None
+    _version = None
+    _cache = OrderedDict()
+    _hits = 0
+    _misses = 0
+    _last_error = None
+    _failed_at = 0.0
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Check whether the transpile worker is enabled."""
+        return os.getenv('TS_TRANSPILER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def _node_path(cls) -> str:
+        """Build NODE_PATH so the worker can resolve the typescript package."""
+        paths = [os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                              'node_modules')]
+        try:
+            npm_root = subprocess.run(['npm', 'root', '-g'], capture_output=True, text=True, timeout=15)
+            if npm_root.returncode == 0 and npm_root.stdout.strip():
+                paths.append(npm_root.stdout.strip())
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+        if os.getenv('NODE_PATH'):
+            paths.append(os.getenv('NODE_PATH'))
+        return os.pathsep.join(paths)
+
+    @classmethod
+    def _start_locked(cls):
+        """Start the worker and check it can load typescript (caller holds the lock)."""
+        worker_dir = os.path.join(tempfile.gettempdir(), 'code_gen_daemons')
+        os.makedirs(worker_dir, exist_ok=True)
+        worker = os.path.join(worker_dir, 'ts_transpile_worker.js')
+        with open(worker, 'w', encoding='utf-8') as f:
+            f.write(WORKER_SOURCE)
+
+        cls._process = subprocess.Popen(
+            ['node', worker],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env={**os.environ, 'NODE_PATH': cls._node_path()}
+        )
+        response = cls._request_locked({'op': 'ping'})
+        cls._version = response['version']
+        print(f"[TypeScript] Started transpile worker (typescript {cls._version}, pid={cls._process.pid})")
+
+    @classmethod
+    def _request_locked(cls, payload: dict) -> dict:
+        """Send one request to the worker and wait for its response (caller holds the lock)."""
+        cls._process.stdin.write(json.dumps(payload) + '\n')
+        cls._process.stdin.flush()
+
+        response = {}
+        reader = threading.Thread(target=lambda: response.setdefault('line', cls._process.stdout.readline()),
+                                  daemon=True)
+        reader.start()
+        reader.join(REQUEST_TIMEOUT)
+
+        line = response.get('line')
+        if not line:
+            raise RuntimeError('TypeScript worker did not respond')
+        result = json.loads(line)
+        if not result.get('ok'):
+            raise RuntimeError(result.get('error', 'TypeScript worker error'))
+        return result
+
+    @classmethod
+    def _stop_locked(cls):
+        """Kill the worker (caller holds the lock)."""
+        if cls._process is not None:
+            try:
+                cls._process.kill()
+                cls._process.wait(timeout=5)
+            except Exception:
+                pass
+        cls._process = None
+
+    @classmethod
+    def _call(cls, payload: dict) -> Optional[dict]:
+        """Send a request, starting the worker if needed. Returns None when unavailable."""
+        if not cls.is_enabled() or shutil.which('node') is None:
+            return None
+
+        with cls._lock:
+            try:
+                if cls._process is None or cls._process.poll() is not None:
+                    if time.time() - cls._failed_at < RESTART_BACKOFF:
+                        return None
+                    cls._start_locked()
+                return cls._request_locked(payload)
+            except (OSError, ValueError, KeyError, RuntimeError) as e:
+                cls._last_error = str(e)
+                cls._failed_at = time.time()
+                print(f"[TypeScript] Transpile worker unavailable: {str(e)}")
+                cls._stop_locked()
+                return None
+
+    @classmethod
+    def transpile(cls, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Transpile TypeScript to JavaScript without type checking.
+
+        Returns:
+            Dictionary with 'output' (JavaScript) and 'errors' (syntax errors),
+            or None when the worker is unavailable and ts-node should be used
+        """
+        key = hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+        with cls._lock:
+            cached = cls._cache.get(key)
+            if cached is not None:
+                cls._cache.move_to_end(key)
+                cls._hits += 1
+                return cached
+
+        result = cls._call({'op': 'transpile', 'source': source})
+        if result is None:
+            return None
+
+        transpiled = {'output': result['output'], 'errors': result['errors']}
+        with cls._lock:
+            cls._misses += 1
+            cls._cache[key] = transpiled
+            while len(cls._cache) > MAX_CACHE_ENTRIES:
+                cls._cache.popitem(last=False)
+        return transpiled
+
+    @classmethod
+    def typecheck(cls, source: str) -> Optional[List[str]]:
+        """Type check TypeScript source. Returns error messages, or None when unavailable."""
+        result = cls._call({'op': 'typecheck', 'source': source})
+        return result['errors'] if result is not None else None
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Get worker and cache information."""
+        running = cls._process is not None and cls._process.poll() is None
+        return {
+            'enabled': cls.is_enabled(),
+            'running': running,
+            'typescript_version': cls._version if running else None,
+            'cached': len(cls._cache),
+            'hits': cls._hits,
+            'misses': cls._misses,
+            'last_error': cls._last_error
+        }
+
+    @classmethod
+    def stop(cls):
+        """Stop the worker."""
+        with cls._lock:
+            cls._stop_locked()
+
+
+atexit.register(TypeScriptTranspiler.stop)
@@ -0,0 +1,192 @@
+"""
+Write-Behind Buffer - Batched Non-Critical MongoDB Writes
+"""
+import atexit
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+class WriteBehindBuffer:
+    """
+    Collects writes that no response depends on (last_login, usage counters)
+    and applies them with one bulk_write per collection.
+
+    Updates to the same document are coalesced ($set merged, $inc summed), so
+    memory is bounded by the number of distinct documents pending. The buffer
+    is flushed every WRITE_BEHIND_INTERVAL seconds, synchronously by the
+    writer once WRITE_BEHIND_MAX_PENDING documents are pending, and at exit.
+    Writes that fail are queued again; after WRITE_BEHIND_MAX_RETRIES failed
+    attempts they are dropped and logged for repair.
+    """
+
+    _pending = OrderedDict()
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _thread = None
+    _pid = None
+    _flushed = 0
+    _failed = 0
+    _dropped = 0
+    _last_flush = None
+    _last_error = None
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Check whether writes are buffered (otherwise every write is applied immediately)."""
+        return os.getenv('WRITE_BEHIND_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+    @classmethod
+    def get_interval(cls) -> float:
+        """Get the seconds between background flushes."""
+        return float(os.getenv('WRITE_BEHIND_INTERVAL', 1.0))
+
+    @classmethod
+    def get_max_pending(cls) -> int:
+        """Get the number of pending documents that triggers a flush."""
+        return int(os.getenv('WRITE_BEHIND_MAX_PENDING', 1000))
+
+    @classmethod
+    def get_max_retries(cls) -> int:
+        """Get the number of failed flushes after which a write is dropped."""
+        return int(os.getenv('WRITE_BEHIND_MAX_RETRIES', 5))
+
+    @classmethod
+    def update(cls, collection: str, query: dict, set_fields: dict = None,
+               inc_fields: dict = None, upsert: bool = False):
+        """Queue an update of one document (keyed by its query)."""
+        key = (collection, tuple(sorted(query.items())))
+        with cls._lock:
+            entry = cls._pending.get(key)
+            if entry is None:
+                entry = cls._pending[key] = {'key': key, 'collection': collection, 'query': query,
+                                             'set': {}, 'inc': {}, 'upsert': False, 'attempts': 0}
+            cls._merge(entry, set_fields or {}, inc_fields or {}, upsert)
+            full = len(cls._pending) >= cls.get_max_pending()
+
+        if full or not cls.is_enabled():
+            cls.flush()
+        else:
+            cls._ensure_thread()
+
+    @classmethod
+    def _merge(cls, entry: dict, set_fields: dict, inc_fields: dict, upsert: bool):
+        entry['set'].update(set_fields)
+        for field, amount in inc_fields.items():
+            entry['inc'][field] = entry['inc'].get(field, 0) + amount
+        entry['upsert'] = entry['upsert'] or upsert
+
+    @classmethod
+    def flush(cls, select=None) -> int:
+        """
+        Apply pending writes now.
+
+        Args:
+            select: Optional predicate on (collection, query); only the
+                matching documents are written (e.g. one user's counters)
+
+        Returns:
+            Number of documents written
+        """
+        with cls._flush_lock:
+            with cls._lock:
+                if select is None:
+                    entries, cls._pending = list(cls._pending.values()), OrderedDict()
+                else:
+                    keys = [key for key, entry in cls._pending.items() if select(entry['collection'], entry['query'])]
+                    entries = [cls._pending.pop(key) for key in keys]
+            if not entries:
+                return 0
+
+            from app.services.db_service import DatabaseService
+            by_collection = {}
+            for entry in entries:
+                update = {}
+                if entry['set']:
+                    update['$set'] = entry['set']
+                inc = {field: amount for field, amount in entry['inc'].items() if amount}
+                if inc:
+                    update['$inc'] = inc
+                if update:
+                    batch = by_collection.setdefault(entry['collection'], ([], []))
+                    batch[0].append(entry)
+                    batch[1].append(UpdateOne(entry['query'], update, upsert=entry['upsert']))
+
+            written = 0
+            for collection, (batch, operations) in by_collection.items():
+                try:
+                    DatabaseService.get_db()[collection].bulk_write(operations, ordered=False)
+                    written += len(operations)
+                except Exception as e:
+                    # Unordered bulk writes apply everything but the reported errors
+                    if isinstance(e, BulkWriteError):
+                        failed_at = {error['index'] for error in e.details.get('writeErrors', [])}
+                        failed = [entry for i, entry in enumerate(batch) if i in failed_at]
+                    else:
+                        failed = batch
+                    written += len(operations) - len(failed)
+                    cls._failed += len(failed)
+                    cls._last_error = f'{collection}: {str(e)}'
+                    print(f"[WriteBehind] Flush warning ({cls._last_error}); retrying {len(failed)} writes")
+                    cls._requeue(failed)
+
+            cls._flushed += written
+            cls._last_flush = time.time()
+            return written
+
+    @classmethod
+    def _requeue(cls, entries: list):
+        """Queue failed writes again, under any updates of the same documents queued since."""
+        with cls._lock:
+            for entry in entries:
+                entry['attempts'] += 1
+                if entry['attempts'] > cls.get_max_retries():
+                    cls._dropped += 1
+                    print(f"[WriteBehind] Dropped update of {entry['collection']} {entry['query']} after "
+                          f"{entry['attempts']} attempts (set={entry['set']}, inc={entry['inc']}); "
+                          f"run repair_user_stats.py for counters")
+                    continue
+                newer = cls._pending.pop(entry['key'], None)
+                if newer is not None:
+                    cls._merge(entry, newer['set'], newer['inc'], newer['upsert'])
+                cls._pending[entry['key']] = entry
+
+    @classmethod
+    def _ensure_thread(cls):
+        """Start the background flusher (again after a fork, e.g. gunicorn --preload)."""
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive() and cls._pid == os.getpid():
+                return
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name='write-behind', daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        while True:
+            time.sleep(cls.get_interval())
+            try:
+                cls.flush()
+            except Exception as e:
+                print(f"[WriteBehind] Flush error: {str(e)}")
+
+    @classmethod
+    def status(cls) -> Dict[str, Any]:
+        """Get buffer information."""
+        return {
+            'enabled': cls.is_enabled(),
+            'pending': len(cls._pending),
+            'flushed': cls._flushed,
+            'failed': cls._failed,
+            'dropped': cls._dropped,
+            'last_flush': cls._last_flush,
+            'last_error': cls._last_error
+        }
+
+
+atexit.register(WriteBehindBuffer.flush)
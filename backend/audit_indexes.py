@@ -0,0 +1,51 @@
+"""
+Audit the indexes behind every query DatabaseService issues.
+
+Runs explain() on each query shape and flags plans that scan a whole
+collection (COLLSCAN). Exits with status 1 when any shape does.
+
+Run:
+    python audit_indexes.py
+    python audit_indexes.py --dedupe-favorites   # drop duplicate favorites, then build the unique index
+"""
+import argparse
+import sys
+
+from app.services.db_service import DatabaseService
+
+
+def dedupe_favorites(db):
+    """Keep the oldest favorite per (user_id, generation_id) and delete the rest."""
+    duplicates = db.favorites.aggregate([
+        {'$sort': {'created_at': 1, '_id': 1}},
+        {'$group': {'_id': {'user_id': '$user_id', 'generation_id': '$generation_id'},
+                    'ids': {'$push': '$_id'}, 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}}
+    ], allowDiskUse=True)
+
+    removed = 0
+    for group in duplicates:
+        removed += db.favorites.delete_many({'_id': {'$in': group['ids'][1:]}}).deleted_count
+    print(f"Removed {removed} duplicate favorites")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='explain() every DatabaseService query shape.')
+    parser.add_argument('--dedupe-favorites', action='store_true')
+    args = parser.parse_args()
+
+    db = DatabaseService.get_db()
+    if args.dedupe_favorites:
+        dedupe_favorites(db)
+        DatabaseService._create_indexes()
+
+    report = DatabaseService.audit_indexes()
+    for shape in report:
+        status = 'ERROR' if shape['error'] else ('COLLSCAN' if shape['collscan'] else 'OK')
+        detail = shape['error'] or ' > '.join(shape['stages'])
+        print(f"  {status:8} {shape['collection']:18} {shape['query']:28} {detail}")
+
+    collscans = [shape for shape in report if shape['collscan']]
+    print(f"\n{len(report)} query shapes, {len(collscans)} collection scans")
+    if collscans:
+        sys.exit(1)
@@ -0,0 +1,625 @@
+"""
+Benchmark code execution latency and throughput across languages and backends.
+
+Drives /api/execute (target "api") and/or ExecutionService's backends directly
+(targets "local" and "judge0") with compile-heavy, CPU-bound, output-heavy and
+stdin-heavy programs at several concurrency levels, reports p50/p95/p99 latency,
+throughput and error rate per cell, writes the results as JSON and compares
+them against a saved baseline.
+
+Run:
+    python benchmark_execution.py --target local judge0 --concurrency 1 4
+    python benchmark_execution.py --target api --token <JWT> --output bench.json
+    python benchmark_execution.py --target local --baseline bench.json   # exits 1 on regressions
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_URL = os.getenv('BENCH_API_URL', 'http://localhost:5000/api')
+
+# Default workload sizes (multiplied by --scale)
+CPU_ITERATIONS = 3_000_000
+OUTPUT_LINES = 100_000
+STDIN_LINES = 100_000
+COMPILE_FUNCTIONS = 300
+
+MODULUS = 1000003
+
+# Regression thresholds used with --baseline
+DEFAULT_THRESHOLD = 0.2        # relative p95 / throughput change
+MIN_LATENCY_DELTA_MS = 5       # ignore p95 changes smaller than this
+MAX_ERROR_RATE_DELTA = 0.05    # absolute error rate increase
+
+# Per-language programs. cpu_bound, output_heavy and stdin_heavy read N from the
+# first stdin line; compile_heavy is generated from a function template (__I__),
+# a call template and a wrapper (__FUNCTIONS__ / __CALLS__).
+PROGRAMS = {
+    'python': {
+        'cpu_bound': 'n = int(input())\ns = 0\nfor i in range(n):\n    s = (s * 31 + i) % 1000003\nprint(s)\n',
+        'output_heavy': 'n = int(input())\nprint("\\n".join(str(i) for i in range(n)))\n',
+        'stdin_heavy': 'n = int(input())\ntotal = 0\nfor _ in range(n):\n    total += int(input())\nprint(total)\n',
+        'compile_heavy': (
+            'def f__I__(x):\n    return (x * __I__ + __I__) % 1000003\n\n',
+            '    s += f__I__(1)\n',
+            '__FUNCTIONS__def main():\n    s = 0\n__CALLS__    print(s)\n\n\nmain()\n'
+        ),
+    },
+    'javascript': {
+        'cpu_bound': (
+            'let input = "";\nprocess.stdin.on("data", d => input += d);\nprocess.stdin.on("end", () => {\n'
+            '  const n = parseInt(input);\n  let s = 0;\n  for (let i = 0; i < n; i++) s = (s * 31 + i) % 1000003;\n'
+            '  console.log(s);\n});\n'
+        ),
+        'output_heavy': (
+            'let input = "";\nprocess.stdin.on("data", d => input += d);\nprocess.stdin.on("end", () => {\n'
+            '  const n = parseInt(input);\n  const out = [];\n  for (let i = 0; i < n; i++) out.push(i);\n'
+            '  console.log(out.join("\\n"));\n});\n'
+        ),
+        'stdin_heavy': (
+            'let input = "";\nprocess.stdin.on("data", d => input += d);\nprocess.stdin.on("end", () => {\n'
+            '  const lines = input.split("\\n");\n  const n = parseInt(lines[0]);\n  let total = 0;\n'
+            '  for (let i = 1; i <= n; i++) total += Number(lines[i]);\n  console.log(total);\n});\n'
+        ),
+        'compile_heavy': (
+            'function f__I__(x) { return (x * __I__ + __I__) % 1000003; }\n',
+            '  s += f__I__(1);\n',
+            '__FUNCTIONS__function main() {\n  let s = 0;\n__CALLS__  console.log(s);\n}\nmain();\n'
+        ),
+    },
+    'typescript': {
+        'cpu_bound': (
+            'declare var process: any;\nlet input: string = "";\nprocess.stdin.on("data", (d: string) => input += d);\n'
+            'process.stdin.on("end", () => {\n  const n: number = parseInt(input);\n  let s: number = 0;\n'
+            '  for (let i = 0; i < n; i++) s = (s * 31 + i) % 1000003;\n  console.log(s);\n});\n'
+        ),
+        'output_heavy': (
+            'declare var process: any;\nlet input: string = "";\nprocess.stdin.on("data", (d: string) => input += d);\n'
+            'process.stdin.on("end", () => {\n  const n: number = parseInt(input);\n  const out: number[] = [];\n'
+            '  for (let i = 0; i < n; i++) out.push(i);\n  console.log(out.join("\\n"));\n});\n'
+        ),
+        'stdin_heavy': (
+            'declare var process: any;\nlet input: string = "";\nprocess.stdin.on("data", (d: string) => input += d);\n'
+            'process.stdin.on("end", () => {\n  const lines: string[] = input.split("\\n");\n'
+            '  const n: number = parseInt(lines[0]);\n  let total: number = 0;\n'
+            '  for (let i = 1; i <= n; i++) total += Number(lines[i]);\n  console.log(total);\n});\n'
+        ),
+        'compile_heavy': (
+            'function f__I__(x: number): number { return (x * __I__ + __I__) % 1000003; }\n',
+            '  s += f__I__(1);\n',
+            '__FUNCTIONS__function main(): void {\n  let s: number = 0;\n__CALLS__  console.log(s);\n}\nmain();\n'
+        ),
+    },
+    'java': {
+        'cpu_bound': (
+            'import java.io.*;\n\npublic class Main {\n'
+            '    public static void main(String[] args) throws IOException {\n'
+            '        BufferedReader br = new BufferedReader(new InputStreamReader(System.in));\n'
+            '        long n = Long.parseLong(br.readLine().trim());\n        long s = 0;\n'
+            '        for (long i = 0; i < n; i++) s = (s * 31 + i) % 1000003;\n'
+            '        System.out.println(s);\n    }\n}\n'
+        ),
+        'output_heavy': (
+            'import java.io.*;\n\npublic class Main {\n'
+            '    public static void main(String[] args) throws IOException {\n'
+            '        BufferedReader br = new BufferedReader(new InputStreamReader(System.in));\n'
+            '        int n = Integer.parseInt(br.readLine().trim());\n        StringBuilder sb = new StringBuilder();\n'
+            '        for (int i = 0; i < n; i++) sb.append(i).append(\'\\n\');\n'
+            '        System.out.print(sb);\n    }\n}\n'
+        ),
+        'stdin_heavy': (
+            'import java.io.*;\n\npublic class Main {\n'
+            '    public static void main(String[] args) throws IOException {\n'
+            '        BufferedReader br = new BufferedReader(new InputStreamReader(System.in));\n'
+            '        int n = Integer.parseInt(br.readLine().trim());\n        long total = 0;\n'
+            '        for (int i = 0; i < n; i++) total += Long.parseLong(br.readLine().trim());\n'
+            '        System.out.println(total);\n    }\n}\n'
+        ),
+        'compile_heavy': (
+            '    static long f__I__(long x) { return (x * __I__ + __I__) % 1000003; }\n',
+            '        s += f__I__(1);\n',
+            'public class Main {\n__FUNCTIONS__\n    public static void main(String[] args) {\n'
+            '        long s = 0;\n__CALLS__        System.out.println(s);\n    }\n}\n'
+        ),
+    },
+    'cpp': {
+        'cpu_bound': (
+            '#include <iostream>\n\nint main() {\n    long long n, s = 0;\n    std::cin >> n;\n'
+            '    for (long long i = 0; i < n; i++) s = (s * 31 + i) % 1000003;\n'
+            '    std::cout << s << std::endl;\n    return 0;\n}\n'
+        ),
+        'output_heavy': (
+            '#include <iostream>\n\nint main() {\n    std::ios::sync_with_stdio(false);\n    long long n;\n'
+            '    std::cin >> n;\n    for (long long i = 0; i < n; i++) std::cout << i << \'\\n\';\n    return 0;\n}\n'
+        ),
+        'stdin_heavy': (
+            '#include <iostream>\n\nint main() {\n    std::ios::sync_with_stdio(false);\n'
+            '    long long n, x, total = 0;\n    std::cin >> n;\n'
+            '    for (long long i = 0; i < n; i++) { std::cin >> x; total += x; }\n'
+            '    std::cout << total << std::endl;\n    return 0;\n}\n'
+        ),
+        'compile_heavy': (
+            'long long f__I__(long long x) {\n'
+            '    std::vector<long long> v{x * __I__, __I__};\n    std::sort(v.begin(), v.end());\n'
+            '    std::map<long long, long long> m;\n    m[v[0]] = v[0] + v[1];\n'
+            '    return m.begin()->second % 1000003;\n}\n',
+            '    s += f__I__(1);\n',
+            '#include <algorithm>\n#include <iostream>\n#include <map>\n#include <vector>\n\n'
+            '__FUNCTIONS__\nint main() {\n    long long s = 0;\n__CALLS__    std::cout << s << std::endl;\n    return 0;\n}\n'
+        ),
+    },
+    'c': {
+        'cpu_bound': (
+            '#include <stdio.h>\n\nint main() {\n    long long n, s = 0;\n    scanf("%lld", &n);\n'
+            '    for (long long i = 0; i < n; i++) s = (s * 31 + i) % 1000003;\n'
+            '    printf("%lld\\n", s);\n    return 0;\n}\n'
+        ),
+        'output_heavy': (
+            '#include <stdio.h>\n\nint main() {\n    long long n;\n    scanf("%lld", &n);\n'
+            '    for (long long i = 0; i < n; i++) printf("%lld\\n", i);\n    return 0;\n}\n'
+        ),
+        'stdin_heavy': (
+            '#include <stdio.h>\n\nint main() {\n    long long n, x, total = 0;\n    scanf("%lld", &n);\n'
+            '    for (long long i = 0; i < n; i++) { scanf("%lld", &x); total += x; }\n'
+            '    printf("%lld\\n", total);\n    return 0;\n}\n'
+        ),
+        'compile_heavy': (
+            'static long long f__I__(long long x) { return (x * __I__ + __I__) % 1000003; }\n',
+            '    s += f__I__(1);\n',
+            '#include <stdio.h>\n\n__FUNCTIONS__\nint main() {\n    long long s = 0;\n__CALLS__'
+            '    printf("%lld\\n", s);\n    return 0;\n}\n'
+        ),
+    },
+    'csharp': {
+        'cpu_bound': (
+            'using System;\n\nclass Program {\n    static void Main() {\n'
+            '        long n = long.Parse(Console.ReadLine().Trim());\n        long s = 0;\n'
+            '        for (long i = 0; i < n; i++) s = (s * 31 + i) % 1000003;\n'
+            '        Console.WriteLine(s);\n    }\n}\n'
+        ),
+        'output_heavy': (
+            'using System;\nusing System.Text;\n\nclass Program {\n    static void Main() {\n'
+            '        int n = int.Parse(Console.ReadLine().Trim());\n        var sb = new StringBuilder();\n'
+            '        for (int i = 0; i < n; i++) sb.Append(i).Append(\'\\n\');\n'
+            '        Console.Write(sb.ToString());\n    }\n}\n'
+        ),
+        'stdin_heavy': (
+            'using System;\n\nclass Program {\n    static void Main() {\n'
+            '        int n = int.Parse(Console.ReadLine().Trim());\n        long total = 0;\n'
+            '        for (int i = 0; i < n; i++) total += long.Parse(Console.ReadLine().Trim());\n'
+            '        Console.WriteLine(total);\n    }\n}\n'
+        ),
+        'compile_heavy': (
+            '    static long F__I__(long x) { return (x * __I__ + __I__) % 1000003; }\n',
+            '        s += F__I__(1);\n',
+            'using System;\n\nclass Program {\n__FUNCTIONS__\n    static void Main() {\n'
+            '        long s = 0;\n__CALLS__        Console.WriteLine(s);\n    }\n}\n'
+        ),
+    },
+    'ruby': {
+        'cpu_bound': 'n = gets.to_i\ns = 0\nn.times { |i| s = (s * 31 + i) % 1000003 }\nputs s\n',
+        'output_heavy': 'n = gets.to_i\nputs (0...n).to_a.join("\\n")\n',
+        'stdin_heavy': 'n = gets.to_i\ntotal = 0\nn.times { total += gets.to_i }\nputs total\n',
+        'compile_heavy': (
+            'def f__I__(x)\n  (x * __I__ + __I__) % 1000003\nend\n\n',
+            's += f__I__(1)\n',
+            '__FUNCTIONS__s = 0\n__CALLS__puts s\n'
+        ),
+    },
+    'go': {
+        'cpu_bound': (
+            'package main\n\nimport (\n    "bufio"\n    "fmt"\n    "os"\n)\n\nfunc main() {\n'
+            '    var n int64\n    fmt.Fscan(bufio.NewReader(os.Stdin), &n)\n    var s int64\n'
+            '    for i := int64(0); i < n; i++ {\n        s = (s*31 + i) % 1000003\n    }\n    fmt.Println(s)\n}\n'
+        ),
+        'output_heavy': (
+            'package main\n\nimport (\n    "bufio"\n    "fmt"\n    "os"\n)\n\nfunc main() {\n'
+            '    var n int64\n    fmt.Fscan(bufio.NewReader(os.Stdin), &n)\n    w := bufio.NewWriter(os.Stdout)\n'
+            '    defer w.Flush()\n    for i := int64(0); i < n; i++ {\n        fmt.Fprintln(w, i)\n    }\n}\n'
+        ),
+        'stdin_heavy': (
+            'package main\n\nimport (\n    "bufio"\n    "fmt"\n    "os"\n)\n\nfunc main() {\n'
+            '    reader := bufio.NewReader(os.Stdin)\n    var n, x, total int64\n    fmt.Fscan(reader, &n)\n'
+            '    for i := int64(0); i < n; i++ {\n        fmt.Fscan(reader, &x)\n        total += x\n    }\n'
+            '    fmt.Println(total)\n}\n'
+        ),
+        'compile_heavy': (
+            'func f__I__(x int64) int64 { return (x*__I__ + __I__) % 1000003 }\n',
+            '    s += f__I__(1)\n',
+            'package main\n\nimport "fmt"\n\n__FUNCTIONS__\nfunc main() {\n    var s int64\n__CALLS__'
+            '    fmt.Println(s)\n}\n'
+        ),
+    },
+    'php': {
+        'cpu_bound': (
+            '<?php\n$n = (int)trim(fgets(STDIN));\n$s = 0;\n'
+            'for ($i = 0; $i < $n; $i++) { $s = ($s * 31 + $i) % 1000003; }\necho $s . "\\n";\n'
+        ),
+        'output_heavy': (
+            '<?php\n$n = (int)trim(fgets(STDIN));\n$out = [];\n'
+            'for ($i = 0; $i < $n; $i++) { $out[] = $i; }\necho implode("\\n", $out) . "\\n";\n'
+        ),
+        'stdin_heavy': (
+            '<?php\n$n = (int)trim(fgets(STDIN));\n$total = 0;\n'
+            'for ($i = 0; $i < $n; $i++) { $total += (int)trim(fgets(STDIN)); }\necho $total . "\\n";\n'
+        ),
+        'compile_heavy': (
+            'function f__I__($x) { return ($x * __I__ + __I__) % 1000003; }\n',
+            '$s += f__I__(1);\n',
+            '<?php\n__FUNCTIONS__$s = 0;\n__CALLS__echo $s . "\\n";\n'
+        ),
+    },
+    'swift': {
+        'cpu_bound': (
+            'let n = Int(readLine()!)!\nvar s = 0\nfor i in 0..<n {\n    s = (s * 31 + i) % 1000003\n}\nprint(s)\n'
+        ),
+        'output_heavy': (
+            'let n = Int(readLine()!)!\nvar out = [String]()\nout.reserveCapacity(n)\n'
+            'for i in 0..<n {\n    out.append(String(i))\n}\nprint(out.joined(separator: "\\n"))\n'
+        ),
+        'stdin_heavy': (
+            'let n = Int(readLine()!)!\nvar total = 0\nfor _ in 0..<n {\n    total += Int(readLine()!)!\n}\nprint(total)\n'
+        ),
+        'compile_heavy': (
+            'func f__I__(_ x: Int) -> Int { return (x * __I__ + __I__) % 1000003 }\n',
+            's += f__I__(1)\n',
+            '__FUNCTIONS__var s = 0\n__CALLS__print(s)\n'
+        ),
+    },
+    'kotlin': {
+        'cpu_bound': (
+            'fun main() {\n    val n = readLine()!!.trim().toLong()\n    var s = 0L\n'
+            '    for (i in 0 until n) s = (s * 31 + i) % 1000003\n    println(s)\n}\n'
+        ),
+        'output_heavy': (
+            'fun main() {\n    val n = readLine()!!.trim().toInt()\n    val sb = StringBuilder()\n'
+            '    for (i in 0 until n) sb.append(i).append(\'\\n\')\n    print(sb)\n}\n'
+        ),
+        'stdin_heavy': (
+            'fun main() {\n    val n = readLine()!!.trim().toInt()\n    var total = 0L\n'
+            '    repeat(n) { total += readLine()!!.trim().toLong() }\n    println(total)\n}\n'
+        ),
+        'compile_heavy': (
+            'fun f__I__(x: Long): Long = (x * __I__ + __I__) % 1000003\n',
+            '    s += f__I__(1)\n',
+            '__FUNCTIONS__\nfun main() {\n    var s = 0L\n__CALLS__    println(s)\n}\n'
+        ),
+    },
+    'rust': {
+        'cpu_bound': (
+            'use std::io::Read;\n\nfn main() {\n    let mut input = String::new();\n'
+            '    std::io::stdin().read_to_string(&mut input).unwrap();\n'
+            '    let n: u64 = input.trim().parse().unwrap();\n    let mut s: u64 = 0;\n'
+            '    for i in 0..n {\n        s = (s * 31 + i) % 1000003;\n    }\n    println!("{}", s);\n}\n'
+        ),
+        'output_heavy': (
+            'use std::io::{Read, Write};\n\nfn main() {\n    let mut input = String::new();\n'
+            '    std::io::stdin().read_to_string(&mut input).unwrap();\n'
+            '    let n: u64 = input.trim().parse().unwrap();\n    let stdout = std::io::stdout();\n'
+            '    let mut w = std::io::BufWriter::new(stdout.lock());\n'
+            '    for i in 0..n {\n        writeln!(w, "{}", i).unwrap();\n    }\n}\n'
+        ),
+        'stdin_heavy': (
+            'use std::io::Read;\n\nfn main() {\n    let mut input = String::new();\n'
+            '    std::io::stdin().read_to_string(&mut input).unwrap();\n'
+            '    let mut tokens = input.split_whitespace();\n'
+            '    let n: usize = tokens.next().unwrap().parse().unwrap();\n'
+            '    let total: i64 = tokens.take(n).map(|t| t.parse::<i64>().unwrap()).sum();\n'
+            '    println!("{}", total);\n}\n'
+        ),
+        'compile_heavy': (
+            'fn f__I__(x: u64) -> u64 { (x * __I__ + __I__) % 1000003 }\n',
+            '    s += f__I__(1);\n',
+            '__FUNCTIONS__\nfn main() {\n    let mut s: u64 = 0;\n__CALLS__    println!("{}", s);\n}\n'
+        ),
+    },
+}
+
+WORKLOADS = ['compile_heavy', 'cpu_bound', 'output_heavy', 'stdin_heavy']
+TARGETS = ['api', 'local', 'judge0']
+
+
+# Workload Construction
+def build_case(language, workload, scale, seed=0):
+    """
+    Build one benchmark case.
+
+    Returns:
+        Dictionary with code, stdin and a check(output) function
+    """
+    template = PROGRAMS[language][workload]
+
+    if workload == 'compile_heavy':
+        function, call, wrapper = template
+        count = max(1, int(COMPILE_FUNCTIONS * scale))
+        code = (wrapper
+                .replace('__FUNCTIONS__', ''.join(function.replace('__I__', str(i)) for i in range(count)))
+                .replace('__CALLS__', ''.join(call.replace('__I__', str(i)) for i in range(count))))
+        expected = str(sum((i + i) % MODULUS for i in range(count)))
+        return {'code': code, 'stdin': '', 'check': lambda output: output.strip() == expected}
+
+    if workload == 'cpu_bound':
+        n = max(1, int(CPU_ITERATIONS * scale))
+        s = 0
+        for i in range(n):
+            s = (s * 31 + i) % MODULUS
+        expected = str(s)
+        return {'code': template, 'stdin': f'{n}\n', 'check': lambda output: output.strip() == expected}
+
+    if workload == 'output_heavy':
+        n = max(1, int(OUTPUT_LINES * scale))
+        expected = '\n'.join(str(i) for i in range(n))
+        # Outputs above the API's MAX_OUTPUT_SIZE come back truncated; compare the part we got
+        return {
+            'code': template,
+            'stdin': f'{n}\n',
+            'check': lambda output: bool(output.strip()) and expected.startswith(output.strip())
+        }
+
+    n = max(1, int(STDIN_LINES * scale))
+    rng = random.Random(seed)
+    numbers = [rng.randint(0, 1_000_000) for _ in range(n)]
+    expected = str(sum(numbers))
+    stdin = f'{n}\n' + '\n'.join(map(str, numbers)) + '\n'
+    return {'code': template, 'stdin': stdin, 'check': lambda output: output.strip() == expected}
+
+
+# Runners
+def make_runner(target, args):
+    """
+    Get a function (language, code, stdin) -> (success, backend, error) for a target.
+    """
+    if target == 'api':
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max(args.concurrency))
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        headers = {'Authorization': f'Bearer {args.token}'} if args.token else {}
+
+        def run_api(language, code, stdin):
+            response = session.post(f'{args.url}/execute', headers=headers, timeout=args.timeout, json={
+                'code': code, 'language': language, 'input': stdin,
+                'no_cache': True, 'profile': args.profile
+            })
+            body = response.json()
+            if response.status_code != 200:
+                return None, None, body.get('error') or f'HTTP {response.status_code}'
+            return body, body.get('backend'), None
+
+        return run_api
+
+    # Direct backend runs use the service in-process (run from the backend directory)
+    from app.services.execution_service import ExecutionService
+
+    if target == 'local':
+        def run_local(language, code, stdin):
+            result = ExecutionService.execute_locally(code, language, stdin, profile=args.profile)
+            return result, 'local', None
+        return run_local
+
+    def run_judge0(language, code, stdin):
+        result, error = ExecutionService.execute_with_judge0(code, language, stdin, profile=args.profile)
+        return result, 'judge0', error
+    return run_judge0
+
+
+def target_languages(target, languages, args):
+    """Drop languages a target cannot run here, printing why."""
+    if target == 'local':
+        from app.services.execution_service import SUPPORTED_LANGUAGES
+        usable = []
+        for language in languages:
+            missing = [b for b in SUPPORTED_LANGUAGES[language]['requires'] if shutil.which(b) is None]
+            if missing:
+                print(f'  skip local/{language}: missing {", ".join(missing)}')
+            else:
+                usable.append(language)
+        return usable
+
+    if target == 'judge0':
+        from app.services.execution_service import JUDGE0_API_URL, JUDGE0_LANGUAGES
+        try:
+            installed = {item.get('id') for item in requests.get(f'{JUDGE0_API_URL}/languages', timeout=5).json()}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f'  skip judge0: unreachable ({str(e)[:80]})')
+            return []
+        return [language for language in languages if JUDGE0_LANGUAGES.get(language) in installed]
+
+    return languages
+
+
+# Measurement
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(runner, language, case, concurrency, total, warmup, timeout):
+    """Run one benchmark cell and summarize it."""
+    def one():
+        start = time.perf_counter()
+        try:
+            result, backend, error = runner(language, case['code'], case['stdin'])
+        except Exception as e:
+            result, backend, error = None, None, f'{type(e).__name__}: {str(e)[:200]}'
+        elapsed = time.perf_counter() - start
+
+        if result is not None and not result.get('success'):
+            error = (result.get('error') or 'run failed')[:200]
+        elif result is not None and not case['check'](result.get('output') or ''):
+            error = 'wrong output'
+        return {'latency': elapsed, 'ok': result is not None and error is None, 'backend': backend, 'error': error}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: one(), range(warmup)))
+
+        start = time.perf_counter()
+        runs = list(pool.map(lambda _: one(), range(total)))
+        wall = time.perf_counter() - start
+
+    latencies = [run['latency'] * 1000 for run in runs]
+    errors = [run for run in runs if not run['ok']]
+    backends = {}
+    for run in runs:
+        if run['backend']:
+            backends[run['backend']] = backends.get(run['backend'], 0) + 1
+
+    return {
+        'requests': total,
+        'errors': len(errors),
+        'error_rate': round(len(errors) / total, 4),
+        'throughput_rps': round(len(runs) / wall, 3) if wall > 0 else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50), 2),
+            'p95': round(percentile(latencies, 0.95), 2),
+            'p99': round(percentile(latencies, 0.99), 2),
+            'mean': round(sum(latencies) / len(latencies), 2),
+            'max': round(max(latencies), 2)
+        },
+        'backends': backends,
+        'sample_error': errors[0]['error'] if errors else None
+    }
+
+
+def cell_key(row):
+    """Key that identifies a cell across runs."""
+    return f"{row['target']}/{row['language']}/{row['workload']}/c{row['concurrency']}"
+
+
+# Baseline Comparison
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline run.
+
+    Returns:
+        List of regression descriptions
+    """
+    previous = {cell_key(row): row for row in baseline.get('results', [])}
+    regressions = []
+
+    for row in results:
+        key = cell_key(row)
+        old = previous.get(key)
+        if old is None:
+            continue
+
+        old_p95, new_p95 = old['latency_ms']['p95'], row['latency_ms']['p95']
+        if new_p95 > old_p95 * (1 + threshold) and new_p95 - old_p95 > MIN_LATENCY_DELTA_MS:
+            regressions.append(f'{key}: p95 {old_p95}ms -> {new_p95}ms')
+
+        old_rps, new_rps = old.get('throughput_rps'), row.get('throughput_rps')
+        if old_rps and new_rps is not None and new_rps < old_rps * (1 - threshold):
+            regressions.append(f'{key}: throughput {old_rps} -> {new_rps} req/s')
+
+        if row['error_rate'] - old['error_rate'] > MAX_ERROR_RATE_DELTA:
+            regressions.append(f"{key}: error rate {old['error_rate']:.1%} -> {row['error_rate']:.1%}")
+
+    return regressions
+
+
+def git_commit():
+    """Get the current commit, if the tree is a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark code execution across languages and backends.')
+    parser.add_argument('--target', nargs='+', choices=TARGETS, default=['local'],
+                        help='api = POST /api/execute, local / judge0 = ExecutionService backends directly')
+    parser.add_argument('--languages', nargs='+', choices=sorted(PROGRAMS), default=sorted(PROGRAMS))
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--requests', type=int, default=None,
+                        help='measured requests per cell (default: 3 x concurrency, at least 5)')
+    parser.add_argument('--warmup', type=int, default=1, help='unmeasured requests per cell')
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplier for workload sizes')
+    parser.add_argument('--profile', choices=['quick', 'bench'], default='quick', help='compile profile')
+    parser.add_argument('--url', default=API_URL, help='API base URL for the api target')
+    parser.add_argument('--token', default=os.getenv('BENCH_TOKEN'), help='JWT for the api target (or BENCH_TOKEN)')
+    parser.add_argument('--timeout', type=float, default=120, help='per-request HTTP timeout (seconds)')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against a previous --output file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='relative p95/throughput change counted as a regression')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    print("=" * 70)
+    print("  Execution Benchmark")
+    print("=" * 70)
+
+    cases = {
+        (language, workload): build_case(language, workload, args.scale)
+        for language in args.languages for workload in args.workloads
+    }
+    results = []
+
+    for target in args.target:
+        runner = make_runner(target, args)
+        for language in target_languages(target, args.languages, args):
+            for workload in args.workloads:
+                for concurrency in args.concurrency:
+                    total = args.requests or max(5, 3 * concurrency)
+                    print(f"\n{target:7} {language:11} {workload:14} c={concurrency:<3}", end=" ", flush=True)
+                    row = {'target': target, 'language': language, 'workload': workload,
+                           'concurrency': concurrency}
+                    row.update(measure(runner, language, cases[(language, workload)], concurrency,
+                                       total, args.warmup, args.timeout))
+                    results.append(row)
+                    latency = row['latency_ms']
+                    print(f"p50={latency['p50']:.0f}ms p95={latency['p95']:.0f}ms p99={latency['p99']:.0f}ms "
+                          f"{row['throughput_rps']} req/s errors={row['error_rate']:.0%} {row['backends']}")
+                    if row['sample_error']:
+                        print(f"  {row['sample_error']}")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'host': platform.node(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scale': args.scale,
+            'profile': args.profile
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    print("\n" + "=" * 70)
+    print(f"  {len(results)} cells, {sum(row['errors'] for row in results)} failed requests")
+    print("=" * 70)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nRegressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
@@ -0,0 +1,91 @@
+"""
+Benchmark /api/history page latency at increasing depths, skip vs cursor,
+and the page payload of the full and summary views.
+
+Seeds a throwaway user with N generations in the configured database, fetches
+one page at several depths with both pagination modes, prints the median
+latency per depth and removes the seeded data again.
+
+Run:
+    python benchmark_history.py --documents 20000
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+from app.services.db_service import DatabaseService, GENERATION_SCHEMA_VERSION
+
+DEPTHS = [0, 0.01, 0.1, 0.5, 0.9, 0.99]
+
+
+def seed(db, user_id, documents):
+    """Insert documents generations for user_id, newest last."""
+    start = datetime.utcnow() - timedelta(seconds=documents)
+    code = 'def solve(values):\n    return sorted(values)\n' * 10
+    for offset in range(0, documents, 1000):
+        db.code_generations.insert_many([{
+            'user_id': user_id,
+            'prompt': f'Benchmark prompt {i}',
+            'language': 'python',
+            'generated_code': code,
+            'explanation': 'Sorts the values.',
+            'history': {'action_type': 'generate', 'prompt_preview': f'Benchmark prompt {i}'},
+            'created_at': start + timedelta(seconds=i),
+            'refinements': [{'note': 'Handle empty input', 'timestamp': start + timedelta(seconds=i)}] * 3,
+            'success': True,
+            'schema_version': GENERATION_SCHEMA_VERSION
+        } for i in range(offset, min(offset + 1000, documents))])
+
+
+def timed(operation, repeats):
+    """Median wall time of an operation in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        operation()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark history pagination.')
+    parser.add_argument('--documents', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    db = DatabaseService.get_db()
+    user = ObjectId()
+    user_id = str(user)
+
+    print(f"Seeding {args.documents} generations...")
+    seed(db, user, args.documents)
+
+    try:
+        print(f"\n{'depth':>8} {'skip':>12} {'cursor':>12}")
+        for fraction in DEPTHS:
+            depth = int(args.documents * fraction)
+            cursor = None
+            if depth:
+                # Cursor of the entry just before this depth, as a client would hold it
+                previous = db.code_generations.find({'user_id': user}).sort(
+                    [('created_at', -1), ('_id', -1)]).skip(depth - 1).limit(1)[0]
+                cursor = DatabaseService.encode_history_cursor(previous)
+
+            skip_ms = timed(lambda: DatabaseService.get_user_history_page(
+                user_id, limit=args.limit, skip=depth), args.repeats)
+            cursor_ms = timed(lambda: DatabaseService.get_user_history_page(
+                user_id, limit=args.limit, cursor=cursor), args.repeats)
+            print(f"{depth:>8} {skip_ms:>10.2f}ms {cursor_ms:>10.2f}ms")
+
+        print(f"\n{'view':>8} {'latency':>12} {'payload':>12}")
+        for view in ('full', 'summary'):
+            fetch = lambda: DatabaseService.get_user_history_page(user_id, limit=args.limit, summary=view == 'summary')
+            payload = len(json.dumps(fetch(), default=str))
+            print(f"{view:>8} {timed(fetch, args.repeats):>10.2f}ms {payload:>10}B")
+    finally:
+        db.code_generations.delete_many({'user_id': user})
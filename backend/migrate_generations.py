@@ -0,0 +1,249 @@
+"""
+Embed explanations and history metadata into code_generations documents,
+backfill the fields derived for history search and similarity, and move
+code/explanation bodies into the content-addressed blob store.
+
+Online and resumable: the API reads both layouts, so this can run while the
+app is serving traffic. Generations are migrated in _id order in batches;
+each batch is one bulk_write, after which the moved explanations/history
+rows are deleted.
+
+Run:
+    python migrate_generations.py                 # migrate everything
+    python migrate_generations.py --dry-run       # count what would change
+    python migrate_generations.py --measure 200   # before/after save+read latency
+    python migrate_generations.py --storage       # storage report only
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from app.services.blob_store import BlobStore
+from app.services.db_service import DatabaseService, GENERATION_SCHEMA_VERSION, PROMPT_PREVIEW_LENGTH
+from app.services.similarity_service import SimilarityService
+
+
+def migrate(db, batch_size, min_age, dry_run):
+    """Migrate all legacy generations older than min_age seconds."""
+    # Leave very recent documents alone: an old app instance may still be
+    # writing their explanation/history rows during a rolling deploy.
+    cutoff = datetime.utcnow() - timedelta(seconds=min_age)
+    query = {'schema_version': {'$exists': False}, 'created_at': {'$lt': cutoff}}
+    print(f"Legacy generations to migrate: {db.code_generations.count_documents(query)}")
+    if dry_run:
+        return
+
+    migrated, last_id = 0, None
+    while True:
+        batch_query = dict(query, **({'_id': {'$gt': last_id}} if last_id else {}))
+        batch = list(db.code_generations.find(batch_query, {'prompt': 1, 'translated_from': 1})
+                     .sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+
+        ids = [generation['_id'] for generation in batch]
+        explanations = {doc['generation_id']: doc.get('explanation_text', '')
+                        for doc in db.explanations.find({'generation_id': {'$in': ids}})}
+        history = {doc['generation_id']: doc
+                   for doc in db.history.find({'generation_id': {'$in': ids}}).sort('timestamp', 1)}
+
+        operations = []
+        for generation in batch:
+            entry = history.get(generation['_id'], {})
+            prompt = generation.get('prompt') or ''
+            operations.append(UpdateOne(
+                {'_id': generation['_id'], 'schema_version': {'$exists': False}},
+                {'$set': {
+                    'explanation': explanations.get(generation['_id'], ''),
+                    'history': {
+                        'action_type': entry.get('action_type') or
+                        ('translate' if generation.get('translated_from') else 'generate'),
+                        'prompt_preview': entry.get('metadata', {}).get('prompt_preview', prompt[:PROMPT_PREVIEW_LENGTH])
+                    },
+                    'schema_version': GENERATION_SCHEMA_VERSION
+                }}
+            ))
+
+        db.code_generations.bulk_write(operations, ordered=False)
+        db.explanations.delete_many({'generation_id': {'$in': ids}})
+        db.history.delete_many({'generation_id': {'$in': ids}})
+
+        migrated += len(batch)
+        last_id = ids[-1]
+        print(f"  migrated {migrated}")
+
+    print(f"Done: {migrated} generations migrated")
+
+
+def backfill_derived_fields(db, batch_size, dry_run):
+    """Set search identifiers and LSH band keys on generations saved before they existed."""
+    query = {'$or': [{'code_identifiers': {'$exists': False}}, {'code_bands': {'$exists': False}}]}
+    print(f"Generations without search/similarity fields: {db.code_generations.count_documents(query)}")
+    if dry_run:
+        return
+
+    updated, last_id = 0, None
+    while True:
+        batch_query = dict(query, **({'_id': {'$gt': last_id}} if last_id else {}))
+        batch = list(db.code_generations.find(batch_query, {'generated_code': 1, 'code_ref': 1, 'prompt': 1})
+                     .sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        DatabaseService._resolve_bodies(batch)
+
+        db.code_generations.bulk_write([
+            UpdateOne({'_id': generation['_id']}, {'$set': {
+                'code_identifiers': DatabaseService.extract_code_identifiers(generation.get('generated_code', '')),
+                'code_bands': SimilarityService.code_bands(generation.get('generated_code', '')),
+                'prompt_bands': SimilarityService.prompt_bands(generation.get('prompt', ''))
+            }})
+            for generation in batch
+        ], ordered=False)
+
+        updated += len(batch)
+        last_id = batch[-1]['_id']
+        print(f"  indexed {updated}")
+
+    print(f"Done: {updated} generations indexed for search and similarity")
+
+
+def move_bodies(db, batch_size, dry_run):
+    """Replace inline generated_code / explanation bodies with blob store references."""
+    query = {'$or': [{'generated_code': {'$exists': True}}, {'explanation': {'$exists': True}}]}
+    print(f"Generations with inline bodies: {db.code_generations.count_documents(query)}")
+    if dry_run:
+        return
+
+    moved, last_id = 0, None
+    while True:
+        batch_query = dict(query, **({'_id': {'$gt': last_id}} if last_id else {}))
+        batch = list(db.code_generations.find(batch_query, {'generated_code': 1, 'explanation': 1})
+                     .sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+
+        # Every body of the batch is referenced (one bulk write) before the inline
+        # copies go, so a crash leaves at worst extra refs
+        bodies = [(generation['_id'], field, generation[field]) for generation in batch
+                  for field in ('generated_code', 'explanation') if field in generation]
+        keys = BlobStore.put_many(db, [text for _, _, text in bodies])
+
+        updates = {}
+        for (generation_id, field, text), key in zip(bodies, keys):
+            fields, unset = updates.setdefault(generation_id, ({}, {}))
+            if field == 'generated_code':
+                fields.update(code_ref=key, code_size=len(text))
+            else:
+                fields['explanation_ref'] = key
+            unset[field] = ''
+        operations = [UpdateOne({'_id': generation_id}, {'$set': fields, '$unset': unset})
+                      for generation_id, (fields, unset) in updates.items()]
+
+        db.code_generations.bulk_write(operations, ordered=False)
+        moved += len(batch)
+        last_id = batch[-1]['_id']
+        print(f"  moved {moved}")
+
+    print(f"Done: {moved} generations moved to the blob store")
+
+
+def storage_report(db):
+    """Print the data and on-disk size of code_generations and blobs."""
+    total_size = total_storage = 0
+    for name in ('code_generations', 'blobs'):
+        try:
+            stats = db.command('collStats', name)
+        except Exception as e:
+            print(f"  {name}: unavailable ({str(e)})")
+            continue
+        total_size += stats.get('size', 0)
+        total_storage += stats.get('storageSize', 0)
+        print(f"  {name:18} docs={stats.get('count', 0):>8} data={stats.get('size', 0) / 1e6:>9.2f}MB "
+              f"avg={stats.get('avgObjSize', 0):>7.0f}B disk={stats.get('storageSize', 0) / 1e6:>9.2f}MB")
+    print(f"  {'total':18} {'':>13} data={total_size / 1e6:>9.2f}MB {'':>12} disk={total_storage / 1e6:>9.2f}MB")
+
+
+def measure(db, runs):
+    """
+    Time save + read of a generation with the old three-collection layout and
+    the consolidated one, on scratch collections of the same database.
+    """
+    user_id = ObjectId()
+    prompt = 'Write a function that returns the n-th Fibonacci number ' * 3
+    code = 'def fib(n):\n    a, b = 0, 1\n    for _ in range(n):\n        a, b = b, a + b\n    return a\n' * 5
+    explanation = 'Iterative Fibonacci using two running values. ' * 20
+    generations, explanations, history = (db['_bench_generations'], db['_bench_explanations'],
+                                          db['_bench_history'])
+    explanations.create_index('generation_id')
+
+    def legacy():
+        timestamp = datetime.utcnow()
+        generation_id = generations.insert_one({
+            'user_id': user_id, 'prompt': prompt, 'language': 'python',
+            'generated_code': code, 'created_at': timestamp, 'success': True
+        }).inserted_id
+        explanations.insert_one({'generation_id': generation_id, 'explanation_text': explanation,
+                                 'created_at': timestamp})
+        history.insert_one({'user_id': user_id, 'generation_id': generation_id, 'action_type': 'generate',
+                            'timestamp': timestamp,
+                            'metadata': {'language': 'python', 'prompt_preview': prompt[:PROMPT_PREVIEW_LENGTH]}})
+        saved = time.perf_counter()
+        generations.find_one({'_id': generation_id, 'user_id': user_id})
+        explanations.find_one({'generation_id': generation_id})
+        return saved
+
+    def consolidated():
+        generation_id = generations.insert_one({
+            'user_id': user_id, 'prompt': prompt, 'language': 'python', 'generated_code': code,
+            'explanation': explanation,
+            'history': {'action_type': 'generate', 'prompt_preview': prompt[:PROMPT_PREVIEW_LENGTH]},
+            'created_at': datetime.utcnow(), 'success': True, 'schema_version': GENERATION_SCHEMA_VERSION
+        }).inserted_id
+        saved = time.perf_counter()
+        generations.find_one({'_id': generation_id, 'user_id': user_id})
+        return saved
+
+    try:
+        for name, operation in (('before (3 writes + 2 reads)', legacy), ('after (1 write + 1 read)', consolidated)):
+            saves, reads = [], []
+            for _ in range(runs):
+                start = time.perf_counter()
+                saved = operation()
+                saves.append((saved - start) * 1000)
+                reads.append((time.perf_counter() - saved) * 1000)
+            print(f"{name:28} save p50={statistics.median(saves):.2f}ms "
+                  f"p95={sorted(saves)[int(0.95 * (runs - 1))]:.2f}ms | "
+                  f"read p50={statistics.median(reads):.2f}ms p95={sorted(reads)[int(0.95 * (runs - 1))]:.2f}ms")
+    finally:
+        for collection in (generations, explanations, history):
+            collection.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Migrate code_generations to the current document layout.')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--min-age', type=int, default=300,
+                        help='skip generations newer than this many seconds')
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--measure', type=int, metavar='RUNS',
+                        help='only measure save/read latency of both layouts')
+    parser.add_argument('--storage', action='store_true', help='only print the storage report')
+    args = parser.parse_args()
+
+    database = DatabaseService.get_db()
+    if args.measure:
+        measure(database, args.measure)
+    elif args.storage:
+        storage_report(database)
+    else:
+        print("Storage before:")
+        storage_report(database)
+        migrate(database, args.batch_size, args.min_age, args.dry_run)
+        backfill_derived_fields(database, args.batch_size, args.dry_run)
+        move_bodies(database, args.batch_size, args.dry_run)
+        print("Storage after:")
+        storage_report(database)
@@ -0,0 +1,31 @@
+"""
+Rebuild per-user statistics and usage rollups from code_generations.
+
+Totals are maintained incrementally on save, delete and refine; run this to
+correct drift (e.g. after failed stats writes or manual data fixes).
+
+Run:
+    python repair_user_stats.py                  # every user
+    python repair_user_stats.py --user <user_id>
+"""
+import argparse
+
+from app.services.db_service import DatabaseService
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rebuild user_stats and user_stats_rollups.')
+    parser.add_argument('--user', help='only rebuild this user')
+    args = parser.parse_args()
+
+    db = DatabaseService.get_db()
+    user_ids = [args.user] if args.user else sorted(
+        {str(user['_id']) for user in db.users.find({}, {'_id': 1})} |
+        {str(user_id) for user_id in db.code_generations.distinct('user_id')}
+    )
+
+    for index, user_id in enumerate(user_ids, 1):
+        stats = DatabaseService.rebuild_user_stats(user_id)
+        print(f"  [{index}/{len(user_ids)}] {user_id}: {stats['total_generations']} generations, {stats['actions']}")
+
+    print(f"Done: {len(user_ids)} users rebuilt")
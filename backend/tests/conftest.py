@@ -0,0 +1,21 @@
+"""
+Test Fixtures - In-Memory MongoDB for the Database Services
+"""
+from collections import OrderedDict
+
+import pytest
+
+from app.services.db_service import DatabaseService
+from app.services.write_behind import WriteBehindBuffer
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Point DatabaseService at a fresh mongomock database (buffered writes applied immediately)."""
+    mongomock = pytest.importorskip('mongomock')
+    monkeypatch.setenv('WRITE_BEHIND_ENABLED', 'false')
+    monkeypatch.setattr(WriteBehindBuffer, '_pending', OrderedDict())
+    monkeypatch.setattr(DatabaseService, '_client', mongomock.MongoClient())
+    monkeypatch.setattr(DatabaseService, '_db', DatabaseService._client['code_generator'])
+    DatabaseService._create_indexes()
+    return DatabaseService._db
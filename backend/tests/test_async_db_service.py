@@ -0,0 +1,69 @@
+"""
+Async Database Service Tests - Mirrored Method Surface and Awaitable Calls
+"""
+import asyncio
+import inspect
+import threading
+
+from bson.objectid import ObjectId
+
+from app.services.async_db_service import AsyncDatabaseService, SYNC_ONLY_METHODS
+from app.services.db_service import DatabaseService
+
+USER_ID = str(ObjectId())
+
+
+def public_methods(service) -> set:
+    return {name for name, _ in inspect.getmembers(service, inspect.ismethod) if not name.startswith('_')}
+
+
+def test_every_public_database_method_is_mirrored_as_a_coroutine():
+    mirrored = public_methods(DatabaseService) - SYNC_ONLY_METHODS
+    assert mirrored <= public_methods(AsyncDatabaseService)
+    for name in mirrored:
+        method = getattr(AsyncDatabaseService, name)
+        assert inspect.iscoroutinefunction(method), name
+        assert inspect.signature(method) == inspect.signature(getattr(DatabaseService, name)), name
+
+
+def test_sync_only_methods_are_not_mirrored():
+    for name in SYNC_ONLY_METHODS:
+        assert getattr(AsyncDatabaseService, name, None) is None
+
+
+def test_run_awaits_blocking_calls_off_the_event_loop_thread():
+    async def main():
+        return await asyncio.gather(*(AsyncDatabaseService.run(threading.get_ident) for _ in range(4)))
+
+    try:
+        assert threading.get_ident() not in asyncio.run(main())
+    finally:
+        AsyncDatabaseService.shutdown()
+
+
+def test_mirrored_calls_reach_the_database(db):
+    async def main():
+        generation_id = await AsyncDatabaseService.save_generation(USER_ID, 'add', 'python', 'a + b', 'Adds.')
+        generation, history = await asyncio.gather(
+            AsyncDatabaseService.get_generation_by_id(generation_id, user_id=USER_ID),
+            AsyncDatabaseService.get_user_history(USER_ID, limit=5)
+        )
+        return generation_id, generation, history
+
+    try:
+        generation_id, generation, history = asyncio.run(main())
+    finally:
+        AsyncDatabaseService.shutdown()
+    assert generation['generated_code'] == 'a + b'
+    assert [item['generation_id'] for item in history] == [generation_id]
+
+
+def test_mirrored_user_lookup_keeps_the_projection(db):
+    user_id = str(DatabaseService.create_user('ada@example.com', 'hash', 'Ada')['_id'])
+    DatabaseService.save_github_token(user_id, 'token', 'ada')
+
+    try:
+        user = asyncio.run(AsyncDatabaseService.find_user_by_id(user_id, {'github_username': 1}))
+    finally:
+        AsyncDatabaseService.shutdown()
+    assert user == {'_id': ObjectId(user_id), 'github_username': 'ada'}
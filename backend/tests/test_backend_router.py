@@ -0,0 +1,93 @@
+"""
+Backend Router Tests - Latency Ordering, Health and Recovery
+"""
+import pytest
+
+from app.services import backend_router, execution_service
+from app.services.backend_router import BackendRouter
+from app.services.execution_service import ExecutionService
+
+DEFAULT = ['local', 'judge0']
+
+
+@pytest.fixture(autouse=True)
+def router(monkeypatch):
+    """Start every test with no probe results or samples."""
+    monkeypatch.setattr(BackendRouter, '_availability', {})
+    monkeypatch.setattr(BackendRouter, '_samples', {})
+    return BackendRouter
+
+
+def record(backend, latency, count=BackendRouter.MIN_SAMPLES, ok=True, language='python'):
+    for _ in range(count):
+        BackendRouter.record(language, backend, latency, ok)
+
+
+def test_default_order_is_kept_until_every_backend_has_enough_samples():
+    record('judge0', 0.05)
+    record('local', 0.5, count=BackendRouter.MIN_SAMPLES - 1)
+    assert BackendRouter.choose('python', DEFAULT) == DEFAULT
+
+
+def test_healthy_backends_are_ordered_by_p50_latency():
+    record('local', 0.5)
+    record('judge0', 0.05)
+    assert BackendRouter.choose('python', DEFAULT) == ['judge0', 'local']
+    stats = BackendRouter._stats('python', 'judge0')
+    assert (stats['p50_ms'], stats['samples'], stats['error_rate']) == (50.0, BackendRouter.MIN_SAMPLES, 0.0)
+
+
+def test_failing_backends_are_tried_last():
+    record('local', 0.01, ok=False)
+    record('judge0', 0.5)
+    assert BackendRouter.choose('python', DEFAULT) == ['judge0', 'local']
+
+
+def test_unavailable_backends_are_dropped_unless_nothing_is_left():
+    BackendRouter.set_availability('python', 'local', False, 'missing python')
+    assert BackendRouter.choose('python', DEFAULT) == ['judge0']
+    BackendRouter.set_availability('python', 'judge0', False, 'unreachable')
+    assert BackendRouter.choose('python', DEFAULT) == DEFAULT
+
+
+def test_old_failures_age_out(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(backend_router.time, 'time', lambda: now[0])
+    record('local', 0.01, ok=False)
+    record('judge0', 0.5)
+    assert BackendRouter.choose('python', DEFAULT) == ['judge0', 'local']
+
+    now[0] += BackendRouter.SAMPLE_TTL + 1
+    assert BackendRouter._stats('python', 'local')['samples'] == 0
+    assert BackendRouter.choose('python', DEFAULT) == DEFAULT
+
+
+def test_healthy_probe_clears_recorded_failures():
+    BackendRouter.set_availability('python', 'local', True, 'toolchain found')
+    record('local', 0.01, ok=False)
+    assert not BackendRouter._stats('python', 'local')['healthy']
+
+    BackendRouter.set_availability('python', 'local', True, 'toolchain found')
+    assert BackendRouter._stats('python', 'local')['healthy']
+    assert BackendRouter.choose('python', DEFAULT) == DEFAULT
+
+
+def test_saturated_local_runs_overflow_to_judge0(monkeypatch):
+    monkeypatch.setattr(execution_service.Sandbox, 'is_available', classmethod(lambda cls: True))
+    assert ExecutionService._backend_order('cpp') == DEFAULT
+    monkeypatch.setattr(ExecutionService, '_local_in_flight', execution_service.LOCAL_MAX_CONCURRENCY)
+    assert ExecutionService._backend_order('cpp') == ['judge0', 'local']
+
+
+def test_route_falls_back_and_records_every_attempt():
+    def missing_toolchain():
+        raise FileNotFoundError('python')
+
+    result, error = ExecutionService._route('python', 'quick', {
+        'local': missing_toolchain,
+        'judge0': lambda: ({'success': True, 'output': 'ok'}, None)
+    })
+    assert error is None and result['backend'] == 'judge0'
+    assert BackendRouter.get_availability('python', 'local') is False
+    assert BackendRouter._stats('python', 'local')['error_rate'] == 1.0
+    assert BackendRouter._stats('python', 'judge0')['samples'] == 1
@@ -0,0 +1,62 @@
+"""
+Execution Benchmark Tests - Workloads, Summaries and Baseline Comparison
+"""
+import subprocess
+import sys
+
+import pytest
+
+import benchmark_execution as bench
+
+
+def row(p95=100.0, rps=10.0, error_rate=0.0, **key):
+    return dict({'target': 'local', 'language': 'python', 'workload': 'cpu_bound', 'concurrency': 1},
+                latency_ms={'p95': p95}, throughput_rps=rps, error_rate=error_rate, **key)
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert bench.percentile(values, 0.50) == 50
+    assert bench.percentile(values, 0.95) == 95
+    assert bench.percentile([7], 0.99) == 7
+    assert bench.percentile([], 0.5) is None
+
+
+def test_compare_flags_latency_throughput_and_error_regressions():
+    baseline = {'results': [row()]}
+    assert bench.compare([row(p95=110.0, rps=9.0)], baseline, 0.2) == []
+
+    regressions = bench.compare([row(p95=130.0, rps=7.0, error_rate=0.1)], baseline, 0.2)
+    assert len(regressions) == 3
+    assert regressions[0].startswith('local/python/cpu_bound/c1: p95')
+
+
+def test_compare_ignores_small_latency_changes_and_new_cells():
+    baseline = {'results': [row(p95=2.0)]}
+    assert bench.compare([row(p95=6.0)], baseline, 0.2) == []
+    assert bench.compare([row(p95=500.0, concurrency=4)], baseline, 0.2) == []
+
+
+def test_measure_counts_errors_and_wrong_output():
+    case = {'code': '', 'stdin': '', 'check': lambda output: output == 'ok'}
+    answers = iter([{'success': True, 'output': 'ok'}, {'success': True, 'output': 'bad'},
+                    {'success': False, 'error': 'boom'}, None])
+
+    def runner(language, code, stdin):
+        result = next(answers)
+        return result, 'local' if result is not None else None, None if result is not None else 'unavailable'
+
+    summary = bench.measure(runner, 'python', case, concurrency=1, total=4, warmup=0, timeout=5)
+    assert summary['requests'] == 4 and summary['errors'] == 3
+    assert summary['error_rate'] == 0.75
+    assert summary['backends'] == {'local': 3}
+    assert summary['sample_error'] == 'wrong output'
+
+
+@pytest.mark.parametrize('workload', bench.WORKLOADS)
+def test_python_workloads_produce_the_expected_output(workload):
+    case = bench.build_case('python', workload, scale=0.01)
+    run = subprocess.run([sys.executable, '-c', case['code']], input=case['stdin'],
+                         capture_output=True, text=True, timeout=60)
+    assert run.returncode == 0, run.stderr
+    assert case['check'](run.stdout)
@@ -0,0 +1,90 @@
+"""
+Blob Store Tests - Deduplication, Reference Counting and Compression
+"""
+import pytest
+from bson.objectid import ObjectId
+
+import migrate_generations
+from app.services.blob_store import BlobStore
+from app.services.db_service import DatabaseService
+
+USER_ID = str(ObjectId())
+
+
+def test_identical_bodies_share_one_blob(db):
+    keys = BlobStore.put_many(db, ['same', 'other', 'same'])
+    assert keys[0] == keys[2] == BlobStore.key('same') != keys[1]
+    assert BlobStore.put(db, 'same') == keys[0]
+
+    assert db.blobs.find_one({'_id': keys[0]})['refs'] == 3
+    assert db.blobs.find_one({'_id': keys[1]})['refs'] == 1
+    assert BlobStore.get_many(db, keys + [None, 'missing']) == {keys[0]: 'same', keys[1]: 'other'}
+    assert BlobStore.put_many(db, []) == []
+
+
+def test_blob_is_deleted_when_its_last_reference_is_released(db):
+    key = BlobStore.put(db, 'body')
+    BlobStore.put(db, 'body')
+
+    BlobStore.release(db, [key, None])
+    assert db.blobs.find_one({'_id': key})['refs'] == 1
+    BlobStore.release(db, [key])
+    assert db.blobs.count_documents({}) == 0
+    BlobStore.release(db, [])
+
+
+def test_large_bodies_are_compressed(db, monkeypatch):
+    monkeypatch.setattr('app.services.blob_store.zstandard', None)
+    monkeypatch.setenv('BLOB_COMPRESS_MIN_BYTES', '64')
+    small, large, random = 'x = 1\n', 'print("hello")\n' * 100, bytes(range(256)).hex()
+    keys = BlobStore.put_many(db, [small, large, random])
+
+    stored = {blob['_id']: blob for blob in db.blobs.find()}
+    assert stored[keys[0]]['encoding'] == 'raw'
+    assert stored[keys[1]]['encoding'] == 'zlib'
+    assert stored[keys[1]]['stored_size'] < stored[keys[1]]['size'] == len(large)
+    assert BlobStore.get_many(db, keys) == {keys[0]: small, keys[1]: large, keys[2]: random}
+
+
+def test_non_ascii_bodies_round_trip(db):
+    text = 'print("héllo wörld ✓")\n' * 50
+    key = BlobStore.put(db, text)
+    assert BlobStore.get_many(db, [key]) == {key: text}
+
+
+def test_generations_reference_and_release_their_bodies(db):
+    first = DatabaseService.save_generation(USER_ID, 'add', 'python', 'a + b', 'Adds.')
+    second = DatabaseService.save_generation(USER_ID, 'add again', 'python', 'a + b', 'Adds two numbers.')
+    assert db.blobs.find_one({'_id': BlobStore.key('a + b')})['refs'] == 2
+    assert db.blobs.count_documents({}) == 3
+
+    assert DatabaseService.delete_generation(first, USER_ID)
+    assert db.blobs.find_one({'_id': BlobStore.key('a + b')})['refs'] == 1
+    assert db.blobs.find_one({'_id': BlobStore.key('Adds.')}) is None
+    assert DatabaseService.get_generation_by_id(second, USER_ID)['generated_code'] == 'a + b'
+
+
+def test_failed_generation_insert_releases_its_bodies(db, monkeypatch):
+    def fail(document):
+        raise RuntimeError('insert failed')
+    monkeypatch.setattr(db.code_generations, 'insert_one', fail)
+
+    with pytest.raises(RuntimeError):
+        DatabaseService.save_generation(USER_ID, 'add', 'python', 'a + b', 'Adds.')
+    assert db.blobs.count_documents({}) == 0
+
+
+def test_inline_bodies_are_moved_to_the_blob_store(db):
+    generations = [{'user_id': ObjectId(USER_ID), 'generated_code': 'shared', 'explanation': f'text {i}'}
+                   for i in range(3)]
+    db.code_generations.insert_many(generations)
+
+    migrate_generations.move_bodies(db, batch_size=2, dry_run=False)
+
+    assert db.code_generations.count_documents({'generated_code': {'$exists': True}}) == 0
+    assert db.code_generations.count_documents({'explanation': {'$exists': True}}) == 0
+    assert db.blobs.find_one({'_id': BlobStore.key('shared')})['refs'] == 3
+    for generation in generations:
+        stored = DatabaseService.get_generation_by_id(str(generation['_id']))
+        assert (stored['generated_code'], stored['explanation']) == (generation['generated_code'],
+                                                                     generation['explanation'])
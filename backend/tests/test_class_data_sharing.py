@@ -0,0 +1,87 @@
+"""
+Class Data Sharing Tests - Archive Lifecycle and JVM Launch Flags
+"""
+import shutil
+
+import pytest
+
+from app.services import execution_service
+from app.services.class_data_sharing import ClassDataSharing
+from app.services.execution_service import ExecutionService
+
+
+@pytest.fixture
+def cds(monkeypatch, tmp_path):
+    """Keep archives in a temporary directory and build them without a JDK."""
+    builds = []
+
+    def build(archive):
+        builds.append(archive)
+        with open(archive, 'wb') as f:
+            f.write(b'archive')
+
+    monkeypatch.setattr(ClassDataSharing, '_archive', None)
+    monkeypatch.setattr(ClassDataSharing, '_fingerprint', None)
+    monkeypatch.setattr(ClassDataSharing, '_last_error', None)
+    monkeypatch.setattr(ClassDataSharing, '_archive_dir', classmethod(lambda cls: str(tmp_path)))
+    monkeypatch.setattr(ClassDataSharing, '_build', classmethod(lambda cls, archive: build(archive)))
+    monkeypatch.setattr(ClassDataSharing, 'toolchain_fingerprint', classmethod(lambda cls: 'jdk17'))
+    monkeypatch.setattr(ClassDataSharing, 'builds', builds, raising=False)
+    return ClassDataSharing
+
+
+def test_archive_is_built_once_per_toolchain(cds, tmp_path, monkeypatch):
+    archive = cds.ensure_archive()
+    assert archive == str(tmp_path / 'jdk_jdk17.jsa')
+    assert cds.ensure_archive() == archive
+    assert cds.builds == [archive]
+    assert cds.jvm_options() == [f'-XX:SharedArchiveFile={archive}', '-Xshare:auto']
+
+    monkeypatch.setattr(ClassDataSharing, 'toolchain_fingerprint', classmethod(lambda cls: 'jdk21'))
+    upgraded = cds.ensure_archive()
+    assert upgraded == str(tmp_path / 'jdk_jdk21.jsa')
+    assert [path.name for path in tmp_path.iterdir()] == ['jdk_jdk21.jsa']
+
+
+def test_no_flags_without_an_archive(cds, monkeypatch):
+    monkeypatch.setattr(ClassDataSharing, 'toolchain_fingerprint', classmethod(lambda cls: None))
+    assert cds.ensure_archive() is None
+    assert cds.jvm_options() == []
+
+    monkeypatch.setenv('JVM_CDS_ENABLED', 'false')
+    monkeypatch.setattr(ClassDataSharing, 'toolchain_fingerprint', classmethod(lambda cls: 'jdk17'))
+    assert cds.ensure_archive() is None and cds.builds == []
+
+
+def test_failed_builds_are_reported(cds, monkeypatch):
+    def fail(archive):
+        raise RuntimeError('warmup compile failed')
+
+    monkeypatch.setattr(ClassDataSharing, '_build', classmethod(lambda cls, archive: fail(archive)))
+    assert cds.ensure_archive() is None
+    assert cds.status()['last_error'] == 'warmup compile failed'
+    assert cds.jvm_options() == []
+
+
+def test_jvm_programs_launch_with_the_archive(cds, monkeypatch, tmp_path):
+    archive = cds.ensure_archive()
+    monkeypatch.setattr(execution_service.CompilerDaemon, 'compile', classmethod(lambda cls, *args: (0, '')))
+    monkeypatch.setattr(execution_service.CompilerDaemon, 'kotlin_stdlib', classmethod(lambda cls: None))
+    work_dir = tmp_path / 'work'
+    work_dir.mkdir()
+
+    java = ExecutionService.compile_program('public class Main {}', 'java', str(work_dir), 'quick')['command']
+    assert java[:4] == ['java', f'-XX:SharedArchiveFile={archive}', '-Xshare:auto', '-XX:TieredStopAtLevel=1']
+    assert java[-3:] == ['-cp', str(work_dir), 'Main']
+
+    # Without the Kotlin stdlib, the kotlin launcher runs the script and passes the flags on with -J
+    kotlin = ExecutionService.compile_program('fun main() {}', 'kotlin', str(work_dir), 'quick')['command']
+    assert kotlin[:3] == ['kotlin', f'-J-XX:SharedArchiveFile={archive}', '-J-Xshare:auto']
+    assert kotlin[-1] == str(work_dir / 'Main.kt')
+
+
+@pytest.mark.skipif(shutil.which('javac') is None, reason='needs a JDK')
+def test_real_archive_is_usable(monkeypatch, tmp_path):
+    monkeypatch.setattr(ClassDataSharing, '_archive', None)
+    monkeypatch.setattr(ClassDataSharing, '_archive_dir', classmethod(lambda cls: str(tmp_path)))
+    assert ClassDataSharing.ensure_archive() is not None
@@ -0,0 +1,116 @@
+"""
+Code Version Tests - Delta Round Trips and Version Write Order
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from bson.objectid import ObjectId
+
+from app.services.code_delta import CodeDelta
+from app.services.db_service import DatabaseService, VERSION_CLAIM_TIMEOUT, VERSION_SNAPSHOT_INTERVAL
+
+USER_ID = str(ObjectId())
+
+BASE = 'def add(a, b):\n    return a + b\n\n\nprint(add(1, 2))\n'
+
+
+@pytest.mark.parametrize('parent, code', [
+    (BASE, BASE.replace('a + b', 'b + a')),
+    (BASE, '# header\n' + BASE + 'print(add(3, 4))\n'),
+    (BASE, 'def add(a, b):\n    return a + b\n'),
+    (BASE, BASE.rstrip('\n')),
+    (BASE, BASE.replace('\n', '\r\n')),
+    ('', BASE),
+    (BASE, ''),
+    (BASE, BASE)
+])
+def test_delta_round_trip(parent, code):
+    delta = CodeDelta.diff(parent, code)
+    assert CodeDelta.apply(parent, delta) == code
+
+
+def test_delta_stores_only_changed_lines():
+    code = BASE.replace('a + b', 'b + a')
+    assert CodeDelta.diff(BASE, code) == [[1, 2, ['    return b + a\n']]]
+    assert CodeDelta.diff(BASE, BASE) == []
+    assert CodeDelta.size(CodeDelta.diff(BASE, code)) == 8 + len('    return b + a\n')
+
+
+def test_delta_that_does_not_match_its_parent_is_rejected():
+    with pytest.raises(ValueError):
+        CodeDelta.apply('short\n', [[3, 8, []]])
+    with pytest.raises(ValueError):
+        CodeDelta.apply(BASE, [[2, 3, []], [1, 2, []]])
+
+
+def refine(generation_id, times, start=1):
+    codes = []
+    for i in range(start, start + times):
+        code = BASE + ''.join(f'print({n})\n' for n in range(i))
+        assert DatabaseService.update_generation_code(generation_id, USER_ID, code, f'step {i}')
+        codes.append(code)
+    return codes
+
+
+def test_every_refinement_can_be_checked_out(db):
+    generation_id = DatabaseService.save_generation(USER_ID, 'add', 'python', BASE, 'Adds.')
+    codes = [BASE] + refine(generation_id, VERSION_SNAPSHOT_INTERVAL + 2)
+
+    listing = DatabaseService.get_generation_versions(generation_id, USER_ID)
+    assert listing['current_version'] == len(codes) - 1
+    assert [version['version'] for version in listing['versions']] == list(range(len(codes)))
+    kinds = {version['version']: version['kind'] for version in listing['versions']}
+    assert kinds[0] == kinds[VERSION_SNAPSHOT_INTERVAL] == 'snapshot' and kinds[1] == 'delta'
+
+    for version, code in enumerate(codes):
+        checkout = DatabaseService.checkout_generation_version(generation_id, USER_ID, version)
+        assert checkout['code'] == code
+        assert checkout['current'] == (version == len(codes) - 1)
+    assert DatabaseService.get_generation_by_id(generation_id, USER_ID)['generated_code'] == codes[-1]
+    # Only the current code stays in the blob store
+    assert db.blobs.count_documents({}) == 2
+
+
+def test_unfinished_version_records_are_not_listed(db):
+    generation_id = DatabaseService.save_generation(USER_ID, 'add', 'python', BASE, 'Adds.')
+    refine(generation_id, 1)
+    db.generation_versions.insert_one({'generation_id': ObjectId(generation_id), 'user_id': ObjectId(USER_ID),
+                                       'version': 2, 'kind': 'snapshot', 'code': 'pending', 'note': None,
+                                       'code_size': 7, 'created_at': datetime.utcnow()})
+
+    listing = DatabaseService.get_generation_versions(generation_id, USER_ID)
+    assert [version['version'] for version in listing['versions']] == [0, 1]
+    assert DatabaseService.checkout_generation_version(generation_id, USER_ID, 2) is None
+
+
+def test_abandoned_version_claims_are_taken_over_after_the_timeout(db):
+    generation_id = DatabaseService.save_generation(USER_ID, 'add', 'python', BASE, 'Adds.')
+    refine(generation_id, 1)
+    db.generation_versions.insert_one({
+        'generation_id': ObjectId(generation_id), 'user_id': ObjectId(USER_ID), 'version': 2,
+        'kind': 'snapshot', 'code': 'abandoned', 'note': None, 'code_size': 9,
+        'created_at': datetime.utcnow() - timedelta(seconds=VERSION_CLAIM_TIMEOUT + 1)
+    })
+
+    [code] = refine(generation_id, 1, start=2)
+    assert DatabaseService.checkout_generation_version(generation_id, USER_ID, 2)['code'] == code
+    assert db.generation_versions.count_documents({'generation_id': ObjectId(generation_id)}) == 3
+
+
+def test_live_version_claim_fails_the_refinement_without_leaking_blobs(db):
+    generation_id = DatabaseService.save_generation(USER_ID, 'add', 'python', BASE, 'Adds.')
+    db.generation_versions.insert_one({'generation_id': ObjectId(generation_id), 'user_id': ObjectId(USER_ID),
+                                       'version': 1, 'kind': 'snapshot', 'code': 'in flight', 'note': None,
+                                       'code_size': 9, 'created_at': datetime.utcnow()})
+    blobs = db.blobs.count_documents({})
+
+    with pytest.raises(RuntimeError):
+        DatabaseService.update_generation_code(generation_id, USER_ID, 'new code', 'note')
+    assert db.blobs.count_documents({}) == blobs
+    assert DatabaseService.get_generation_by_id(generation_id, USER_ID)['generated_code'] == BASE
+
+
+def test_refining_a_missing_generation_leaves_no_records(db):
+    assert not DatabaseService.update_generation_code(str(ObjectId()), USER_ID, 'code', 'note')
+    assert db.blobs.count_documents({}) == 0
+    assert db.generation_versions.count_documents({}) == 0
@@ -0,0 +1,74 @@
+"""
+Compile Profile Tests - Flags Threaded Through Local and Judge0 Builds
+"""
+import shutil
+
+import pytest
+
+from app.services import execution_service
+from app.services.execution_service import ExecutionService, COMPILE_PROFILES
+
+
+@pytest.fixture
+def no_fast_linker(monkeypatch):
+    real_which = shutil.which
+    monkeypatch.setattr(execution_service.shutil, 'which',
+                        lambda binary: None if binary.startswith(('mold', 'ld.')) else real_which(binary))
+
+
+def test_profile_flags(no_fast_linker):
+    assert ExecutionService.compile_flags('cpp', 'quick') == ['-O0', '-g0']
+    assert ExecutionService.compile_flags('cpp', 'bench') == ['-O2', '-march=native']
+    assert ExecutionService.compile_flags('rust', 'bench') == ['-C', 'opt-level=3', '-C', 'target-cpu=native']
+    assert ExecutionService.compile_flags('python', 'bench') == []
+    assert ExecutionService.jvm_options('java', 'quick') == ['-XX:TieredStopAtLevel=1', '-XX:+UseSerialGC']
+    assert ExecutionService.jvm_options('java', 'bench') == []
+
+
+def test_fast_linker_is_used_for_local_quick_builds_only(monkeypatch):
+    monkeypatch.setattr(execution_service.shutil, 'which',
+                        lambda binary: '/usr/bin/ld.lld' if binary == 'ld.lld' else None)
+    assert ExecutionService.compile_flags('c', 'quick') == ['-O0', '-g0', '-fuse-ld=lld']
+    assert ExecutionService.compile_flags('rust', 'quick')[-2:] == ['-C', 'link-arg=-fuse-ld=lld']
+    assert ExecutionService.compile_flags('c', 'quick', local=False) == ['-O0', '-g0']
+    assert ExecutionService.compile_flags('c', 'bench') == ['-O2', '-march=native']
+
+
+def test_local_compiles_use_the_profile_flags(no_fast_linker, monkeypatch, tmp_path):
+    commands = []
+    monkeypatch.setattr(execution_service.subprocess, 'run', lambda command, **kwargs: commands.append(command) or
+                        type('Completed', (), {'returncode': 0, 'stderr': ''})())
+    monkeypatch.setattr(execution_service.PrecompiledHeaders, 'options_for', classmethod(lambda cls, code, flags: []))
+
+    for profile in COMPILE_PROFILES:
+        ExecutionService.compile_program('int main() {}', 'cpp', str(tmp_path), profile)
+    assert commands[0][:3] == ['g++', '-O0', '-g0']
+    assert commands[1][:3] == ['g++', '-O2', '-march=native']
+    assert commands[1][3:] == ['-o', str(tmp_path / 'main'), str(tmp_path / 'main.cpp')]
+
+
+def test_judge0_submissions_carry_the_profile_flags(monkeypatch):
+    payloads = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {'status': {'id': 3}, 'stdout': 'ok', 'time': '0.01'}
+
+    monkeypatch.setattr(execution_service.requests, 'post',
+                        lambda url, json=None, **kwargs: payloads.append(json) or Response())
+    ExecutionService.execute_with_judge0('int main() {}', 'cpp', '', 'bench')
+    ExecutionService.execute_with_judge0('print(1)', 'python', '', 'bench')
+    assert payloads[0]['compiler_options'] == '-O2 -march=native'
+    assert 'compiler_options' not in payloads[1]
+
+
+@pytest.mark.skipif(shutil.which('gcc') is None, reason='needs gcc')
+@pytest.mark.parametrize('profile', sorted(COMPILE_PROFILES))
+def test_every_profile_builds_and_runs(profile, monkeypatch):
+    monkeypatch.setattr(ExecutionService, '_backend_order', classmethod(lambda cls, language: ['local']))
+    result, error = ExecutionService.execute('#include <stdio.h>\nint main() { printf("%d", 6 * 7); }', 'c',
+                                             no_cache=True, profile=profile)
+    assert error is None
+    assert (result['output'], result['profile'], result['backend']) == ('42', profile, 'local')
@@ -0,0 +1,134 @@
+"""
+Compiler Daemon Tests - Request Protocol, Start-Up and Fallback
+"""
+import os
+import shutil
+import socket
+import threading
+
+import pytest
+
+from app.services import compiler_daemon
+from app.services.compiler_daemon import CompilerDaemon
+
+
+@pytest.fixture
+def daemon(monkeypatch):
+    """Isolate the daemon state of a test."""
+    for name, value in [('_process', None), ('_port', None), ('_token', None), ('_starting', False),
+                        ('_kotlin', False), ('_last_failure', 0.0), ('_last_error', None)]:
+        monkeypatch.setattr(CompilerDaemon, name, value)
+    return CompilerDaemon
+
+
+class FakeServer:
+    """Loopback server speaking the compile server protocol."""
+
+    def __init__(self, token, reply=b'0\nok'):
+        self.token, self.reply, self.lines = token, reply, []
+        self.socket = socket.create_server(('127.0.0.1', 0))
+        self.port = self.socket.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            conn, _ = self.socket.accept()
+            with conn:
+                line = conn.makefile('rb').readline().decode('utf-8').rstrip('\n')
+                self.lines.append(line)
+                token, _, _ = line.partition('\t')
+                conn.sendall(self.reply if token == self.token else b'2\nUnauthorized')
+
+
+class RunningProcess:
+    pid = 4242
+
+    def poll(self):
+        return None
+
+
+def test_requests_carry_the_token_and_parse_the_reply(daemon):
+    server = FakeServer('secret', reply=b'1\nMain.java:3: error: ; expected\n')
+    daemon._port, daemon._token = server.port, 'secret'
+
+    code, diagnostics = daemon._request('JAVA\t/out\t/src/Main.java', timeout=5)
+
+    assert (code, diagnostics) == (1, 'Main.java:3: error: ; expected\n')
+    assert server.lines == ['secret\tJAVA\t/out\t/src/Main.java']
+
+
+def test_compile_goes_through_a_running_daemon(daemon, monkeypatch):
+    server = FakeServer('secret')
+    monkeypatch.setattr(compiler_daemon.shutil, 'which', lambda binary: f'/usr/bin/{binary}')
+    daemon._process, daemon._port, daemon._token = RunningProcess(), server.port, 'secret'
+
+    assert daemon.compile('java', '/src/Main.java', '/out') == (0, 'ok')
+    assert daemon.compile('kotlin', '/src/Main.kt', '/out') is None
+
+
+def test_failed_requests_fall_back_and_stop_the_daemon(daemon, monkeypatch):
+    monkeypatch.setattr(compiler_daemon.shutil, 'which', lambda binary: f'/usr/bin/{binary}')
+    unused = socket.create_server(('127.0.0.1', 0))
+    port = unused.getsockname()[1]
+    unused.close()
+    daemon._process, daemon._port, daemon._token = RunningProcess(), port, 'secret'
+
+    assert daemon.compile('java', '/src/Main.java', '/out') is None
+    assert daemon._process is None and 'compile request failed' in daemon._last_error
+
+
+def test_stopped_daemon_starts_in_the_background_without_blocking(daemon, monkeypatch):
+    monkeypatch.setattr(compiler_daemon.shutil, 'which', lambda binary: f'/usr/bin/{binary}')
+    started, release = [], threading.Event()
+
+    def start():
+        started.append(1)
+        release.wait(5)
+        daemon._starting = False
+
+    monkeypatch.setattr(CompilerDaemon, '_start_in_background', classmethod(lambda cls: start()))
+    assert daemon.compile('java', '/src/Main.java', '/out') is None
+    assert daemon.compile('java', '/src/Main.java', '/out') is None
+    release.set()
+    assert started == [1]
+
+
+def test_no_daemon_without_a_jdk(daemon, monkeypatch):
+    monkeypatch.setattr(compiler_daemon.shutil, 'which', lambda binary: None)
+    assert not daemon.ensure_running()
+    assert daemon.compile('java', '/src/Main.java', '/out') is None
+
+
+def test_daemon_directory_must_not_be_writable_by_others(daemon, monkeypatch, tmp_path):
+    monkeypatch.setattr(compiler_daemon.tempfile, 'gettempdir', lambda: str(tmp_path))
+    assert daemon._private_dir() == str(tmp_path / 'code_gen_daemons')
+
+    os.chmod(tmp_path / 'code_gen_daemons', 0o777)
+    with pytest.raises(RuntimeError):
+        daemon._private_dir()
+
+
+def test_kotlin_home_is_found_next_to_kotlinc(monkeypatch, tmp_path):
+    (tmp_path / 'bin').mkdir()
+    (tmp_path / 'lib').mkdir()
+    (tmp_path / 'bin' / 'kotlinc').touch()
+    (tmp_path / 'lib' / 'kotlin-compiler.jar').touch()
+    monkeypatch.delenv('KOTLIN_HOME', raising=False)
+    monkeypatch.setattr(compiler_daemon.shutil, 'which', lambda binary: str(tmp_path / 'bin' / binary))
+
+    assert CompilerDaemon.kotlin_home() == str(tmp_path)
+    assert CompilerDaemon.kotlin_stdlib() is None
+    (tmp_path / 'lib' / 'kotlin-stdlib.jar').touch()
+    assert CompilerDaemon.kotlin_stdlib() == str(tmp_path / 'lib' / 'kotlin-stdlib.jar')
+
+
+@pytest.mark.skipif(shutil.which('javac') is None, reason='needs a JDK')
+def test_java_compiles_through_the_real_server(daemon, tmp_path):
+    source = tmp_path / 'Main.java'
+    source.write_text('public class Main { public static void main(String[] a) { System.out.println(1); } }')
+    try:
+        assert daemon.ensure_running()
+        assert daemon.compile('java', str(source), str(tmp_path))[0] == 0
+        assert (tmp_path / 'Main.class').is_file()
+    finally:
+        daemon.stop()
@@ -0,0 +1,134 @@
+"""
+Complexity Service Tests - Fitting and Input Generation Limits
+"""
+import math
+import time
+
+import pytest
+
+from app.services.complexity_service import (
+    ComplexityService, GENERATOR_SIZES, GENERATORS, MAX_INPUT_BYTES, MAX_SIZE
+)
+
+
+SIZES = [1000, 2000, 4000, 8000, 16000, 32000]
+
+
+@pytest.mark.parametrize('name, growth', [
+    ('O(n)', lambda n: n),
+    ('O(n log n)', lambda n: n * math.log2(n)),
+    ('O(n^2)', lambda n: n * n),
+])
+def test_fit_ranks_the_generating_class_first(name, growth):
+    times = [0.02 + 1e-7 * growth(n) for n in SIZES]
+    fits = ComplexityService.fit(SIZES, times)
+    assert fits[0]['class'] == name
+    assert fits[0]['r_squared'] == pytest.approx(1.0)
+
+
+def test_fit_never_reports_shrinking_growth():
+    times = [0.5 - 1e-6 * n for n in SIZES]
+    assert all(fit['coefficient'] >= 0 for fit in ComplexityService.fit(SIZES, times))
+
+
+def test_fit_skips_classes_that_overflow():
+    classes = [fit['class'] for fit in ComplexityService.fit([2000, 4000, 8000, 16000], [1, 2, 3, 4])]
+    assert 'O(2^n)' not in classes
+
+
+def test_analyze_picks_the_lower_order_class_within_the_margin(monkeypatch):
+    def execute_series(code, language, inputs, **kwargs):
+        runs = [{'index': i, 'input_bytes': len(inputs[i]), 'execution_time': 0.01 + 2e-6 * n, 'times': [],
+                 'timed_out': False, 'error': None} for i, n in enumerate(SIZES)]
+        return {'success': True, 'backend': 'local', 'compile_time': 0, 'runs': runs, 'error': None}, None
+
+    monkeypatch.setattr('app.services.complexity_service.ExecutionService.execute_series', execute_series)
+    response, error = ComplexityService.analyze('code', 'python', template='{n}\n{ints(n, 1, 9)}', sizes=SIZES)
+    assert error is None
+    assert response['best_fit']['class'] == 'O(n)'
+    assert [row['n'] for row in response['table']] == SIZES
+
+
+@pytest.mark.parametrize('name, args', [
+    ('ints', (500, -1000, 10 ** 9)),
+    ('sorted_ints', (500, 0, 99)),
+    ('perm', (1234,)),
+    ('chars', (700, 'ab')),
+    ('grid', (30, 40, -5, 5)),
+])
+def test_generator_sizes_bound_the_output(name, args):
+    import random
+    output = GENERATORS[name](random.Random(1), *args)
+    assert len(output) <= GENERATOR_SIZES[name](*args)
+
+
+def test_oversized_fields_are_rejected_before_generating():
+    started = time.time()
+    with pytest.raises(ValueError, match='generates more than'):
+        ComplexityService.render_template('{grid(n, n, 0, 9)}', 10 ** 6)
+    with pytest.raises(ValueError, match='generates more than'):
+        ComplexityService.render_template('{ints(n, 1, 1000000000)}', 10 ** 7)
+    assert time.time() - started < 1
+
+
+def test_fields_share_one_budget():
+    n = MAX_INPUT_BYTES // 4
+    with pytest.raises(ValueError, match='generates more than'):
+        ComplexityService.render_template('{ints(n, 1, 9)} {ints(n, 1, 9)} {ints(n, 1, 9)}', n)
+
+
+def test_max_size_fits_nine_digit_ints():
+    rendered = ComplexityService.render_template('{n}\n{ints(n, 100000000, 999999999)}', MAX_SIZE)
+    assert len(rendered) <= MAX_INPUT_BYTES
+
+
+def test_large_value_ranges_are_not_mistaken_for_sizes():
+    assert len(ComplexityService.render_template('{ints(3, 1, 1000000000)}', 3).split()) == 3
+
+
+def test_infer_template_recognizes_count_and_values():
+    assert ComplexityService.infer_template('3\n5 1 4\n') == '{n}\n{ints(n, 1, 5)}\n'
+    with pytest.raises(ValueError):
+        ComplexityService.infer_template('hello world\nfoo')
+
+
+def test_inputs_are_rendered_one_at_a_time(monkeypatch):
+    rendered = []
+
+    def execute_series(code, language, inputs, **kwargs):
+        runs = []
+        for i, stdin in enumerate(inputs):
+            rendered.append(len(stdin))
+            runs.append({'index': i, 'input_bytes': len(stdin), 'execution_time': 0.01 + 2e-6 * SIZES[i],
+                         'times': [], 'timed_out': False, 'error': None})
+            if i == 1:
+                break
+        return {'success': True, 'backend': 'local', 'compile_time': 0, 'runs': runs, 'error': None}, None
+
+    monkeypatch.setattr('app.services.complexity_service.ExecutionService.execute_series', execute_series)
+    response, _ = ComplexityService.analyze('code', 'python', template='{chars(n)}', sizes=SIZES)
+    assert rendered == SIZES[:2]
+    assert [row['input_bytes'] for row in response['table']] == SIZES[:2]
+
+
+def test_judge0_series_submits_each_input_separately(monkeypatch):
+    from app.services import execution_service
+    from app.services.execution_service import ExecutionService
+
+    batches = []
+
+    def execute_batch_with_judge0(code, language, inputs, profile):
+        batches.append(inputs)
+        return [{'execution_time': 0.1, 'exit_ok': True, 'timed_out': False, 'error': None}] * len(inputs), None
+
+    monkeypatch.setattr(execution_service, 'JUDGE0_MAX_STDIN_BYTES', 2500)
+    monkeypatch.setattr(ExecutionService, 'execute_batch_with_judge0', execute_batch_with_judge0)
+    series, error = ExecutionService._run_series_with_judge0('code', 'python', ['a' * 1000, 'b' * 2000, 'c' * 3000], 3)
+
+    assert error is None
+    assert batches == [['a' * 1000] * 3, ['b' * 2000] * 3]
+    assert [run['input_bytes'] for run in series['runs']] == [1000, 2000, 3000]
+    assert 'cannot be sent to Judge0' in series['runs'][-1]['error']
+
+    series, error = ExecutionService._run_series_with_judge0('code', 'python', ['c' * 3000], 3)
+    assert series is None and 'cannot be sent to Judge0' in error
@@ -0,0 +1,60 @@
+"""
+Execute Route Tests - Option Parsing
+"""
+import io
+
+import pytest
+
+from app import create_app
+from app.services import execution_spool
+from app.services.auth_service import AuthService
+from app.services.execution_service import ExecutionService
+from app.services.execution_spool import ExecutionSpool
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(execution_spool.tempfile, 'tempdir', str(tmp_path))
+    monkeypatch.setattr(ExecutionService, 'start_backend_probing', classmethod(lambda cls: None))
+    monkeypatch.setattr(AuthService, 'get_user_from_token',
+                        classmethod(lambda cls, token: {'success': True, 'user': {'id': 'user-1'}}))
+    for name in ('execute', 'execute_profiled', 'execute_spooled'):
+        monkeypatch.setattr(ExecutionService, name,
+                            classmethod(lambda cls, *args, name=name, **kwargs: calls.append(name) or ({}, None)))
+    yield calls
+    ExecutionSpool.clear()
+
+
+def post(**kwargs):
+    client = create_app().test_client()
+    return client.post('/api/execute', headers={'Authorization': 'Bearer token'}, **kwargs)
+
+
+def post_form(data):
+    return post(data=data, content_type='multipart/form-data')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('false', 'execute'),
+    ('0', 'execute'),
+    ('', 'execute'),
+    ('true', 'execute_profiled'),
+])
+def test_form_profiling_flags_are_parsed_as_booleans(calls, value, expected):
+    response = post_form({'code': 'print(1)', 'language': 'python', 'profiling': value})
+    assert response.status_code == 200
+    assert calls == [expected]
+
+
+def test_form_profiling_off_can_be_combined_with_uploads(calls):
+    response = post_form({'code': 'print(1)', 'language': 'python', 'profiling': 'false',
+                     'stdin': (io.BytesIO(b'1\n'), 'in.txt')})
+    assert response.status_code == 200
+    assert calls == ['execute_spooled']
+
+
+def test_json_profiling_options_are_still_validated(calls):
+    response = post(json={'code': 'print(1)', 'language': 'python', 'profiling': {'top': 0}})
+    assert response.status_code == 400
+    assert calls == []
@@ -0,0 +1,100 @@
+"""
+Execution Cache Tests - Confirmation, Expiry and Backend-Specific Keys
+"""
+import pytest
+
+from app.services import execution_cache
+from app.services.execution_cache import ExecutionCache
+from app.services.execution_service import ExecutionService
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """Start every test with an empty cache and known toolchain versions."""
+    monkeypatch.setattr(ExecutionCache, '_entries', type(ExecutionCache._entries)())
+    monkeypatch.setattr(ExecutionCache, '_toolchain_versions', {
+        ('python', 'local'): 'Python 3.12.1', ('python', 'judge0'): '71:Python (3.8.1)'
+    })
+    return ExecutionCache
+
+
+def result(output='4\n', execution_time=0.1, backend='local'):
+    return {'success': True, 'output': output, 'error': None, 'execution_time': execution_time, 'backend': backend}
+
+
+def test_results_are_served_only_after_two_matching_runs():
+    key = ExecutionCache.make_key('print(4)', 'python')
+    ExecutionCache.put(key, result(execution_time=0.1))
+    assert ExecutionCache.get(key) is None
+
+    ExecutionCache.put(key, result(execution_time=0.3))
+    assert ExecutionCache.get(key)['output'] == '4\n'
+
+
+def test_differing_runs_are_not_confirmed():
+    key = ExecutionCache.make_key('print(random())', 'python')
+    ExecutionCache.put(key, result('0.1'))
+    ExecutionCache.put(key, result('0.7'))
+    assert ExecutionCache.get(key) is None
+
+
+def test_deterministic_results_are_served_after_one_run():
+    key = ExecutionCache.make_key('print(4)', 'python')
+    ExecutionCache.put(key, result(), deterministic=True)
+    assert ExecutionCache.get(key) is not None
+
+
+def test_entries_expire_and_the_cache_is_bounded(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(execution_cache.time, 'time', lambda: now[0])
+    monkeypatch.setenv('EXECUTION_CACHE_TTL', '60')
+    monkeypatch.setenv('EXECUTION_CACHE_SIZE', '2')
+
+    keys = [ExecutionCache.make_key(f'print({n})', 'python') for n in range(3)]
+    for key in keys:
+        ExecutionCache.put(key, result(), deterministic=True)
+    assert ExecutionCache.get(keys[0]) is None
+    assert ExecutionCache.get(keys[2]) is not None
+
+    now[0] += 61
+    assert ExecutionCache.get(keys[2]) is None
+
+
+def test_keys_depend_on_backend_toolchain_and_options():
+    local = ExecutionCache.make_key('print(4)', 'python', '', backend='local', profile='quick')
+    assert local == ExecutionCache.make_key('print(4)', 'python', '', backend='local', profile='quick')
+    assert local != ExecutionCache.make_key('print(4)', 'python', '', backend='judge0', profile='quick')
+    assert local != ExecutionCache.make_key('print(4)', 'python', '', backend='local', profile='bench')
+
+    ExecutionCache.set_toolchain_version('python', 'local', 'Python 3.13.0')
+    assert local != ExecutionCache.make_key('print(4)', 'python', '', backend='local', profile='quick')
+
+
+def test_unprobed_remote_toolchains_are_unknown():
+    assert ExecutionCache.toolchain_version('ruby', 'judge0') == 'unknown'
+
+
+def test_runs_are_cached_under_the_backend_that_produced_them(monkeypatch):
+    runs = []
+
+    def runner():
+        runs.append(1)
+        return result(backend='judge0'), None
+
+    key_parts = {'code': 'print(4)', 'language': 'python', 'stdin': '', 'profile': 'quick'}
+    first, _ = ExecutionService._run_cached(key_parts, runner, deterministic=True, no_cache=False)
+    second, _ = ExecutionService._run_cached(key_parts, runner, deterministic=True, no_cache=False)
+    assert (first['cached'], second['cached'], len(runs)) == (False, True, 1)
+    assert ExecutionCache.get(ExecutionCache.make_key(backend='judge0', **key_parts)) is not None
+    assert ExecutionCache.get(ExecutionCache.make_key(backend='local', **key_parts)) is None
+
+    # An upgraded Judge0 no longer serves results of the old version
+    ExecutionCache.set_toolchain_version('python', 'judge0', '71:Python (3.11.2)')
+    third, _ = ExecutionService._run_cached(key_parts, runner, deterministic=True, no_cache=False)
+    assert third['cached'] is False and len(runs) == 2
+
+
+def test_timeouts_are_never_cached():
+    assert not ExecutionService._is_cacheable({'error': 'Execution timed out after 10 seconds'})
+    assert not ExecutionService._is_cacheable({'results': [{'verdict': 'time_limit_exceeded'}]})
+    assert ExecutionService._is_cacheable({'error': 'NameError'})
@@ -0,0 +1,104 @@
+"""
+Execution Spool Tests - Uploads, Excerpts and Download Handles
+"""
+import io
+import os
+
+import pytest
+from flask import request
+
+from app import create_app
+from app.services import execution_spool
+from app.services.execution_service import ExecutionService
+from app.services.execution_spool import ExecutionSpool
+
+
+@pytest.fixture(autouse=True)
+def spool(tmp_path, monkeypatch):
+    monkeypatch.setattr(execution_spool.tempfile, 'tempdir', str(tmp_path))
+    yield
+    ExecutionSpool.clear()
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setenv('SPOOL_MAX_INPUT_BYTES', '1024')
+    monkeypatch.setattr(execution_spool, 'FORM_OVERHEAD_BYTES', 512)
+    monkeypatch.setattr(ExecutionService, 'start_backend_probing', classmethod(lambda cls: None))
+    app = create_app()
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        path, must_discard = ExecutionSpool.spool_input(request.files['stdin'].stream)
+        return {'path': path, 'must_discard': must_discard, 'size': os.path.getsize(path)}
+
+    return app
+
+
+def test_uploads_are_parsed_into_the_input_spool(app):
+    response = app.test_client().post('/upload', data={'stdin': (io.BytesIO(b'1 2 3\n'), 'in.txt')})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert os.path.dirname(body['path']) == ExecutionSpool._spool_dir('input')
+    assert (body['must_discard'], body['size']) == (False, 6)
+
+
+def test_oversized_requests_are_rejected_before_parsing(app):
+    response = app.test_client().post('/upload', data={'stdin': (io.BytesIO(b'x' * 2048), 'in.txt')})
+
+    assert response.status_code == 413
+    assert '1024 bytes' in response.get_json()['error']
+    assert os.listdir(ExecutionSpool._spool_dir('input')) == []
+
+
+def test_streams_are_copied_and_limited(monkeypatch):
+    path, must_discard = ExecutionSpool.spool_input(io.BytesIO(b'abc'))
+    assert must_discard
+    with open(path, 'rb') as f:
+        assert f.read() == b'abc'
+
+    monkeypatch.setenv('SPOOL_MAX_INPUT_BYTES', '2')
+    with pytest.raises(ValueError):
+        ExecutionSpool.spool_input(io.BytesIO(b'abc'))
+    assert os.listdir(ExecutionSpool._spool_dir('input')) == [os.path.basename(path)]
+
+
+def write_output(data):
+    path = ExecutionSpool.create_output()
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_excerpts_keep_head_and_tail(monkeypatch):
+    monkeypatch.setenv('SPOOL_EXCERPT_BYTES', '4')
+
+    assert ExecutionSpool.excerpt(write_output(b'abc')) == {'head': 'abc', 'tail': None, 'size': 3, 'truncated': False}
+    assert ExecutionSpool.excerpt(write_output(b'abcdef')) == {
+        'head': 'abcd', 'tail': 'ef', 'size': 6, 'truncated': False}
+    assert ExecutionSpool.excerpt(write_output(b'abcdefghijkl')) == {
+        'head': 'abcd', 'tail': 'ijkl', 'size': 12, 'truncated': True}
+
+
+def test_handles_resolve_from_disk_for_their_owner_only():
+    handle = ExecutionSpool.register_output(write_output(b'output'), 'user-1')
+
+    path = ExecutionSpool.get_output(handle, 'user-1')
+    with open(path, 'rb') as f:
+        assert f.read() == b'output'
+    assert ExecutionSpool.get_output(handle, 'user-2') is None
+    assert ExecutionSpool.get_output('../' + handle, 'user-1') is None
+
+
+def test_expired_handles_are_rejected_and_cleaned_up(monkeypatch):
+    handle = ExecutionSpool.register_output(write_output(b'output'), 'user-1')
+    path = ExecutionSpool.get_output(handle, 'user-1')
+    os.utime(path, (0, 0))
+
+    assert ExecutionSpool.get_output(handle, 'user-1') is None
+
+    for name in os.listdir(ExecutionSpool._spool_dir('output')):
+        os.utime(os.path.join(ExecutionSpool._spool_dir('output'), name), (0, 0))
+    ExecutionSpool.cleanup_expired()
+    assert os.listdir(ExecutionSpool._spool_dir('output')) == []
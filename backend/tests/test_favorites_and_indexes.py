@@ -0,0 +1,80 @@
+"""
+Favorites and Index Audit Tests - Upserts and Plan Stages
+"""
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.services.db_service import DatabaseService
+
+USER_ID = str(ObjectId())
+
+
+def test_add_favorite_inserts_once(db):
+    favorite = DatabaseService.add_favorite(USER_ID, 'gen-1', 'Sorting', 'python', 'sort a list')
+
+    assert favorite['favorite_id'] == favorite['_id'] and favorite['user_id'] == USER_ID
+    assert DatabaseService.add_favorite(USER_ID, 'gen-1', 'Renamed') is None
+    assert DatabaseService.add_favorite(str(ObjectId()), 'gen-1', 'Other user') is not None
+
+    favorites = DatabaseService.get_user_favorites(USER_ID)
+    assert [(f['generation_id'], f['title']) for f in favorites] == [('gen-1', 'Sorting')]
+
+
+def test_add_favorite_loses_concurrent_inserts_quietly(db, monkeypatch):
+    def update_one(*args, **kwargs):
+        raise DuplicateKeyError('E11000 duplicate key error')
+
+    monkeypatch.setattr(type(db.favorites), 'update_one', update_one)
+    assert DatabaseService.add_favorite(USER_ID, 'gen-1', 'Sorting') is None
+
+
+def test_plan_stages_follow_the_winning_plan_only():
+    explain = {
+        'queryPlanner': {
+            'winningPlan': {'stage': 'LIMIT', 'inputStage': {'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN'}}},
+            'rejectedPlans': [{'stage': 'COLLSCAN'}]
+        },
+        'executionStats': {'allPlansExecution': [{'stage': 'COLLSCAN'}]},
+        'stages': [{'$cursor': {'queryPlanner': {'winningPlan': {'stage': 'SORT'}}}}]
+    }
+    assert DatabaseService._plan_stages(explain) == ['LIMIT', 'FETCH', 'IXSCAN', 'SORT']
+
+
+class ExplainCursor:
+    def __init__(self, stage):
+        self.stage = stage
+
+    def sort(self, keys):
+        return self
+
+    def limit(self, n):
+        return self
+
+    def explain(self):
+        return {'queryPlanner': {'winningPlan': {'stage': 'FETCH', 'inputStage': {'stage': self.stage}}}}
+
+
+class ExplainDatabase:
+    """Answers explain() with an index scan, except for collections listed as unindexed."""
+
+    def __init__(self, unindexed):
+        self.unindexed = unindexed
+
+    def __getitem__(self, collection):
+        stage = 'COLLSCAN' if collection in self.unindexed else 'IXSCAN'
+        return type('Collection', (), {'find': lambda _, query: ExplainCursor(stage)})()
+
+    def command(self, name, spec, verbosity):
+        raise RuntimeError('aggregate explain unavailable')
+
+
+def test_audit_flags_collection_scans_per_query_shape(monkeypatch):
+    monkeypatch.setattr(DatabaseService, 'get_db', classmethod(lambda cls: ExplainDatabase({'gists'})))
+    report = {row['query']: row for row in DatabaseService.audit_indexes()}
+
+    assert list(report) == [shape[0] for shape in DatabaseService._query_shapes()]
+    assert report['get_user_gists']['collscan'] and report['get_user_gists']['stages'] == ['FETCH', 'COLLSCAN']
+    assert not report['get_user_favorites']['collscan']
+    # A shape that cannot be explained is reported instead of failing the audit
+    assert report['history search']['error'] == 'aggregate explain unavailable'
+    assert report['history search']['stages'] == []
@@ -0,0 +1,90 @@
+"""
+Generation Storage Tests - Single-Document Saves and the Legacy Migration
+"""
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+
+import migrate_generations
+from app.services.db_service import DatabaseService, GENERATION_SCHEMA_VERSION, PROMPT_PREVIEW_LENGTH
+
+USER_ID = str(ObjectId())
+
+
+def test_save_generation_writes_one_generation_document(db):
+    prompt = 'x' * (PROMPT_PREVIEW_LENGTH + 20)
+    generation_id = DatabaseService.save_generation(USER_ID, prompt, 'python', 'print(1)\n', 'Prints one.')
+
+    assert db.code_generations.count_documents({}) == 1
+    assert db.explanations.count_documents({}) == 0
+    assert db.history.count_documents({}) == 0
+    stored = db.code_generations.find_one({'_id': ObjectId(generation_id)})
+    assert stored['history'] == {'action_type': 'generate', 'prompt_preview': prompt[:PROMPT_PREVIEW_LENGTH]}
+    assert stored['schema_version'] == GENERATION_SCHEMA_VERSION
+
+    generation = DatabaseService.get_generation_by_id(generation_id, USER_ID)
+    assert generation['generated_code'] == 'print(1)\n'
+    assert generation['explanation'] == 'Prints one.'
+
+
+def test_translation_is_recorded_in_embedded_history(db):
+    source_id = DatabaseService.save_generation(USER_ID, 'sum', 'python', 'a + b', 'Adds.')
+    DatabaseService.save_generation(USER_ID, 'sum', 'java', 'a + b;', 'Adds.', translated_from=source_id)
+
+    actions = [item['action_type'] for item in DatabaseService.get_user_history(USER_ID)]
+    assert sorted(actions) == ['generate', 'translate']
+
+
+def insert_legacy_generation(db, prompt, translated_from=None, history=True, age=timedelta(hours=1)):
+    """Insert a generation in the pre-embedding layout (explanation and history rows apart)."""
+    created_at = datetime.utcnow() - age
+    generation = {'user_id': ObjectId(USER_ID), 'prompt': prompt, 'language': 'python',
+                  'generated_code': 'pass', 'created_at': created_at, 'success': True}
+    if translated_from:
+        generation['translated_from'] = translated_from
+    generation_id = db.code_generations.insert_one(generation).inserted_id
+    db.explanations.insert_one({'generation_id': generation_id, 'explanation_text': f'About {prompt}'})
+    if history:
+        db.history.insert_one({'user_id': ObjectId(USER_ID), 'generation_id': generation_id,
+                               'action_type': 'refine', 'timestamp': created_at,
+                               'metadata': {'prompt_preview': f'preview of {prompt}'}})
+    return generation_id
+
+
+def test_legacy_documents_are_read_from_their_own_collections(db):
+    generation_id = insert_legacy_generation(db, 'legacy', history=False)
+
+    generation = DatabaseService.get_generation_by_id(str(generation_id), USER_ID)
+    assert generation['explanation'] == 'About legacy'
+    [item] = DatabaseService.get_user_history(USER_ID)
+    assert item['action_type'] == 'generate'
+    assert item['metadata']['prompt_preview'] == 'legacy'
+
+
+def test_migration_embeds_explanation_and_history(db):
+    with_history = insert_legacy_generation(db, 'first')
+    translated = insert_legacy_generation(db, 'second', translated_from=with_history, history=False)
+
+    migrate_generations.migrate(db, batch_size=1, min_age=60, dry_run=False)
+
+    first = db.code_generations.find_one({'_id': with_history})
+    assert first['explanation'] == 'About first'
+    assert first['history'] == {'action_type': 'refine', 'prompt_preview': 'preview of first'}
+    assert first['schema_version'] == GENERATION_SCHEMA_VERSION
+    second = db.code_generations.find_one({'_id': translated})
+    assert second['history'] == {'action_type': 'translate', 'prompt_preview': 'second'}
+    assert db.explanations.count_documents({}) == 0
+    assert db.history.count_documents({}) == 0
+
+
+def test_migration_skips_recent_documents_and_dry_runs(db):
+    recent = insert_legacy_generation(db, 'recent', age=timedelta(seconds=5))
+    old = insert_legacy_generation(db, 'old')
+
+    migrate_generations.migrate(db, batch_size=10, min_age=60, dry_run=True)
+    assert db.code_generations.count_documents({'schema_version': {'$exists': True}}) == 0
+
+    migrate_generations.migrate(db, batch_size=10, min_age=60, dry_run=False)
+    assert 'schema_version' not in db.code_generations.find_one({'_id': recent})
+    assert db.code_generations.find_one({'_id': old})['schema_version'] == GENERATION_SCHEMA_VERSION
+    assert db.explanations.count_documents({'generation_id': recent}) == 1
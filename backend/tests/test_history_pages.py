@@ -0,0 +1,76 @@
+"""
+History Page Tests - Keyset Cursors and Summary Projections
+"""
+from datetime import datetime
+
+import pytest
+from bson.objectid import ObjectId
+
+from app.services.db_service import DatabaseService
+
+USER_ID = str(ObjectId())
+
+
+def save(db, count, created_at):
+    ids = [DatabaseService.save_generation(USER_ID, f'prompt {i}', 'python', f'print({i})', '') for i in range(count)]
+    db.code_generations.update_many({}, {'$set': {'created_at': created_at}})
+    return ids
+
+
+def all_pages(limit, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = DatabaseService.get_user_history_page(USER_ID, limit=limit, cursor=cursor, **kwargs)
+        ids += [item['generation_id'] for item in page['history']]
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_cursor_pages_split_entries_with_the_same_timestamp(db):
+    ids = save(db, 5, datetime(2024, 5, 1, 12, 0, 0, 123000))
+
+    assert all_pages(limit=2) == sorted(ids, reverse=True)
+    assert all_pages(limit=5) == sorted(ids, reverse=True)
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    generation = {'_id': ObjectId(), 'created_at': datetime(2024, 5, 1, 12, 0, 0, 123000)}
+    cursor = DatabaseService.encode_history_cursor(generation)
+
+    assert DatabaseService.decode_history_cursor(cursor) == (generation['created_at'], generation['_id'])
+    for bad in ('', 'not-a-cursor', DatabaseService.encode_history_cursor({**generation, '_id': 'x'})):
+        with pytest.raises(ValueError):
+            DatabaseService.decode_history_cursor(bad)
+
+
+
+def test_summary_projection_leaves_out_code_and_refinements():
+    projection = DatabaseService._summary_projection()
+
+    assert not {'generated_code', 'code_ref', 'explanation_ref', 'refinements', 'code_bands'} & set(projection)
+    assert projection['prompt'] == {'$substrCP': [{'$ifNull': ['$prompt', '']}, 0, 100]}
+
+
+def test_summary_items_fall_back_for_legacy_documents():
+    generation_id, source_id = ObjectId(), ObjectId()
+    created_at, refined_at = datetime(2024, 5, 1), datetime(2024, 5, 2)
+    projected = {'_id': generation_id, 'language': 'go', 'created_at': created_at, 'translated_from': source_id,
+                 'prompt': 'translate me', 'code_size': 12, 'refinement_count': 1, 'updated_at': None}
+
+    assert DatabaseService._summary_item(projected) == {
+        '_id': str(generation_id),
+        'generation_id': str(generation_id),
+        'action_type': 'translate',
+        'timestamp': created_at,
+        'updated_at': created_at,
+        'metadata': {'language': 'go', 'prompt_preview': 'translate me'},
+        'code_size': 12,
+        'refinement_count': 1,
+        'translated_from': str(source_id)
+    }
+
+    projected.update(history={'action_type': 'generate', 'prompt_preview': 'embedded'}, updated_at=refined_at)
+    item = DatabaseService._summary_item(projected)
+    assert (item['action_type'], item['metadata']['prompt_preview'], item['updated_at']) == \
+        ('generate', 'embedded', refined_at)
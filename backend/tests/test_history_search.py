@@ -0,0 +1,74 @@
+"""
+History Search Tests - Code Identifiers and Score Cursors
+"""
+from datetime import datetime
+
+import pytest
+from bson.objectid import ObjectId
+
+from app.services import db_service
+from app.services.db_service import DatabaseService
+
+USER_ID = str(ObjectId())
+
+
+def test_identifiers_are_split_on_camel_and_snake_case():
+    code = 'def dijkstraShortestPath(graph_nodes, HTTPServer):\n    return x1 + for_each'
+    assert DatabaseService.extract_code_identifiers(code) == [
+        'dijkstrashortestpath', 'dijkstra', 'shortest', 'path', 'graph_nodes', 'graph', 'nodes',
+        'httpserver', 'http', 'server', 'for_each', 'each'
+    ]
+    assert DatabaseService.extract_code_identifiers(None) == []
+
+
+def test_identifiers_are_capped(monkeypatch):
+    monkeypatch.setattr(db_service, 'MAX_CODE_IDENTIFIERS', 3)
+    assert DatabaseService.extract_code_identifiers('alpha beta gamma delta') == ['alpha', 'beta', 'gamma']
+
+
+def test_search_cursor_round_trips_and_rejects_garbage():
+    generation = {'_id': ObjectId(), 'score': 1.2345678901234567}
+    cursor = DatabaseService.encode_search_cursor(generation)
+
+    assert DatabaseService.decode_search_cursor(cursor) == (generation['score'], generation['_id'])
+    with pytest.raises(ValueError):
+        DatabaseService.decode_search_cursor('garbage')
+
+
+class SearchCollection:
+    """Stands in for code_generations, which mongomock cannot $text-search."""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        documents = self.documents
+        for stage in pipeline:
+            if '$match' in stage and '$or' in stage['$match']:
+                newer, tied = stage['$match']['$or']
+                documents = [d for d in documents if d['score'] < newer['score']['$lt']
+                             or (d['score'] == tied['score'] and d['_id'] < tied['_id']['$lt'])]
+            if '$limit' in stage:
+                documents = documents[:stage['$limit']]
+        return iter(documents)
+
+
+def test_search_pages_by_score_then_id(monkeypatch):
+    ids = sorted((ObjectId() for _ in range(3)), reverse=True)
+    documents = [{'_id': _id, 'score': score, 'language': 'python', 'created_at': datetime(2024, 5, 1),
+                  'prompt': 'dijkstra', 'code_size': 10, 'refinement_count': 0}
+                 for _id, score in zip(ids, [2.0, 1.5, 1.5])]
+    collection = SearchCollection(documents)
+    monkeypatch.setattr(DatabaseService, 'get_db', classmethod(lambda cls: type('Db', (), {
+        'code_generations': collection})))
+
+    first = DatabaseService.search_user_history(USER_ID, 'dijkstra', languages=['python'], limit=2)
+    second = DatabaseService.search_user_history(USER_ID, 'dijkstra', limit=2, cursor=first['next_cursor'])
+
+    assert [r['generation_id'] for r in first['results']] == [str(ids[0]), str(ids[1])]
+    assert [r['generation_id'] for r in second['results']] == [str(ids[2])]
+    assert second['next_cursor'] is None
+    assert collection.pipelines[0][0] == {'$match': {
+        'user_id': ObjectId(USER_ID), '$text': {'$search': 'dijkstra'}, 'language': {'$in': ['python']}}}
@@ -0,0 +1,109 @@
+"""
+Multi Test Case Tests - Verdicts, Local Runs and Judge0 Batches
+"""
+import pytest
+
+from app.services import execution_service
+from app.services.execution_service import ExecutionService, JUDGE0_MAX_BATCH_SIZE
+
+ECHO_SQUARE = 'n = int(input())\nprint(n * n)\n'
+
+
+def run(output='', error=None, timed_out=False, exit_ok=True, compile_error=None):
+    return {'output': output, 'error': error, 'execution_time': 0.01, 'timed_out': timed_out,
+            'exit_ok': exit_ok, 'compile_error': compile_error}
+
+
+@pytest.mark.parametrize('raw, expected, verdict, passed', [
+    (run('4\n'), '4', 'accepted', True),
+    (run('4  \r\n\r\n'), '4\n', 'accepted', True),
+    (run('5\n'), '4\n', 'wrong_answer', False),
+    (run('4\n'), None, 'completed', None),
+    (run(exit_ok=False), '4', 'runtime_error', False),
+    (run(timed_out=True, exit_ok=False), '4', 'time_limit_exceeded', False),
+    (run(exit_ok=False, compile_error='error: x'), '4', 'compilation_error', False),
+])
+def test_case_verdicts(raw, expected, verdict, passed):
+    case = ExecutionService._case_result(0, raw, expected)
+    assert (case['verdict'], case['passed']) == (verdict, passed)
+
+
+def test_wrong_answer_carries_a_diff_and_runtime_errors_a_message():
+    case = ExecutionService._case_result(0, run('1\n2\n'), '1\n3\n')
+    assert '-3' in case['diff'] and '+2' in case['diff']
+    assert ExecutionService._case_result(0, run(exit_ok=False), None)['error'] == \
+        'Execution failed with non-zero exit code'
+
+
+def test_summary_counts_passed_failed_and_unchecked():
+    cases = [ExecutionService._case_result(i, raw, expected) for i, (raw, expected) in
+             enumerate([(run('1'), '1'), (run('2'), '1'), (run('3'), None)])]
+    response = ExecutionService._summarize_cases(cases, 'local')
+    assert response['summary'] == {'total': 3, 'passed': 1, 'failed': 1, 'unchecked': 1}
+    assert response['success'] is False
+
+
+def test_cases_run_locally_against_one_compiled_program():
+    test_cases = [{'input': f'{n}\n', 'expected_output': str(n * n)} for n in range(6)]
+    test_cases.append({'input': '7\n', 'expected_output': '48'})
+    test_cases.append({'input': 'oops\n'})
+
+    response = ExecutionService._run_cases_locally(ECHO_SQUARE, 'python', test_cases)
+
+    verdicts = [case['verdict'] for case in response['results']]
+    assert verdicts == ['accepted'] * 6 + ['wrong_answer', 'runtime_error']
+    assert [case['index'] for case in response['results']] == list(range(8))
+    assert 'ValueError' in response['results'][-1]['error']
+
+
+class FakeJudge0:
+    """Judge0 batch API stand-in that enforces the batch size limit."""
+
+    def __init__(self, pending_polls=1):
+        self.submissions, self.pending_polls, self.batch_sizes = {}, pending_polls, []
+
+    def post(self, url, json=None, **kwargs):
+        batch = json['submissions']
+        self.batch_sizes.append(len(batch))
+        if len(batch) > JUDGE0_MAX_BATCH_SIZE:
+            return Response(422, {'error': 'too many submissions'})
+        tokens = []
+        for submission in batch:
+            token = f'token-{len(self.submissions)}'
+            self.submissions[token] = submission['stdin']
+            tokens.append({'token': token})
+        return Response(201, tokens)
+
+    def get(self, url, params=None, **kwargs):
+        tokens = params['tokens'].split(',')
+        assert len(tokens) <= JUDGE0_MAX_BATCH_SIZE
+        if self.pending_polls:
+            self.pending_polls -= 1
+            return Response(200, {'submissions': [{'status': {'id': 2}} for _ in tokens]})
+        return Response(200, {'submissions': [
+            {'status': {'id': 3}, 'stdout': str(int(self.submissions[token]) ** 2) + '\n', 'time': '0.01'}
+            for token in tokens
+        ]})
+
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code, self.body, self.text = status_code, body, str(body)
+
+    def json(self):
+        return self.body
+
+
+def test_judge0_batches_are_split_at_the_batch_size_limit(monkeypatch):
+    judge0 = FakeJudge0()
+    monkeypatch.setattr(execution_service.requests, 'post', judge0.post)
+    monkeypatch.setattr(execution_service.requests, 'get', judge0.get)
+    monkeypatch.setattr(execution_service, 'JUDGE0_POLL_INTERVAL', 0)
+    test_cases = [{'input': str(n), 'expected_output': str(n * n)} for n in range(JUDGE0_MAX_BATCH_SIZE * 2 + 5)]
+
+    response, error = ExecutionService._run_cases_with_judge0(ECHO_SQUARE, 'python', test_cases)
+
+    assert error is None
+    assert judge0.batch_sizes == [JUDGE0_MAX_BATCH_SIZE, JUDGE0_MAX_BATCH_SIZE, 5]
+    assert response['summary']['passed'] == len(test_cases)
+    assert [case['output'] for case in response['results']] == [f'{n * n}\n' for n in range(len(test_cases))]
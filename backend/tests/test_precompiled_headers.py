@@ -0,0 +1,122 @@
+"""
+Precompiled Header Tests - Include Set Detection and Header Reuse
+"""
+import shutil
+from collections import OrderedDict
+
+import pytest
+
+from app.services import precompiled_headers
+from app.services.precompiled_headers import PrecompiledHeaders, MAX_HEADER_SETS
+
+
+@pytest.fixture
+def pch(monkeypatch, tmp_path):
+    """Empty header cache in a temporary directory, with builds run synchronously."""
+    monkeypatch.setattr(PrecompiledHeaders, '_ready', OrderedDict())
+    monkeypatch.setattr(PrecompiledHeaders, '_building', set())
+    monkeypatch.setattr(PrecompiledHeaders, '_uses', {})
+    monkeypatch.setattr(PrecompiledHeaders, '_pch_dir', classmethod(lambda cls: str(tmp_path)))
+    monkeypatch.setattr(PrecompiledHeaders, '_key', classmethod(
+        lambda cls, headers, flags: '-'.join(headers + tuple(flags)).replace('/', '_')))
+    builds = []
+
+    def build_async(cls, headers, flags=None):
+        builds.append(headers)
+        cls._build(cls._key(headers, list(flags or [])), headers, list(flags or []))
+
+    monkeypatch.setattr(PrecompiledHeaders, 'build_async', classmethod(build_async))
+    monkeypatch.setattr(PrecompiledHeaders, 'builds', builds, raising=False)
+    return PrecompiledHeaders
+
+
+@pytest.fixture
+def fake_gxx(monkeypatch):
+    """Stand in for g++ by writing the requested output file."""
+    commands = []
+
+    def run(command, **kwargs):
+        commands.append(command)
+        with open(command[command.index('-o') + 1], 'w') as f:
+            f.write('gch')
+        return type('Completed', (), {'returncode': 0, 'stderr': ''})()
+
+    monkeypatch.setattr(precompiled_headers.subprocess, 'run', run)
+    return commands
+
+
+@pytest.mark.parametrize('code, headers', [
+    ('#include <iostream>\n#include <vector>\nint main() {}', ('iostream', 'vector')),
+    ('// solution\n\n#include <vector>\n#  include <iostream>\n#include <vector>\nint main() {}',
+     ('iostream', 'vector')),
+    ('#include <bits/stdc++.h>\nusing namespace std;', ('bits/stdc++.h',)),
+    ('#include <iostream>\n#include <boost/any.hpp>\nint main() {}', None),
+    ('#include <iostream>\n#include "solution.h"\nint main() {}', None),
+    ('#include <iostream>\n#define N 10\n#include <vector>\nint main() {}', None),
+    ('int main() { return 0; }', None),
+])
+def test_header_set_detection(code, headers):
+    assert PrecompiledHeaders.header_set(code) == headers
+
+
+def test_common_sets_are_built_on_first_use_and_then_reused(pch, fake_gxx):
+    code = '#include <iostream>\nint main() {}'
+    assert pch.options_for(code, ['-O0']) == []
+    assert pch.builds == [('iostream',)]
+    assert fake_gxx[0][:2] == ['g++', '-O0'] and '-x' in fake_gxx[0]
+
+    options = pch.options_for(code, ['-O0'])
+    assert options[0] == '-include' and options[1].endswith('pch.hpp') and options[2] == '-Winvalid-pch'
+    assert pch.status()['hits'] == 1
+
+
+def test_uncommon_sets_are_built_after_repeated_use(pch, fake_gxx):
+    code = '#include <map>\n#include <queue>\nint main() {}'
+    pch.options_for(code)
+    assert pch.builds == []
+    pch.options_for(code)
+    assert pch.builds == [('map', 'queue')]
+    assert pch.options_for(code)
+
+
+def test_headers_are_built_per_compile_flag_set(pch, fake_gxx):
+    code = '#include <iostream>\nint main() {}'
+    pch.options_for(code, ['-O0'])
+    assert pch.options_for(code, ['-O2']) == []
+    assert len(pch.builds) == 2
+
+
+def test_least_recently_used_headers_are_evicted(pch, fake_gxx, tmp_path):
+    for n in range(MAX_HEADER_SETS + 1):
+        pch.options_for('#include <iostream>\nint main() {}', [f'-DSET={n}'])
+    assert len(pch._ready) == MAX_HEADER_SETS
+    assert not (tmp_path / 'iostream--DSET=0').exists()
+
+
+def test_disabled_or_failed_builds_compile_normally(pch, monkeypatch):
+    def fail(command, **kwargs):
+        return type('Completed', (), {'returncode': 1, 'stderr': 'error'})()
+
+    monkeypatch.setattr(precompiled_headers.subprocess, 'run', fail)
+    code = '#include <iostream>\nint main() {}'
+    pch.options_for(code)
+    assert pch.options_for(code) == [] and not pch._ready
+
+    monkeypatch.setenv('CPP_PCH_ENABLED', 'false')
+    assert pch.options_for(code) == []
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason='needs g++')
+def test_real_header_is_accepted_by_gxx(pch, tmp_path):
+    import subprocess
+
+    code = '#include <iostream>\n#include <vector>\nint main() { std::vector<int> v{1}; std::cout << v[0]; }\n'
+    pch.options_for(code, ['-O0'])
+    options = pch.options_for(code, ['-O0'])
+    assert options
+    source = tmp_path / 'main.cpp'
+    source.write_text(code)
+    build = subprocess.run(['g++', '-O0', '-o', str(tmp_path / 'main'), str(source)] + options,
+                           capture_output=True, text=True)
+    assert build.returncode == 0, build.stderr
+    assert subprocess.run([str(tmp_path / 'main')], capture_output=True, text=True).stdout == '1'
@@ -0,0 +1,78 @@
+"""
+Python Profiler Tests - Options, Harness and Report Extraction
+"""
+import subprocess
+import sys
+
+import pytest
+
+from app.services.python_profiler import PythonProfiler, DEFAULT_TOP_FUNCTIONS, MAX_TOP_FUNCTIONS
+
+
+PROGRAM = '''
+def square(x):
+    return x * x
+
+def main():
+    total = 0
+    for i in range(200):
+        total += square(i)
+    print(total)
+    data = [0] * 10000
+    return data
+
+main()
+'''
+
+
+def run_harness(code, options, time_limit=10):
+    harness, marker = PythonProfiler.build_harness(code, options, time_limit)
+    run = subprocess.run([sys.executable, '-c', harness], capture_output=True, text=True, timeout=60)
+    error, report = PythonProfiler.extract_report(run.stderr, marker)
+    return run, error, report
+
+
+def test_parse_options_defaults_and_validation():
+    assert PythonProfiler.parse_options(True) == {'top': DEFAULT_TOP_FUNCTIONS, 'lines': False, 'memory': True}
+    assert PythonProfiler.parse_options({'top': 5, 'lines': True, 'memory': False}) == \
+        {'top': 5, 'lines': True, 'memory': False}
+    for value in ('yes', {'top': 0}, {'top': MAX_TOP_FUNCTIONS + 1}, {'top': True}, {'top': '5'}):
+        with pytest.raises(ValueError):
+            PythonProfiler.parse_options(value)
+
+
+def test_harness_reports_functions_lines_and_memory():
+    run, error, report = run_harness(PROGRAM, PythonProfiler.parse_options({'top': 10, 'lines': True}))
+
+    assert run.returncode == 0
+    assert run.stdout.strip() == str(sum(i * i for i in range(200)))
+    assert error is None
+    assert report['status'] == 'completed'
+
+    square = next(f for f in report['functions'] if f['function'] == 'square')
+    assert square['calls'] == 200 and square['file'] == 'main.py'
+    assert len(report['functions']) <= 10
+
+    hits = {line['line']: line['hits'] for line in report['lines']}
+    assert hits[3] == 200
+    assert report['memory']['peak_bytes'] >= 10000 * 8
+
+
+def test_program_errors_stay_separate_from_the_report():
+    run, error, report = run_harness('print(1)\nraise KeyError("boom")\n', PythonProfiler.parse_options(True))
+
+    assert run.returncode == 1
+    assert 'KeyError' in error and 'boom' in error
+    assert report['status'] == 'error'
+
+
+def test_time_limit_stops_the_program_with_a_partial_profile():
+    run, error, report = run_harness('while True:\n    pass\n', PythonProfiler.parse_options(True), time_limit=0.5)
+
+    assert report['status'] == 'timed_out'
+    assert 'time limit' in error
+
+
+def test_missing_report_leaves_stderr_untouched():
+    assert PythonProfiler.extract_report('plain error', '__PROFILE_REPORT_x__') == ('plain error', None)
+    assert PythonProfiler.extract_report('oops\n__M__\n{broken', '__M__') == ('oops', None)
@@ -0,0 +1,129 @@
+"""
+Sandbox Tests - Seccomp Filter Assembly and Command Wrapping
+"""
+import struct
+
+import pytest
+
+from app.services.sandbox import (
+    Sandbox, AUDIT_ARCH, DENIED_SYSCALLS, EPERM, SECCOMP_RET_ALLOW, SECCOMP_RET_ERRNO,
+    SECCOMP_RET_KILL_PROCESS, X32_SYSCALL_BIT
+)
+
+
+def run_filter(program: bytes, arch: int, nr: int) -> int:
+    """Evaluate a classic BPF seccomp program for one syscall (the subset the filter uses)."""
+    instructions = [struct.unpack('=HBBI', program[i:i + 8]) for i in range(0, len(program), 8)]
+    data = {0: nr, 4: arch}
+    accumulator, pc = 0, 0
+    while True:
+        code, jt, jf, k = instructions[pc]
+        if code == 0x20:
+            accumulator = data[k]
+            pc += 1
+        elif code in (0x15, 0x35):
+            taken = accumulator == k if code == 0x15 else accumulator >= k
+            pc += 1 + (jt if taken else jf)
+        elif code == 0x06:
+            return k
+        else:
+            raise AssertionError(f'unexpected BPF opcode {code:#x}')
+        assert pc < len(instructions), 'jump past the end of the program'
+
+
+@pytest.mark.parametrize('machine', sorted(DENIED_SYSCALLS))
+def test_filter_denies_listed_syscalls_with_eperm(machine):
+    program = Sandbox.seccomp_filter(machine)
+    arch = AUDIT_ARCH[machine]
+    for number in DENIED_SYSCALLS[machine].values():
+        assert run_filter(program, arch, number) == SECCOMP_RET_ERRNO | EPERM
+
+
+@pytest.mark.parametrize('machine', sorted(DENIED_SYSCALLS))
+def test_filter_allows_everything_else(machine):
+    program = Sandbox.seccomp_filter(machine)
+    denied = set(DENIED_SYSCALLS[machine].values())
+    for number in range(0, 450):
+        if number not in denied:
+            assert run_filter(program, AUDIT_ARCH[machine], number) == SECCOMP_RET_ALLOW
+
+
+def test_filter_kills_foreign_architectures_and_x32_calls():
+    program = Sandbox.seccomp_filter('x86_64')
+    assert run_filter(program, AUDIT_ARCH['aarch64'], 0) == SECCOMP_RET_KILL_PROCESS
+    assert run_filter(program, AUDIT_ARCH['x86_64'], X32_SYSCALL_BIT | 1) == SECCOMP_RET_KILL_PROCESS
+    assert run_filter(Sandbox.seccomp_filter('aarch64'), AUDIT_ARCH['aarch64'], X32_SYSCALL_BIT | 1) == \
+        SECCOMP_RET_ALLOW
+
+
+def test_filter_is_unavailable_for_unknown_architectures():
+    assert Sandbox.seccomp_filter('riscv64') is None
+
+
+def test_kafel_policy_lists_the_denied_syscalls(monkeypatch):
+    monkeypatch.setattr('app.services.sandbox.platform.machine', lambda: 'x86_64')
+    policy = Sandbox._kafel_policy()
+    assert policy.startswith(f'POLICY sandbox {{ ERRNO({EPERM}) {{ ')
+    assert all(name in policy for name in DENIED_SYSCALLS['x86_64'])
+
+
+def test_wrap_limits_file_size_for_each_tool(tmp_path, monkeypatch):
+    monkeypatch.setattr('app.services.sandbox.shutil.which', lambda name: f'/usr/bin/{name}')
+    monkeypatch.setattr(Sandbox, '_seccomp_file', classmethod(lambda cls: None))
+    work_dir = str(tmp_path)
+
+    nsjail, _ = Sandbox._wrap_with('nsjail', ['python3', 'main.py'], work_dir, max_file_size=3 * 1024 * 1024 + 1)
+    assert nsjail[nsjail.index('--rlimit_fsize') + 1] == '4'
+    assert nsjail[-2:] == ['python3', 'main.py']
+
+    bwrap, pass_fds = Sandbox._wrap_with('bwrap', ['python3', 'main.py'], work_dir, max_file_size=1000)
+    assert bwrap[:3] == ['prlimit', '--fsize=1000', '--'] and bwrap[3] == 'bwrap'
+    assert pass_fds == ()
+
+    unlimited, _ = Sandbox._wrap_with('nsjail', ['python3'], work_dir)
+    assert unlimited[unlimited.index('--rlimit_fsize') + 1] == 'inf'
+
+
+def test_extra_roots_mount_paths_outside_the_standard_roots(tmp_path, monkeypatch):
+    archive = tmp_path / 'cds' / 'jdk.jsa'
+    archive.parent.mkdir()
+    archive.write_bytes(b'')
+    work_dir = tmp_path / 'work'
+    work_dir.mkdir()
+    monkeypatch.setattr('app.services.sandbox.shutil.which', lambda name: None)
+
+    roots = Sandbox._extra_roots(['java', f'-XX:SharedArchiveFile={archive}', '-cp', str(work_dir), 'Main'],
+                                 str(work_dir))
+    assert roots == [str(archive.parent.resolve())]
+
+
+def test_missing_programs_fail_before_they_are_sandboxed(tmp_path, monkeypatch):
+    monkeypatch.setattr(Sandbox, '_usable', True)
+    monkeypatch.setattr(Sandbox, '_tool', 'bwrap')
+
+    with pytest.raises(FileNotFoundError):
+        Sandbox.wrap(['no-such-runtime', 'main.py'], str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        Sandbox.wrap([str(tmp_path / 'main')], str(tmp_path))
+
+
+def test_missing_sandboxed_runtime_falls_back_to_the_next_backend(tmp_path, monkeypatch):
+    from app.services.backend_router import BackendRouter
+    from app.services.execution_service import BACKEND_JUDGE0, BACKEND_LOCAL, ExecutionService
+
+    monkeypatch.setattr(Sandbox, '_usable', True)
+    monkeypatch.setattr(Sandbox, '_tool', 'bwrap')
+    order = [BACKEND_LOCAL, BACKEND_JUDGE0]
+    monkeypatch.setattr(ExecutionService, '_backend_order', classmethod(lambda cls, language: order))
+    availability = []
+    monkeypatch.setattr(BackendRouter, 'set_availability',
+                        classmethod(lambda cls, language, backend, available, detail: availability.append(backend)))
+    monkeypatch.setattr(BackendRouter, 'record', classmethod(lambda cls, *args: None))
+
+    result, error = ExecutionService._route('python', 'debug', {
+        BACKEND_LOCAL: lambda: (ExecutionService.run_program(['no-such-runtime'], '', 5, str(tmp_path)), None),
+        BACKEND_JUDGE0: lambda: ({'success': True}, None)
+    })
+
+    assert error is None and result['backend'] == BACKEND_JUDGE0
+    assert availability == [BACKEND_LOCAL]
@@ -0,0 +1,92 @@
+"""
+Similarity Service Tests - MinHash/LSH Banding and Generation Reuse
+"""
+from bson.objectid import ObjectId
+
+from app.services.db_service import DatabaseService
+from app.services.similarity_service import SimilarityService, LSH_BANDS
+
+USER_ID = str(ObjectId())
+
+CODE = '''
+def merge_sort(values):
+    if len(values) <= 1:
+        return values
+    middle = len(values) // 2
+    left = merge_sort(values[:middle])
+    right = merge_sort(values[middle:])
+    result = []
+    while left and right:
+        result.append(left.pop(0) if left[0] <= right[0] else right.pop(0))
+    return result + left + right
+'''
+
+
+def test_band_keys_are_deterministic_signed_64_bit():
+    bands = SimilarityService.code_bands(CODE)
+    assert bands == SimilarityService.code_bands(CODE)
+    assert len(bands) == len(set(bands)) == LSH_BANDS
+    assert all(-(1 << 63) <= key < (1 << 63) for key in bands)
+    assert SimilarityService.band_keys(set()) == []
+    assert SimilarityService.prompt_bands('   ') == []
+
+
+def test_code_shingles_ignore_comments_whitespace_and_case():
+    reformatted = '# Sorts a list\n' + CODE.replace('    ', '\t').replace('result', 'RESULT') + '  // done\n'
+    assert SimilarityService.code_shingles(reformatted) == SimilarityService.code_shingles(CODE)
+
+
+def test_near_duplicates_share_bands_and_unrelated_code_does_not():
+    edited = CODE.replace('<= right[0]', '< right[0]')
+    unrelated = 'class Stack:\n    def __init__(self):\n        self.items = []\n    def push(self, item):\n' \
+                '        self.items.append(item)\n    def peek(self):\n        return self.items[-1]\n'
+
+    original = SimilarityService.code_shingles(CODE)
+    assert SimilarityService.jaccard(original, SimilarityService.code_shingles(edited)) > 0.7
+    assert set(SimilarityService.code_bands(CODE)) & set(SimilarityService.code_bands(edited))
+    assert SimilarityService.jaccard(original, SimilarityService.code_shingles(unrelated)) < 0.1
+    assert not set(SimilarityService.code_bands(CODE)) & set(SimilarityService.code_bands(unrelated))
+
+
+def test_jaccard():
+    assert SimilarityService.jaccard({1, 2, 3}, {2, 3, 4}) == 0.5
+    assert SimilarityService.jaccard({1}, {1}) == 1.0
+    assert SimilarityService.jaccard(set(), {1}) == 0.0
+
+
+def test_prompt_shingles_ignore_punctuation_and_case():
+    assert SimilarityService.prompt_shingles('Reverse a linked list!') == \
+        SimilarityService.prompt_shingles('reverse a LINKED list')
+    assert len(SimilarityService.prompt_shingles('fizzbuzz')) == 1
+
+
+PROMPT = 'write a python function that sorts a list of integers in ascending order using merge sort'
+
+
+def test_reusable_generation_is_found_for_a_near_identical_prompt(db):
+    generation_id = DatabaseService.save_generation(USER_ID, PROMPT, 'python', CODE, 'Merge sort.')
+    DatabaseService.save_generation(USER_ID, 'print the first ten primes', 'python', 'print(2)', 'Primes.')
+
+    reused = DatabaseService.find_reusable_generation(USER_ID, PROMPT.replace('integers', 'numbers'), 'python', 0.7)
+    assert reused['_id'] == generation_id
+    assert reused['generated_code'] == CODE
+    assert 0.7 <= reused['similarity'] < 1
+
+    assert DatabaseService.find_reusable_generation(USER_ID, PROMPT, 'java', 0.7) is None
+    assert DatabaseService.find_reusable_generation(str(ObjectId()), PROMPT, 'python', 0.7) is None
+    assert DatabaseService.find_reusable_generation(USER_ID, 'reverse a string in place', 'python', 0.7) is None
+
+
+def test_recorded_reuse_is_logged_and_counted(db):
+    generation_id = DatabaseService.save_generation(USER_ID, PROMPT, 'python', CODE, 'Merge sort.')
+    generation = DatabaseService.find_reusable_generation(USER_ID, PROMPT, 'python', 0.8)
+
+    DatabaseService.record_generation_reuse(USER_ID, generation, PROMPT + ' please')
+
+    reuse = db.generation_reuses.find_one()
+    assert reuse['generation_id'] == ObjectId(generation_id)
+    assert reuse['prompt'] == PROMPT + ' please'
+    assert reuse['similarity'] == 1.0
+    stats = db.user_stats.find_one({'_id': ObjectId(USER_ID)})
+    assert stats['actions'] == {'generate': 1, 'reuse': 1}
+    assert stats['total_generations'] == 1
@@ -0,0 +1,64 @@
+"""
+Translation Service Tests - Translate and Benchmark Rows
+"""
+import pytest
+
+from app.services.translation_service import TranslationService
+
+GENERATION = {'_id': 'gen-1', 'generated_code': 'print(2)', 'language': 'python', 'prompt': 'print two'}
+
+# Per-language run results (None means no backend could run it)
+RUNS = {
+    'python': ({'success': True, 'output': '2\n', 'execution_time': 0.03, 'backend': 'local'}, None),
+    'cpp': ({'success': True, 'output': '2', 'execution_time': 0.01, 'backend': 'local'}, None),
+    'java': ({'success': True, 'output': '3\n', 'execution_time': 0.2, 'backend': 'judge0'}, None),
+    'go': (None, 'No execution backend available'),
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    saved = []
+
+    def translate_code(code, source_language, target_language, original_prompt):
+        if target_language == 'rust':
+            return {'success': False, 'error': 'Translation failed'}
+        return {'success': True, 'code': f'// {target_language}', 'explanation': ''}
+
+    def save_generation(**kwargs):
+        saved.append(kwargs)
+        return f"gen-{kwargs['language']}"
+
+    monkeypatch.setattr('app.services.translation_service.GeminiService.translate_code', translate_code)
+    monkeypatch.setattr('app.services.translation_service.DatabaseService.save_generation', save_generation)
+    monkeypatch.setattr('app.services.translation_service.ExecutionService.execute',
+                        lambda code, language, stdin, **kwargs: RUNS[language])
+    return saved
+
+
+def test_rows_compare_outputs_and_timings_with_the_source(service):
+    report = TranslationService.translate_and_benchmark('user-1', GENERATION, ['cpp', 'java', 'go', 'rust'])
+    rows = {row['language']: row for row in report['results']}
+
+    assert report['source']['generation_id'] == 'gen-1'
+    assert [rows[lang]['output_matches_source'] for lang in ('cpp', 'java', 'go', 'rust')] == [True, False, None, None]
+    assert rows['go']['error'] == 'No execution backend available'
+    assert rows['rust']['translation_error'] == 'Translation failed' and rows['rust']['generation_id'] is None
+    assert report['summary'] == {'translated': 3, 'ran': 2, 'matching': 1, 'fastest': 'cpp'}
+
+
+def test_translations_are_saved_against_the_source_generation(service):
+    TranslationService.translate_and_benchmark('user-1', GENERATION, ['cpp', 'rust'])
+
+    assert service == [{'user_id': 'user-1', 'prompt': 'print two', 'language': 'cpp', 'code': '// cpp',
+                        'explanation': '', 'translated_from': 'gen-1'}]
+
+
+def test_dangerous_translations_are_not_run(service, monkeypatch):
+    monkeypatch.setattr('app.services.translation_service.ExecutionService.find_dangerous_pattern',
+                        lambda code, language: 'system(' if language == 'cpp' else None)
+    report = TranslationService.translate_and_benchmark('user-1', GENERATION, ['cpp'])
+
+    assert report['results'][0]['success'] is False
+    assert 'dangerous' in report['results'][0]['error']
+    assert report['summary']['fastest'] == 'python'
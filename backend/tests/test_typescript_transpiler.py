@@ -0,0 +1,94 @@
+"""
+TypeScript Transpiler Tests - Worker Protocol, Caching and ts-node Fallback
+"""
+import shutil
+from collections import OrderedDict
+
+import pytest
+
+from app.services import execution_service, typescript_transpiler
+from app.services.execution_service import ExecutionService
+from app.services.typescript_transpiler import TypeScriptTranspiler
+
+# Stand-in worker: "transpiles" by dropping `: number` annotations, reports `(((` as a syntax error
+FAKE_WORKER = r'''
+require('readline').createInterface({ input: process.stdin }).on('line', (line) => {
+    const request = JSON.parse(line);
+    const response = request.op === 'ping' ? { ok: true, version: 'fake' } : {
+        ok: true,
+        output: request.source.replace(/: number/g, ''),
+        errors: request.source.includes('(((') ? ['main.ts(1,1): error TS1005: ")" expected.'] : []
+    };
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+'''
+
+needs_node = pytest.mark.skipif(shutil.which('node') is None, reason='needs node')
+
+
+@pytest.fixture
+def transpiler(monkeypatch, tmp_path):
+    """Fresh worker state, with the worker script written to a temporary directory."""
+    monkeypatch.setattr(typescript_transpiler.tempfile, 'gettempdir', lambda: str(tmp_path))
+    monkeypatch.setattr(TypeScriptTranspiler, '_process', None)
+    monkeypatch.setattr(TypeScriptTranspiler, '_cache', OrderedDict())
+    monkeypatch.setattr(TypeScriptTranspiler, '_failed_at', 0.0)
+    monkeypatch.setattr(TypeScriptTranspiler, '_node_path', classmethod(lambda cls: ''))
+    yield TypeScriptTranspiler
+    TypeScriptTranspiler.stop()
+
+
+@needs_node
+def test_worker_transpiles_and_caches(transpiler, monkeypatch):
+    monkeypatch.setattr(typescript_transpiler, 'WORKER_SOURCE', FAKE_WORKER)
+    source = 'const x: number = 1;\nconsole.log(x);\n'
+
+    assert transpiler.transpile(source) == {'output': 'const x = 1;\nconsole.log(x);\n', 'errors': []}
+    assert transpiler.transpile(source)['output'] == 'const x = 1;\nconsole.log(x);\n'
+    status = transpiler.status()
+    assert (status['running'], status['typescript_version'], status['hits'] >= 1) == (True, 'fake', True)
+
+
+@needs_node
+def test_programs_run_on_node_from_the_transpiled_output(transpiler, monkeypatch, tmp_path):
+    monkeypatch.setattr(typescript_transpiler, 'WORKER_SOURCE', FAKE_WORKER)
+
+    compiled = ExecutionService.compile_program('const x: number = 6;\nconsole.log(x * 7);\n', 'typescript',
+                                                str(tmp_path))
+    assert compiled['command'] == ['node', str(tmp_path / 'main.js')]
+    assert ExecutionService.run_program(compiled['command'], '', 10, str(tmp_path))['output'] == '42\n'
+
+    failed = ExecutionService.compile_program('console.log(((1);', 'typescript', str(tmp_path))
+    assert failed == {'success': False, 'error': 'Compilation error:\nmain.ts(1,1): error TS1005: ")" expected.'}
+
+
+@needs_node
+def test_broken_worker_falls_back_to_ts_node_and_backs_off(transpiler, monkeypatch, tmp_path):
+    monkeypatch.setattr(typescript_transpiler, 'WORKER_SOURCE', "process.exit(1);\n")
+    starts = []
+    start = TypeScriptTranspiler._start_locked.__func__
+    monkeypatch.setattr(TypeScriptTranspiler, '_start_locked',
+                        classmethod(lambda cls: starts.append(1) or start(cls)))
+
+    assert transpiler.transpile('let a = 1;') is None
+    assert transpiler.transpile('let b = 2;') is None
+    assert starts == [1]
+    assert transpiler.status()['last_error'] == 'TypeScript worker did not respond'
+
+    compiled = ExecutionService.compile_program('let c = 3;', 'typescript', str(tmp_path))
+    assert compiled['command'] == ['npx', 'ts-node', str(tmp_path / 'main.ts')]
+
+
+def test_no_worker_without_node_or_when_disabled(transpiler, monkeypatch):
+    monkeypatch.setenv('TS_TRANSPILER_ENABLED', 'false')
+    assert transpiler.transpile('let a = 1;') is None
+    monkeypatch.setenv('TS_TRANSPILER_ENABLED', 'true')
+    monkeypatch.setattr(typescript_transpiler.shutil, 'which', lambda binary: None)
+    assert transpiler.typecheck('let a: number = "x";') is None
+
+
+def test_type_errors_are_only_reported_on_request(monkeypatch):
+    monkeypatch.setattr(execution_service.TypeScriptTranspiler, 'typecheck',
+                        classmethod(lambda cls, code: ['error TS2322']))
+    assert ExecutionService.check_types('let a: number = "x";', 'typescript') == ['error TS2322']
+    assert ExecutionService.check_types('a = 1', 'python') is None
@@ -0,0 +1,63 @@
+"""
+User Stats Tests - Incremental Totals Against a Full Rebuild
+"""
+from bson.objectid import ObjectId
+
+from app.services.db_service import DatabaseService
+from app.services.write_behind import WriteBehindBuffer
+
+USER_ID = str(ObjectId())
+
+
+def snapshot():
+    return (DatabaseService.get_user_stats(USER_ID),
+            DatabaseService.get_usage_rollups(USER_ID, 'day'),
+            DatabaseService.get_usage_rollups(USER_ID, 'week'))
+
+
+def test_incremental_stats_match_a_rebuild(db):
+    DatabaseService.rebuild_user_stats(USER_ID)
+
+    first = DatabaseService.save_generation(USER_ID, 'sort a list', 'python', 'print(sorted([2, 1]))', '')
+    second = DatabaseService.save_generation(USER_ID, 'hello', 'cpp', 'int main() {}', '')
+    DatabaseService.save_generation(USER_ID, 'sort a list', 'go', 'package main', '', translated_from=first)
+    DatabaseService.update_generation_code(first, USER_ID, 'print(sorted([2, 1], reverse=True))', 'reverse')
+    DatabaseService.record_generation_reuse(USER_ID, DatabaseService.get_generation_by_id(first), 'sort list')
+    DatabaseService.update_generation_code(second, USER_ID, 'int main() { return 0; }')
+    DatabaseService.delete_generation(second, USER_ID)
+
+    incremental = snapshot()
+    DatabaseService.rebuild_user_stats(USER_ID)
+
+    assert incremental == snapshot()
+    assert incremental[0]['total_generations'] == 2
+    assert incremental[0]['actions'] == {'generate': 1, 'translate': 1, 'refine': 1, 'reuse': 1}
+
+
+def test_first_read_builds_totals_from_existing_generations(db):
+    DatabaseService.save_generation(USER_ID, 'hello', 'python', 'print(1)', '')
+    db.user_stats.delete_many({})
+
+    stats = DatabaseService.get_user_stats(USER_ID)
+
+    assert stats['total_generations'] == 1
+    assert stats['language_distribution'] == [{'_id': 'python', 'count': 1}]
+    assert 'rebuilt_at' in db.user_stats.find_one({'_id': ObjectId(USER_ID)})
+
+
+def test_totals_are_written_immediately_and_rollups_survive_a_rebuild(db, monkeypatch):
+    monkeypatch.setenv('WRITE_BEHIND_ENABLED', 'true')
+    monkeypatch.setattr(WriteBehindBuffer, '_ensure_thread', classmethod(lambda cls: None))
+    DatabaseService.rebuild_user_stats(USER_ID)
+
+    DatabaseService.save_generation(USER_ID, 'hello', 'python', 'print(1)', '')
+    assert db.user_stats.find_one({'_id': ObjectId(USER_ID)})['total_generations'] == 1
+    assert db.user_stats_rollups.count_documents({}) == 0
+
+    # The rebuild takes the pending rollup increments with it instead of having them land on top later
+    DatabaseService.rebuild_user_stats(USER_ID)
+    WriteBehindBuffer.flush()
+
+    stats, daily, _ = snapshot()
+    assert stats['total_generations'] == 1
+    assert [bucket['total'] for bucket in daily] == [1]
@@ -0,0 +1,111 @@
+"""
+Write-Behind Buffer Tests - Coalescing, Selective Flushes and Retries
+"""
+import pytest
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.services.db_service import DatabaseService
+from app.services.write_behind import WriteBehindBuffer
+
+
+@pytest.fixture
+def buffer(db, monkeypatch):
+    """Buffer writes into the test database without the background flusher."""
+    monkeypatch.setenv('WRITE_BEHIND_ENABLED', 'true')
+    monkeypatch.setattr(WriteBehindBuffer, '_ensure_thread', classmethod(lambda cls: None))
+    for counter in ('_flushed', '_failed', '_dropped'):
+        monkeypatch.setattr(WriteBehindBuffer, counter, 0)
+    return WriteBehindBuffer
+
+
+class FailingCollection:
+    """Collection stand-in whose bulk writes fail a given number of times."""
+
+    def __init__(self, error, times=1):
+        self.error, self.times, self.batches = error, times, []
+
+    def bulk_write(self, operations, ordered=True):
+        self.batches.append(operations)
+        if len(self.batches) <= self.times:
+            raise self.error
+
+
+def test_updates_of_one_document_are_coalesced(buffer, db):
+    user = ObjectId()
+    buffer.update('user_stats', {'_id': user}, set_fields={'a': 1, 'b': 1}, inc_fields={'n': 2}, upsert=True)
+    buffer.update('user_stats', {'_id': user}, set_fields={'b': 2}, inc_fields={'n': 3, 'm': 1})
+    assert buffer.status()['pending'] == 1
+
+    assert buffer.flush() == 1
+    assert db.user_stats.find_one({'_id': user}) == {'_id': user, 'a': 1, 'b': 2, 'n': 5, 'm': 1}
+    assert buffer.status()['pending'] == 0
+
+
+def test_zero_increments_are_not_written(buffer, db):
+    user = ObjectId()
+    db.user_stats.insert_one({'_id': user, 'n': 1})
+    buffer.update('user_stats', {'_id': user}, inc_fields={'n': 1})
+    buffer.update('user_stats', {'_id': user}, inc_fields={'n': -1})
+    assert buffer.flush() == 0
+    assert db.user_stats.find_one({'_id': user})['n'] == 1
+
+
+def test_flush_writes_only_selected_documents(buffer, db):
+    first, second = ObjectId(), ObjectId()
+    buffer.update('user_stats', {'_id': first}, inc_fields={'n': 1}, upsert=True)
+    buffer.update('user_stats', {'_id': second}, inc_fields={'n': 1}, upsert=True)
+    buffer.update('users', {'_id': first}, set_fields={'seen': True}, upsert=True)
+
+    assert buffer.flush(lambda collection, query: collection == 'user_stats' and query['_id'] == first) == 1
+    assert db.user_stats.count_documents({}) == 1
+    assert buffer.status()['pending'] == 2
+
+
+def test_writer_flushes_when_the_buffer_is_full(buffer, db, monkeypatch):
+    monkeypatch.setenv('WRITE_BEHIND_MAX_PENDING', '3')
+    for _ in range(3):
+        buffer.update('user_stats', {'_id': ObjectId()}, inc_fields={'n': 1}, upsert=True)
+    assert buffer.status()['pending'] == 0
+    assert db.user_stats.count_documents({}) == 3
+
+
+def test_failed_writes_are_requeued_under_newer_updates(buffer, db, monkeypatch):
+    collection = FailingCollection(RuntimeError('connection reset'))
+    monkeypatch.setattr(DatabaseService, 'get_db', classmethod(lambda cls: {'user_stats': collection}))
+    user = ObjectId()
+    buffer.update('user_stats', {'_id': user}, set_fields={'a': 1}, inc_fields={'n': 2}, upsert=True)
+
+    assert buffer.flush() == 0
+    buffer.update('user_stats', {'_id': user}, set_fields={'a': 2}, inc_fields={'n': 1})
+    assert buffer.status()['pending'] == 1 and buffer.status()['failed'] == 1
+
+    assert buffer.flush() == 1
+    assert collection.batches[-1] == [UpdateOne({'_id': user}, {'$set': {'a': 2}, '$inc': {'n': 3}}, upsert=True)]
+
+
+def test_only_reported_bulk_write_errors_are_retried(buffer, db, monkeypatch):
+    error = BulkWriteError({'writeErrors': [{'index': 1, 'code': 11000, 'errmsg': 'duplicate key'}]})
+    collection = FailingCollection(error)
+    monkeypatch.setattr(DatabaseService, 'get_db', classmethod(lambda cls: {'users': collection}))
+    users = [ObjectId() for _ in range(3)]
+    for user in users:
+        buffer.update('users', {'_id': user}, set_fields={'seen': True})
+
+    assert buffer.flush() == 2
+    assert buffer.flush() == 1
+    assert collection.batches[-1] == [UpdateOne({'_id': users[1]}, {'$set': {'seen': True}})]
+
+
+def test_writes_are_dropped_after_max_retries(buffer, db, monkeypatch, capsys):
+    monkeypatch.setenv('WRITE_BEHIND_MAX_RETRIES', '2')
+    collection = FailingCollection(RuntimeError('down'), times=10)
+    monkeypatch.setattr(DatabaseService, 'get_db', classmethod(lambda cls: {'user_stats': collection}))
+    buffer.update('user_stats', {'_id': ObjectId()}, inc_fields={'n': 7})
+
+    for _ in range(3):
+        buffer.flush()
+    assert len(collection.batches) == 3
+    assert buffer.status()['pending'] == 0 and buffer.status()['dropped'] == 1
+    assert "inc={'n': 7}" in capsys.readouterr().out
@@ -57,9 +57,11 @@ export const authAPI = {
 
 // Code Generation API
 export const codeAPI = {
-  generate: (prompt, language) => api.post('/generate', { prompt, language }),
+  generate: (prompt, language, reuse = false) => api.post('/generate', { prompt, language, ...(reuse ? { reuse } : {}) }),
   refine: (generationId, message, conversationHistory) => 
     api.post('/generate/refine', { generation_id: generationId, message, conversation_history: conversationHistory }),
+  translate: (generationId, targetLanguages, input = '', options = {}) =>
+    api.post('/generate/translate', { generation_id: generationId, target_languages: targetLanguages, input, ...options }),
   getLanguages: () => api.get('/languages'),
 };
 
@@ -71,9 +73,25 @@ export const explainAPI = {
 // History API
 export const historyAPI = {
   getHistory: (limit = 20, skip = 0) => api.get(`/history?limit=${limit}&skip=${skip}`),
+  getHistoryPage: (limit = 20, cursor = null) =>
+    api.get('/history', { params: cursor ? { limit, cursor } : { limit } }),
+  search: (query, { languages = [], limit = 20, cursor = null } = {}) =>
+    api.get('/history/search', {
+      params: {
+        q: query,
+        limit,
+        ...(languages.length ? { language: languages.join(',') } : {}),
+        ...(cursor ? { cursor } : {}),
+      },
+    }),
   getGeneration: (id) => api.get(`/history/${id}`),
+  getVersions: (id) => api.get(`/history/${id}/versions`),
+  getVersion: (id, version) => api.get(`/history/${id}/versions/${version}`),
+  getSimilar: (id, threshold = 0.5, limit = 10) =>
+    api.get(`/history/${id}/similar`, { params: { threshold, limit } }),
   deleteGeneration: (id) => api.delete(`/history/${id}`),
   getStats: () => api.get('/stats'),
+  getUsage: (period = 'day', limit = 30) => api.get('/stats/usage', { params: { period, limit } }),
 };
 
 // Favorites API
@@ -96,7 +114,17 @@ export const gistAPI = {
 
 // Code Execution API (for sandbox)
 export const executeAPI = {
-  execute: (code, language, input = '') => api.post('/execute', { code, language, input }),
+  execute: (code, language, input = '', options = {}) => api.post('/execute', { code, language, input, ...options }),
+  runTestCases: (code, language, testCases) => api.post('/execute', { code, language, test_cases: testCases }),
+  executeWithStdinFile: (code, language, stdinFile) => {
+    const form = new FormData();
+    form.append('code', code);
+    form.append('language', language);
+    form.append('stdin', stdinFile);
+    return api.post('/execute', form, { headers: { 'Content-Type': 'multipart/form-data' } });
+  },
+  estimateComplexity: (code, language, options = {}) => api.post('/execute/complexity', { code, language, ...options }),
+  downloadOutput: (handle) => api.get(`/execute/output/${handle}`, { responseType: 'blob' }),
 };
 
 export default api;